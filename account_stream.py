@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式账号与结果
+从文件或标准输入逐行读取账号（JSON lines 或 user----pass），
+每个结果完成后立即追加到 JSONL 结果文件，中断后可据此续跑；
+结果文件与账本、阶段耗时记录一样只保存用户名的哈希
+"""
+
+import sys
+import json
+import hashlib
+import threading
+from tracing import hash_account
+
+
+def parse_account_line(line: str) -> dict:
+    """
+    解析一行账号
+    :param line: {"username": "...", "password": "..."} 或 username----password
+    :return: 账号字典，无法解析时返回 None
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        try:
+            account = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        return account if account.get("username") else None
+    if "----" in line:
+        parts = line.split("----")
+        if len(parts) >= 2:
+            return {"username": parts[0].strip(), "password": parts[1].strip()}
+    return None
+
+
+def iter_accounts(path: str):
+    """
+    逐行读取账号
+    :param path: 文件路径，- 表示标准输入
+    :return: 账号生成器
+    """
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in stream:
+            account = parse_account_line(line)
+            if account:
+                yield account
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def account_key(username: str) -> str:
+    """结果文件中的账号键（与阶段耗时记录相同的脱敏哈希）"""
+    return hash_account(username)
+
+
+def result_key(result: dict) -> str:
+    """
+    结果对应的账号键
+    :param result: 结果文件中的一条记录，旧版本的记录保存的是明文用户名
+    """
+    return result.get("account") or account_key(result["username"])
+
+
+def parse_shard(spec: str) -> tuple:
+    """
+    解析分片参数
+    :param spec: i/n，i 从 0 开始
+    :return: (i, n)
+    """
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"分片格式应为 i/n: {spec}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"分片编号超出范围: {spec}")
+    return index, count
+
+
+def in_shard(username: str, index: int, count: int) -> bool:
+    """
+    账号是否属于指定分片（按用户名的稳定哈希，与账号列表的顺序和增删无关）
+    :param username: 用户名
+    :param index: 分片编号
+    :param count: 分片总数
+    """
+    digest = hashlib.sha256(username.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index
+
+
+def read_results(paths: list):
+    """
+    读取多个结果文件，同一账号出现多次时只要有一次成功即视为成功
+    每个账号只保留 (是否成功, 失败类型, 引擎)，内存占用不随结果明细增长
+    :param paths: 结果文件列表
+    :return: {"account", "success", "reason", "engine"} 生成器
+    """
+    merged = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                    key = result_key(result)
+                    success = bool(result["success"])
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue
+                previous = merged.get(key)
+                if previous is None or (success and not previous[0]):
+                    merged[key] = (success, result.get("reason"), result.get("engine"))
+    for key, (success, reason, engine) in merged.items():
+        yield {"account": key, "success": success, "reason": reason, "engine": engine}
+
+
+class ResultLog:
+    """追加写入的 JSONL 结果文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def completed(self) -> set:
+        """
+        读取已有结果中签到成功的账号（用于续跑，失败的账号会重新签到）
+        :return: account_key 集合
+        """
+        done = set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                        if result.get("success"):
+                            done.add(result_key(result))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        # 中断时可能留下半行
+                        continue
+        except OSError:
+            pass
+        return done
+
+    def _ends_with_newline(self) -> bool:
+        """已有文件是否以换行结尾"""
+        with open(self.path, "rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+    def append(self, result: dict):
+        """写入一条结果并立即落盘（用户名替换为哈希）"""
+        record = dict(result)
+        record["account"] = account_key(record.pop("username", ""))
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+                if self._file.tell() and not self._ends_with_newline():
+                    # 上次中断留下的半行单独成行，避免与新结果粘连
+                    self._file.write("\n")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        """关闭文件"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
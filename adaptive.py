@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应并发
+根据可用内存、CPU 负载、浏览器与 OCR 实测内存占用和单账号耗时，运行中动态调整并发数：
+内存紧张或耗时明显变长时降低，有余量时提高，并记录每次调整和峰值内存
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from driver_pool import process_tree_rss
+
+
+def available_memory() -> int:
+    """
+    可用内存字节数（取系统可用内存与 cgroup 剩余额度的较小值，非Linux返回0）
+    """
+    available = 0
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError):
+        return 0
+
+    # 容器内受 cgroup v2 限制
+    try:
+        with open("/sys/fs/cgroup/memory.max", "r") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            with open("/sys/fs/cgroup/memory.current", "r") as f:
+                current = int(f.read().strip())
+            available = min(available, int(limit) - current)
+    except (OSError, ValueError):
+        pass
+    return max(0, available)
+
+
+def cpu_count() -> int:
+    """当前进程可用的CPU数"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class AdaptiveConcurrency:
+    """自适应并发控制器"""
+
+    # 没有实测数据时估计的单个工作者内存（Chrome + OCR）
+    DEFAULT_WORKER_MB = 400
+    # 后台采样间隔（秒）
+    SAMPLE_INTERVAL = 1.0
+
+    def __init__(self, minimum: int = 1, maximum: int = None, reserve_mb: int = None,
+                 cooldown: float = 10.0):
+        """
+        初始化
+        :param minimum: 最小并发数
+        :param maximum: 最大并发数，默认读取 RAINYUN_CONCURRENCY_MAX，未设置时为CPU数
+        :param reserve_mb: 需要保留的空闲内存（MB），默认读取 RAINYUN_MEMORY_RESERVE_MB
+        :param cooldown: 任何调整之后至少间隔多久才能扩容（秒），缩容不受限制
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum or
+                           int(os.environ.get("RAINYUN_CONCURRENCY_MAX", cpu_count())))
+        self.reserve = int(reserve_mb if reserve_mb is not None else
+                           os.environ.get("RAINYUN_MEMORY_RESERVE_MB", "256")) * 1024 * 1024
+        self.cooldown = cooldown
+        self.pid = os.getpid()
+        self.baseline_rss = process_tree_rss(self.pid)
+        self.peak_rss = self.baseline_rss
+        self.worker_rss = self.DEFAULT_WORKER_MB * 1024 * 1024
+        # 单账号耗时的指数移动平均，以及前几个账号得到的基准
+        self.latency = None
+        self.latency_baseline = None
+        self._samples = 0
+        self.active = 0
+        # 最近的调整记录: (时间, 原并发, 新并发, 原因)，常驻运行时只保留最近的
+        self.decisions = deque(maxlen=100)
+        self.adjustments = 0
+        self._last_change = 0.0
+        # 绑定的驱动池：并发变化时同步调整池大小，估算内存时扣除空闲浏览器
+        self.pool = None
+        self._resized = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.limit = self._initial_limit()
+        self._sampler = threading.Thread(target=self._sample_loop, name="adaptive-sampler",
+                                         daemon=True)
+        self._sampler.start()
+
+    def _initial_limit(self) -> int:
+        """按可用内存估算初始并发"""
+        available = available_memory()
+        if not available:
+            return self.minimum
+        by_memory = int((available - self.reserve) // self.worker_rss)
+        return max(self.minimum, min(self.maximum, by_memory))
+
+    def _set(self, limit: int, reason: str):
+        """调整并发（调用方持有锁）"""
+        limit = max(self.minimum, min(self.maximum, limit))
+        if limit == self.limit:
+            return
+        self.decisions.append((time.time(), self.limit, limit, reason))
+        self.adjustments += 1
+        print(f"📐 并发 {self.limit} → {limit}（{reason}）")
+        self._last_change = time.monotonic()
+        self.limit = limit
+        self._resized = True
+
+    def bind_pool(self, pool):
+        """
+        绑定驱动池，池大小跟随并发数
+        :param pool: driver_pool.DriverPool
+        """
+        self.pool = pool
+        pool.resize(self.limit)
+
+    def _apply_resize(self):
+        """并发变化后调整驱动池（在锁外调用，关闭浏览器可能较慢）"""
+        with self._lock:
+            resized, self._resized = self._resized, False
+            limit = self.limit
+        if resized and self.pool:
+            self.pool.resize(limit)
+
+    def _sample_loop(self):
+        """后台采样内存：记录峰值，内存紧张时立即缩容"""
+        while not self._stop.wait(self.SAMPLE_INTERVAL):
+            rss = process_tree_rss(self.pid)
+            # 空闲浏览器不属于任何工作者，缩容时会被关闭
+            idle = self.pool.idle_rss() if self.pool else 0
+            available = available_memory()
+            with self._lock:
+                self.peak_rss = max(self.peak_rss, rss)
+                if self.active:
+                    # 实测每个工作者的内存（含浏览器和OCR模型）
+                    measured = max(0, rss - idle - self.baseline_rss) / self.active
+                    if measured:
+                        self.worker_rss = int(0.7 * self.worker_rss + 0.3 * measured)
+                # 已缩容但还没有账号完成时不再继续缩
+                if available and available < self.reserve and self.limit >= self.active:
+                    self._set(self.limit - 1, f"可用内存 {available / 1024 / 1024:.0f} MB")
+            self._apply_resize()
+
+    def started(self):
+        """一个账号开始处理"""
+        with self._lock:
+            self.active += 1
+
+    def finished(self, duration: float):
+        """
+        一个账号处理完成，据此调整并发
+        :param duration: 该账号耗时（秒）
+        """
+        with self._lock:
+            self.active = max(0, self.active - 1)
+            self._samples += 1
+            self.latency = duration if self.latency is None else \
+                0.7 * self.latency + 0.3 * duration
+            if self._samples == 3:
+                self.latency_baseline = self.latency
+            self._adjust()
+        self._apply_resize()
+
+    def _adjust(self):
+        """根据当前指标调整并发（调用方持有锁）"""
+        available = available_memory()
+        if available and available < self.reserve + self.worker_rss // 2:
+            self._set(self.limit - 1, f"可用内存 {available / 1024 / 1024:.0f} MB")
+            return
+        if self.latency_baseline and self.latency > self.latency_baseline * 1.5:
+            self._set(self.limit - 1, f"单账号耗时升至 {self.latency:.1f}s")
+            # 以降级后的耗时作为新基准，避免持续缩容
+            self.latency_baseline = self.latency
+            return
+
+        if self.limit >= self.maximum or time.monotonic() - self._last_change < self.cooldown:
+            return
+        load = os.getloadavg()[0] if hasattr(os, "getloadavg") else 0.0
+        if load >= cpu_count():
+            return
+        if not available or available - self.reserve > self.worker_rss * 1.5:
+            self._set(self.limit + 1, "内存与CPU有余量")
+
+    def close(self):
+        """停止后台采样"""
+        self._stop.set()
+        self._sampler.join(timeout=2)
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, process_tree_rss(self.pid))
+
+    def summary(self) -> list:
+        """汇总行"""
+        lines = [f"📐 自适应并发: 最终 {self.limit}（{self.minimum}-{self.maximum}），"
+                 f"调整 {self.adjustments} 次，峰值内存 {self.peak_rss / 1024 / 1024:.0f} MB，"
+                 f"单个工作者约 {self.worker_rss / 1024 / 1024:.0f} MB"]
+        for at, old, new, reason in list(self.decisions)[-10:]:
+            lines.append(f"   {time.strftime('%H:%M:%S', time.localtime(at))} "
+                         f"{old} → {new}: {reason}")
+        return lines
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试
+启动本地模拟雨云服务，用 main_multi.py 分别跑 1 / 10 / 100 个账号，
+统计总耗时、单账号耗时分布和峰值内存；浏览器引擎可用 --browsers selenium,cdp 在同一流程上对比两种浏览器后端
+
+用法: python benchmark.py [--accounts 1,10,100] [--engine http] [--concurrency 4]
+                          [--browsers selenium,cdp] [--latency 20] [--fail-rate 0] [--captcha]
+                          [--warm] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from mock_server import serve
+from driver_pool import process_tree_rss
+
+
+def percentile(values: list, q: float) -> float:
+    """最近秩分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def run_scenario(count: int, args, state_dir: str, browser: str = "selenium") -> dict:
+    """
+    跑一个场景
+    :param count: 账号数量
+    :param args: 命令行参数
+    :param state_dir: 状态目录
+    :param browser: 浏览器后端
+    :return: 统计结果
+    """
+    server, mock, base_url = serve(latency=args.latency / 1000, fail_rate=args.fail_rate,
+                                   captcha=args.captcha)
+    trace_dir = os.path.join(state_dir, f"traces-{count}-{int(time.time() * 1000)}")
+    accounts = [{"username": f"bench{i:05d}", "password": "password"} for i in range(count)]
+    env = dict(os.environ,
+               RAINYUN_BASE_URL=base_url,
+               RAINYUN_ACCOUNTS=json.dumps(accounts),
+               RAINYUN_ENGINE=args.engine,
+               RAINYUN_BROWSER=browser,
+               RAINYUN_CONCURRENCY=str(args.concurrency),
+               RAINYUN_RATE_INTERVAL=str(args.rate_interval),
+               RAINYUN_RATE_JITTER="0",
+               RAINYUN_STATE_DIR=state_dir,
+               RAINYUN_TRACE="1",
+               RAINYUN_TRACE_DIR=trace_dir)
+
+    start = time.monotonic()
+    proc = subprocess.Popen([sys.executable, "main_multi.py"], env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL if not args.verbose else None,
+                            stderr=subprocess.STDOUT if not args.verbose else None)
+
+    # 采样子进程树（含浏览器）的内存峰值
+    peak = {"rss": 0}
+
+    def sample():
+        while proc.poll() is None:
+            peak["rss"] = max(peak["rss"], process_tree_rss(proc.pid))
+            time.sleep(0.1)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    returncode = proc.wait()
+    wall = time.monotonic() - start
+    sampler.join()
+    server.shutdown()
+
+    latencies = []
+    # 浏览器启动和页面操作阶段的耗时，用于对比浏览器后端
+    phases = {"init_driver": [], "login": [], "signin": []}
+    success = 0
+    for name in os.listdir(trace_dir) if os.path.isdir(trace_dir) else []:
+        # 同目录下还有 Prometheus textfile（rainyun.prom），只读阶段记录
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(trace_dir, name), "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["phase"] == "account":
+                    latencies.append(record["duration"])
+                    success += record["outcome"] == "ok"
+                elif record["phase"] in phases:
+                    phases[record["phase"]].append(record["duration"])
+
+    return {
+        "accounts": count,
+        "engine": args.engine,
+        "browser": browser if args.engine != "http" else None,
+        "wall_seconds": round(wall, 3),
+        "account_p50": round(percentile(latencies, 0.5), 4),
+        "account_p95": round(percentile(latencies, 0.95), 4),
+        "account_mean": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+        "success": success,
+        "init_p50": round(percentile(phases["init_driver"], 0.5), 4),
+        "login_p50": round(percentile(phases["login"], 0.5), 4),
+        "signin_p50": round(percentile(phases["signin"], 0.5), 4),
+        "peak_rss_mb": round(peak["rss"] / 1024 / 1024, 1),
+        "requests": sum(v for k, v in mock.stats.items() if k != "injected_failures"),
+        "exit_code": returncode
+    }
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="雨云签到基准测试")
+    parser.add_argument("--accounts", default="1,10,100", help="账号数量，逗号分隔")
+    parser.add_argument("--engine", default="http", choices=["http", "selenium", "auto"])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--browsers", default="selenium",
+                        help="浏览器后端，逗号分隔（如 selenium,cdp），仅浏览器引擎有效")
+    parser.add_argument("--rate-interval", type=float, default=0, help="同一主机账号间隔（秒）")
+    parser.add_argument("--latency", type=float, default=20, help="模拟服务延迟（毫秒）")
+    parser.add_argument("--fail-rate", type=float, default=0)
+    parser.add_argument("--captcha", action="store_true")
+    parser.add_argument("--warm", action="store_true", help="各场景共用状态目录（测缓存效果）")
+    parser.add_argument("--json", help="结果写入JSON文件")
+    parser.add_argument("--verbose", action="store_true", help="显示签到输出")
+    args = parser.parse_args()
+
+    browsers = [b.strip() for b in args.browsers.split(",") if b.strip()]
+    if args.engine == "http":
+        browsers = browsers[:1]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="rainyun-bench-") as shared_dir:
+        for count in [int(c) for c in args.accounts.split(",") if c.strip()]:
+            # 同一账号数下依次跑各个后端，便于对比
+            for browser in browsers:
+                if args.warm:
+                    state_dir = os.path.join(shared_dir, browser)
+                    os.makedirs(state_dir, exist_ok=True)
+                else:
+                    state_dir = tempfile.mkdtemp(prefix=f"{count}-{browser}-", dir=shared_dir)
+                label = args.engine if args.engine == "http" else f"{args.engine}/{browser}"
+                print(f"🏃 {count} 个账号 ({label}) ...")
+                results.append(run_scenario(count, args, state_dir, browser))
+
+    print("=" * 106)
+    print(f"{'账号':>6} {'后端':>9} {'总耗时s':>9} {'p50 s':>8} {'p95 s':>8} {'均值 s':>8} "
+          f"{'启动p50':>8} {'登录p50':>8} {'签到p50':>8} {'成功':>6} {'峰值MB':>8} {'请求数':>7}")
+    for r in results:
+        print(f"{r['accounts']:>6} {r['browser'] or '-':>9} {r['wall_seconds']:>9.2f} "
+              f"{r['account_p50']:>8.3f} {r['account_p95']:>8.3f} {r['account_mean']:>8.3f} "
+              f"{r['init_p50']:>8.3f} {r['login_p50']:>8.3f} {r['signin_p50']:>8.3f} "
+              f"{r['success']:>6} {r['peak_rss_mb']:>8.1f} {r['requests']:>7}")
+    print("=" * 106)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器后端
+RainyunSignin 及定位器、页面探针、验证码获取、流量统计只使用 WebDriver 的一小部分接口，
+任何实现了这些接口的对象都可以作为浏览器后端：
+
+    driver.get(url)                          打开页面（按页面加载策略等待）
+    driver.current_url                       当前地址
+    driver.execute_script(script, *args)     执行脚本，参数和返回值可以包含元素
+    driver.execute_async_script(script, *args)
+    driver.set_script_timeout(seconds)
+    driver.implicitly_wait(seconds)
+    driver.execute_cdp_cmd(method, params)   直接发送CDP命令
+    driver.get_cookies()                     Selenium 格式的 cookies
+    driver.get_log("performance")            性能日志（CDP Network 事件）
+    driver.save_screenshot(filename) / driver.get_screenshot_as_png()
+    driver.quit()
+
+    element.click() / element.clear() / element.send_keys(text) / element.screenshot_as_png
+
+selenium - Selenium WebDriver，命令经 chromedriver 转发给 Chrome
+cdp      - cdp_driver.CdpDriver，直接连接 Chrome 的 DevTools websocket，不启动 chromedriver
+"""
+
+import os
+
+
+BACKENDS = ("selenium", "cdp")
+
+# 两种后端共用的 Chrome 启动参数
+CHROME_ARGUMENTS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--window-size=1920,1080",
+    "--disable-blink-features=AutomationControlled",
+]
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+# 防止被检测：每个新文档加载前执行
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    })
+"""
+
+
+def backend_name() -> str:
+    """当前使用的浏览器后端（RAINYUN_BROWSER，默认 selenium）"""
+    name = os.environ.get("RAINYUN_BROWSER", "selenium").lower()
+    if name not in BACKENDS:
+        raise ValueError(f"未知的浏览器后端: {name}（可选 {', '.join(BACKENDS)}）")
+    return name
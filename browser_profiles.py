@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化浏览器配置目录
+每个账号使用独立的 Chrome --user-data-dir，重复运行时静态资源走磁盘缓存、localStorage 保留；
+限制单个配置的磁盘缓存大小，并按最近使用时间清理，保持总占用有界
+"""
+
+import os
+import time
+import shutil
+import hashlib
+import threading
+from state import state_path
+
+
+# 清理时优先删除的缓存目录（删除后登录状态仍在）
+CACHE_DIRS = (
+    os.path.join("Default", "Cache"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+    "GrShaderCache",
+    "ShaderCache",
+)
+
+
+def profiles_enabled() -> bool:
+    """是否为每个账号使用持久化配置目录（RAINYUN_PROFILES=1）"""
+    return os.environ.get("RAINYUN_PROFILES", "0") == "1"
+
+
+def dir_size(path: str) -> int:
+    """目录占用的字节数"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ProfileStore:
+    """按账号分配的 Chrome 配置目录"""
+
+    def __init__(self, directory: str = None, cache_mb: int = None,
+                 max_total_mb: int = None, max_age_days: int = None):
+        """
+        初始化
+        :param directory: 存放配置目录的位置，默认在状态目录下的 profiles
+        :param cache_mb: 单个配置的磁盘缓存上限（MB），默认读取 RAINYUN_PROFILE_CACHE_MB
+        :param max_total_mb: 所有配置的总占用上限（MB），默认读取 RAINYUN_PROFILE_MAX_MB
+        :param max_age_days: 超过多少天未使用的配置直接删除，默认读取 RAINYUN_PROFILE_MAX_AGE_DAYS
+        """
+        env = os.environ.get
+        self.directory = directory or state_path("profiles", "")
+        self.cache_bytes = (cache_mb if cache_mb is not None else
+                            int(env("RAINYUN_PROFILE_CACHE_MB", "64"))) * 1024 * 1024
+        self.max_total = (max_total_mb if max_total_mb is not None else
+                          int(env("RAINYUN_PROFILE_MAX_MB", "1024"))) * 1024 * 1024
+        self.max_age = (max_age_days if max_age_days is not None else
+                        int(env("RAINYUN_PROFILE_MAX_AGE_DAYS", "30"))) * 86400
+        self._lock = threading.Lock()
+
+    def path_for(self, username: str) -> str:
+        """
+        账号的配置目录（目录名不暴露用户名），并更新最近使用时间
+        :param username: 用户名
+        :return: 目录路径
+        """
+        digest = hashlib.sha256(username.encode("utf-8")).hexdigest()[:16]
+        path = os.path.abspath(os.path.join(self.directory, digest))
+        os.makedirs(path, exist_ok=True)
+        os.utime(path)
+        return path
+
+    def apply_options(self, chrome_options, username: str):
+        """
+        设置启动参数：配置目录和磁盘缓存上限
+        :param chrome_options: selenium ChromeOptions
+        :param username: 用户名
+        """
+        chrome_options.add_argument(f"--user-data-dir={self.path_for(username)}")
+        chrome_options.add_argument(f"--disk-cache-size={self.cache_bytes}")
+
+    def _profiles(self) -> list:
+        """所有配置目录: [(最近使用时间, 路径)]，按时间从旧到新"""
+        profiles = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path):
+                profiles.append((os.stat(path).st_mtime, path))
+        return sorted(profiles)
+
+    def disk_usage(self) -> int:
+        """所有配置目录的总字节数"""
+        return sum(dir_size(path) for _, path in self._profiles())
+
+    def prune(self) -> dict:
+        """
+        清理配置目录：删除过期配置；仍超出总上限时从最久未用的配置开始先删缓存，再删整个配置
+        :return: {"expired", "caches", "removed", "bytes"} 清理统计与清理后的总字节数
+        """
+        stats = {"expired": 0, "caches": 0, "removed": 0, "bytes": 0}
+        with self._lock:
+            now = time.time()
+            sizes = {}
+            for mtime, path in self._profiles():
+                if now - mtime > self.max_age:
+                    shutil.rmtree(path, ignore_errors=True)
+                    stats["expired"] += 1
+                else:
+                    sizes[path] = dir_size(path)
+
+            total = sum(sizes.values())
+            oldest_first = [path for _, path in self._profiles() if path in sizes]
+            for path in oldest_first:
+                if total <= self.max_total:
+                    break
+                for cache in CACHE_DIRS:
+                    shutil.rmtree(os.path.join(path, cache), ignore_errors=True)
+                stats["caches"] += 1
+                total -= sizes[path] - dir_size(path)
+                sizes[path] = dir_size(path)
+            # 仍超出时按最久未用删除整个配置，最近使用的一个始终保留
+            for path in oldest_first[:-1]:
+                if total <= self.max_total:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                stats["removed"] += 1
+                total -= sizes.pop(path)
+            stats["bytes"] = total
+        if stats["expired"] or stats["caches"] or stats["removed"]:
+            print(f"🧹 配置目录清理: 过期 {stats['expired']} 个, 清缓存 {stats['caches']} 个, "
+                  f"删除 {stats['removed']} 个, 剩余 {total / 1024 / 1024:.0f} MB")
+        return stats
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_profile_store() -> ProfileStore:
+    """获取进程内共享的配置目录管理"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = ProfileStore()
+        return _shared_store
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码图片获取
+一次脚本调用在页面内拿到验证码图片：data: URI 直接解码，已加载的图片从 canvas 读取（与页面显示的是同一张），
+未加载时（如精简浏览关闭了图片）用页面自己的会话 fetch；都失败时才用带浏览器 cookies 的连接池请求，
+记录每次获取的方式和耗时
+"""
+
+import time
+import base64
+from urllib.parse import unquote_to_bytes
+from tracing import get_tracer
+
+
+# 返回 {method, data(base64) | src | error}
+_GRAB_SCRIPT = """
+const el = arguments[0], done = arguments[arguments.length - 1];
+const toBase64 = url => url.slice(url.indexOf(',') + 1);
+
+if (el.tagName === 'CANVAS') {
+    try { return done({method: 'canvas', data: toBase64(el.toDataURL('image/png'))}); }
+    catch (e) { return done({method: 'canvas', error: String(e)}); }
+}
+
+const src = el.currentSrc || el.src || '';
+if (src.startsWith('data:')) return done({method: 'data', src: src});
+
+if (el.complete && el.naturalWidth) {
+    try {
+        const canvas = document.createElement('canvas');
+        canvas.width = el.naturalWidth;
+        canvas.height = el.naturalHeight;
+        canvas.getContext('2d').drawImage(el, 0, 0);
+        return done({method: 'canvas', data: toBase64(canvas.toDataURL('image/png'))});
+    } catch (e) {
+        // 跨域图片会污染 canvas，改用 fetch
+    }
+}
+
+const controller = new AbortController();
+const timer = setTimeout(() => controller.abort(), 8000);
+fetch(src, {credentials: 'include', cache: 'force-cache', signal: controller.signal})
+    .then(response => {
+        if (!response.ok) throw new Error('HTTP ' + response.status);
+        return response.blob();
+    })
+    .then(blob => {
+        const reader = new FileReader();
+        reader.onload = () => done({method: 'fetch', data: toBase64(reader.result)});
+        reader.onerror = () => done({method: 'fetch', error: 'read failed', src: src});
+        reader.readAsDataURL(blob);
+    })
+    .catch(e => done({method: 'fetch', error: String(e), src: src}))
+    .finally(() => clearTimeout(timer));
+"""
+
+
+def decode_data_uri(uri: str) -> bytes:
+    """
+    解码 data: URI
+    :param uri: data:[<mediatype>][;base64],<data>
+    :return: 图片数据
+    """
+    header, _, payload = uri.partition(",")
+    if header.endswith(";base64"):
+        return base64.b64decode(payload)
+    return unquote_to_bytes(payload)
+
+
+class CaptchaFetcher:
+    """浏览器中的验证码图片获取"""
+
+    def __init__(self, driver, username: str = None, allow_screenshot: bool = True):
+        """
+        初始化
+        :param driver: WebDriver
+        :param username: 用户名（用于阶段耗时记录）
+        :param allow_screenshot: 其他方式都失败时是否退回元素截图（未加载图片时应关闭）
+        """
+        self.driver = driver
+        self.username = username
+        self.allow_screenshot = allow_screenshot
+        # 每次获取的记录: (方式, 耗时秒, 字节数)
+        self.timings = []
+
+    def fetch(self, element) -> bytes:
+        """
+        获取验证码图片
+        :param element: 验证码 img / canvas 元素
+        :return: 图片数据，失败时返回 None
+        """
+        start = time.monotonic()
+        with get_tracer().span("captcha_fetch", self.username) as span:
+            method, data = self._grab(element)
+            span.outcome = "ok" if data else "fail"
+            span.attrs["method"] = method
+        elapsed = time.monotonic() - start
+        self.timings.append((method, elapsed, len(data or b"")))
+        if data:
+            print(f"🖼️ 验证码图片: {method}, {elapsed * 1000:.0f} ms, {len(data) / 1024:.1f} KB")
+        return data
+
+    def _grab(self, element) -> tuple:
+        """
+        依次尝试页面内获取、连接池请求、元素截图
+        :return: (方式, 图片数据)
+        """
+        src = None
+        try:
+            result = self.driver.execute_async_script(_GRAB_SCRIPT, element) or {}
+            if result.get("data"):
+                return result["method"], base64.b64decode(result["data"])
+            if result.get("src", "").startswith("data:"):
+                return "data", decode_data_uri(result["src"])
+            src = result.get("src")
+            if result.get("error"):
+                print(f"⚠️ 页面内获取验证码失败: {result['error']}")
+        except Exception as e:
+            print(f"⚠️ 页面内获取验证码失败: {e}")
+
+        if src:
+            data = self._fetch_with_cookies(src)
+            if data:
+                return "session", data
+
+        if not self.allow_screenshot:
+            return "none", None
+        try:
+            # 最后手段：元素截图
+            return "screenshot", element.screenshot_as_png
+        except Exception as e:
+            print(f"⚠️ 验证码截图失败: {e}")
+            return "none", None
+
+    def _fetch_with_cookies(self, src: str) -> bytes:
+        """
+        带上浏览器 cookies 通过共享连接池请求图片
+        :param src: 图片地址
+        :return: 图片数据，失败时返回 None
+        """
+        import requests
+        from http_signin import _shared_adapter
+
+        try:
+            cookies = {c["name"]: c["value"] for c in self.driver.get_cookies()}
+            headers = {"User-Agent": self.driver.execute_script("return navigator.userAgent"),
+                       "Referer": self.driver.current_url}
+            # 每次新建 Session 以免不同账号的 cookies 互相串用，连接由共享适配器复用
+            # （不调用 session.close()，避免关闭共享连接池）
+            session = requests.Session()
+            session.mount("https://", _shared_adapter)
+            session.mount("http://", _shared_adapter)
+            response = session.get(src, cookies=cookies, headers=headers, timeout=10)
+            if response.status_code == 200 and response.content:
+                return response.content
+        except Exception as e:
+            print(f"⚠️ 请求验证码图片失败: {e}")
+        return None
+
+    def summary(self) -> str:
+        """获取耗时汇总"""
+        total = sum(t[1] for t in self.timings)
+        methods = ", ".join(sorted({t[0] for t in self.timings}))
+        return f"{len(self.timings)} 次, 共 {total * 1000:.0f} ms ({methods})"
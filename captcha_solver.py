@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码识别流水线
+图片预处理（灰度、二值化、去噪）后多路识别投票，提交前校验长度与字符集，
+按图片哈希缓存结果，并统计识别命中率
+"""
+
+import os
+import re
+import hashlib
+import threading
+from io import BytesIO
+from collections import Counter, OrderedDict
+from ocr_provider import get_ocr
+
+
+class CaptchaSolver:
+    """验证码识别器"""
+
+    # 缓存的图片数量上限
+    CACHE_SIZE = 1024
+
+    def __init__(self, ocr=None, min_length: int = None, max_length: int = None,
+                 charset: str = None):
+        """
+        初始化
+        :param ocr: 具有 classification(bytes) 接口的OCR模型，默认使用共享模型
+        :param min_length: 最短长度，默认读取 RAINYUN_CAPTCHA_LENGTH（如 4-6）
+        :param max_length: 最长长度
+        :param charset: 允许的字符（正则字符类内容），默认字母和数字
+        """
+        length = os.environ.get("RAINYUN_CAPTCHA_LENGTH", "4-6").split("-")
+        self.ocr = ocr or get_ocr()
+        self.min_length = min_length or int(length[0])
+        self.max_length = max_length or int(length[-1])
+        self.pattern = re.compile(f"^[{charset or '0-9A-Za-z'}]+$")
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # 统计: 识别次数 / 缓存命中 / 校验拒绝 / 提交后正确 / 提交后错误
+        self.stats = {"solved": 0, "cache_hits": 0, "rejected": 0,
+                      "accepted": 0, "wrong": 0}
+
+    def _variants(self, img_bytes: bytes) -> list:
+        """生成预处理后的图片变体（原图在前，投票平局时优先）"""
+        from PIL import Image, ImageFilter, ImageOps
+
+        variants = [img_bytes]
+        try:
+            image = Image.open(BytesIO(img_bytes))
+            gray = ImageOps.grayscale(image)
+            # 以平均灰度为阈值二值化
+            histogram = gray.histogram()
+            pixels = sum(histogram) or 1
+            threshold = sum(i * n for i, n in enumerate(histogram)) / pixels
+            binary = gray.point(lambda p: 255 if p > threshold else 0)
+            denoised = binary.filter(ImageFilter.MedianFilter(3))
+            for variant in (gray, binary, denoised):
+                buffer = BytesIO()
+                variant.save(buffer, format="PNG")
+                variants.append(buffer.getvalue())
+        except Exception:
+            # 无法解析的图片只识别原图
+            pass
+        return variants
+
+    def is_valid(self, code: str) -> bool:
+        """检查识别结果的长度与字符集"""
+        return (self.min_length <= len(code) <= self.max_length
+                and bool(self.pattern.match(code)))
+
+    def solve(self, img_bytes: bytes) -> str:
+        """
+        识别验证码
+        :param img_bytes: 图片数据
+        :return: 识别结果，不符合规则时返回空字符串（调用方应刷新验证码）
+        """
+        digest = hashlib.sha256(img_bytes).hexdigest()
+        with self._lock:
+            self.stats["solved"] += 1
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                self.stats["cache_hits"] += 1
+                return self._cache[digest]
+
+        votes = Counter()
+        for variant in self._variants(img_bytes):
+            try:
+                code = re.sub(r"\s+", "", self.ocr.classification(variant) or "")
+            except Exception:
+                continue
+            if self.is_valid(code):
+                votes[code] += 1
+
+        if not votes:
+            with self._lock:
+                self.stats["rejected"] += 1
+            return ""
+
+        # Counter 按首次出现顺序处理平局
+        code = votes.most_common(1)[0][0]
+        with self._lock:
+            self._cache[digest] = code
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return code
+
+    def record_outcome(self, img_bytes: bytes, correct: bool):
+        """
+        记录提交结果，错误的结果从缓存中移除
+        :param img_bytes: 图片数据
+        :param correct: 提交后是否通过
+        """
+        digest = hashlib.sha256(img_bytes).hexdigest()
+        with self._lock:
+            if correct:
+                self.stats["accepted"] += 1
+            else:
+                self.stats["wrong"] += 1
+                self._cache.pop(digest, None)
+
+    def summary(self) -> str:
+        """识别统计汇总"""
+        stats = self.stats
+        submitted = stats["accepted"] + stats["wrong"]
+        hit_rate = f"{stats['accepted'] / submitted:.0%}" if submitted else "-"
+        return (f"识别 {stats['solved']} 次, 缓存命中 {stats['cache_hits']}, "
+                f"校验拒绝 {stats['rejected']}, 提交正确率 {hit_rate}")
+
+
+_shared_solver = None
+_shared_solver_lock = threading.Lock()
+
+
+def get_solver() -> CaptchaSolver:
+    """获取进程内共享的验证码识别器"""
+    global _shared_solver
+    with _shared_solver_lock:
+        if _shared_solver is None:
+            _shared_solver = CaptchaSolver()
+        return _shared_solver
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+直连 CDP 的浏览器后端
+自己启动 Chrome 并连接页面的 DevTools websocket，每个操作直接是一条CDP命令，
+省去 chromedriver 进程和每条命令经过它的一次 HTTP 转发；接口与 WebDriver 中本项目用到的部分一致
+（见 browser_backend.py），定位器、页面探针等无需改动
+
+websocket 客户端使用 selenium 自身依赖的 websocket-client，不额外增加依赖
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import shutil
+import tempfile
+import threading
+import subprocess
+from urllib.request import Request, urlopen
+from browser_backend import CHROME_ARGUMENTS, USER_AGENT, STEALTH_SCRIPT
+
+
+# Chrome 可执行文件的常见名称与路径
+CHROME_CANDIDATES = [
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+]
+
+# 包装待执行的脚本：与 WebDriver 一样通过 arguments 取参数，返回值中的节点替换为占位符，
+# 节点本身暂存在页面里，再逐个取回句柄
+_SCRIPT_WRAPPER = """
+async function(...args) {
+    const script = function() { __BODY__ };
+    const result = await __CALL__;
+    const nodes = [];
+    const encode = value => {
+        if (value instanceof Node) {
+            nodes.push(value);
+            return {__node__: nodes.length - 1};
+        }
+        if (Array.isArray(value) || value instanceof NodeList || value instanceof HTMLCollection) {
+            return Array.from(value, encode);
+        }
+        if (value && typeof value === 'object') {
+            const out = {};
+            for (const key of Object.keys(value)) out[key] = encode(value[key]);
+            return out;
+        }
+        return value === undefined ? null : value;
+    };
+    const encoded = encode(result);
+    globalThis.__rainyunNodes = nodes;
+    return {value: encoded, nodes: nodes.length};
+}
+"""
+_SYNC_CALL = "script.apply(this, args)"
+_ASYNC_CALL = """new Promise((resolve, reject) => {
+        try { script.apply(this, args.concat([resolve])); } catch (e) { reject(e); }
+    })"""
+
+
+class CdpError(Exception):
+    """CDP命令返回错误或页面脚本抛出异常"""
+
+
+def find_chrome() -> str:
+    """
+    查找 Chrome 可执行文件（优先 RAINYUN_CHROME_BINARY）
+    :return: 路径
+    """
+    configured = os.environ.get("RAINYUN_CHROME_BINARY")
+    if configured:
+        return configured
+    for candidate in CHROME_CANDIDATES:
+        path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if path:
+            return path
+    raise FileNotFoundError("找不到 Chrome，请设置 RAINYUN_CHROME_BINARY")
+
+
+def _http_json(url: str, method: str = "GET"):
+    """请求 DevTools 的 HTTP 接口"""
+    with urlopen(Request(url, method=method), timeout=5) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+class CdpElement:
+    """页面元素（持有 Runtime 远程对象ID）"""
+
+    def __init__(self, driver, object_id: str):
+        self.driver = driver
+        self.object_id = object_id
+
+    def _call(self, declaration: str, *args):
+        """以该元素为 this 调用函数"""
+        return self.driver.call_function(self.object_id, declaration, args)
+
+    def _center(self) -> tuple:
+        """滚动到可见位置并返回中心点的视口坐标"""
+        return self._call("""function() {
+            this.scrollIntoView({block: 'center', inline: 'center'});
+            const r = this.getBoundingClientRect();
+            return [r.left + r.width / 2, r.top + r.height / 2];
+        }""")
+
+    def click(self):
+        """在元素中心点模拟一次鼠标点击"""
+        x, y = self._center()
+        for event, button in (("mouseMoved", "none"), ("mousePressed", "left"),
+                              ("mouseReleased", "left")):
+            self.driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
+                "type": event, "x": x, "y": y, "button": button, "clickCount": 1
+            })
+
+    def clear(self):
+        """清空输入框并触发 input / change 事件"""
+        self._call("""function() {
+            this.focus();
+            if ('value' in this) {
+                this.value = '';
+                this.dispatchEvent(new Event('input', {bubbles: true}));
+                this.dispatchEvent(new Event('change', {bubbles: true}));
+            }
+        }""")
+
+    def send_keys(self, *value):
+        """
+        聚焦并输入文字
+        :param value: 要输入的内容
+        """
+        self._call("function() { this.focus(); }")
+        self.driver.execute_cdp_cmd("Input.insertText", {"text": "".join(map(str, value))})
+
+    @property
+    def screenshot_as_png(self) -> bytes:
+        """元素区域截图"""
+        x, y, width, height = self._call("""function() {
+            this.scrollIntoView({block: 'center', inline: 'center'});
+            const r = this.getBoundingClientRect();
+            return [r.left + window.scrollX, r.top + window.scrollY, r.width, r.height];
+        }""")
+        result = self.driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "png",
+            "clip": {"x": x, "y": y, "width": width, "height": height, "scale": 1}
+        })
+        return base64.b64decode(result["data"])
+
+
+class CdpDriver:
+    """通过 DevTools websocket 直接控制 Chrome 的浏览器后端"""
+
+    def __init__(self, process, port: int, data_dir: str, temporary: bool,
+                 eager: bool = False, performance_log: bool = False):
+        """
+        连接已启动的 Chrome（一般通过 launch() 创建）
+        :param process: Chrome 进程
+        :param port: DevTools 端口
+        :param data_dir: 配置目录
+        :param temporary: 退出时是否删除配置目录
+        :param eager: 页面加载只等待 DOMContentLoaded（与 Selenium 的 eager 策略一致）
+        :param performance_log: 是否记录 Network 事件供 get_log("performance") 读取
+        """
+        import websocket
+
+        self.process = process
+        self.port = port
+        self.data_dir = data_dir
+        self.temporary = temporary
+        self.page_load_event = "Page.domContentEventFired" if eager else "Page.loadEventFired"
+        self.page_load_timeout = 30.0
+        self.script_timeout = 30.0
+        self.performance_log = performance_log
+
+        target = self._page_target()
+        self.target_id = target["id"]
+        self._ws = websocket.create_connection(target["webSocketDebuggerUrl"],
+                                               suppress_origin=True, enable_multithread=True)
+        self._next_id = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._page_events = set()
+        self._perf_log = []
+        self._closed = False
+        self._global_id = None
+        self._reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._reader.start()
+
+        self.execute_cdp_cmd("Page.enable", {})
+        self.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": STEALTH_SCRIPT})
+        if performance_log:
+            self.execute_cdp_cmd("Network.enable", {})
+
+    def _page_target(self) -> dict:
+        """找到（或新建）一个页面目标"""
+        base = f"http://127.0.0.1:{self.port}"
+        for target in _http_json(f"{base}/json/list"):
+            if target.get("type") == "page" and target.get("webSocketDebuggerUrl"):
+                return target
+        return _http_json(f"{base}/json/new?about:blank", method="PUT")
+
+    @property
+    def browser_pid(self) -> int:
+        """Chrome 主进程ID（驱动池按它统计内存）"""
+        return self.process.pid
+
+    # ---- 协议 ----
+
+    def _read_loop(self):
+        """后台读取消息：命令响应交给等待方，事件用于页面加载等待和性能日志"""
+        while True:
+            try:
+                message = json.loads(self._ws.recv())
+            except Exception:
+                break
+            if "id" in message:
+                with self._lock:
+                    waiter = self._pending.pop(message["id"], None)
+                if waiter is not None:
+                    waiter["response"] = message
+                    waiter["event"].set()
+                continue
+            method = message.get("method", "")
+            with self._cond:
+                if method.startswith("Page."):
+                    self._page_events.add(method)
+                    self._cond.notify_all()
+                elif self.performance_log and method.startswith("Network."):
+                    self._perf_log.append({"level": "INFO", "timestamp": int(time.time() * 1000),
+                                           "message": json.dumps({"message": message})})
+
+        with self._lock:
+            for waiter in self._pending.values():
+                waiter["event"].set()
+            self._pending.clear()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def execute_cdp_cmd(self, cmd: str, params: dict = None, timeout: float = 30) -> dict:
+        """
+        发送CDP命令并等待结果
+        :param cmd: 方法名，如 Network.setCookies
+        :param params: 参数
+        :param timeout: 最长等待秒数
+        :return: 结果
+        """
+        waiter = {"event": threading.Event()}
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("DevTools 连接已断开")
+            self._next_id += 1
+            message_id = self._next_id
+            self._pending[message_id] = waiter
+            try:
+                self._ws.send(json.dumps({"id": message_id, "method": cmd, "params": params or {}}))
+            except Exception as e:
+                self._pending.pop(message_id, None)
+                raise ConnectionError(f"DevTools 连接已断开: {e}")
+
+        if not waiter["event"].wait(timeout):
+            with self._lock:
+                self._pending.pop(message_id, None)
+            raise TimeoutError(f"{cmd} 超时（{timeout:.0f}s）")
+        response = waiter.get("response")
+        if response is None:
+            raise ConnectionError("DevTools 连接已断开")
+        if "error" in response:
+            raise CdpError(f"{cmd}: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    # ---- 导航 ----
+
+    def get(self, url: str):
+        """
+        打开页面，等待加载事件（eager 时为 DOMContentLoaded）
+        :param url: 页面地址
+        """
+        with self._cond:
+            self._page_events.clear()
+        result = self.execute_cdp_cmd("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            raise CdpError(f"{result['errorText']} ({url})")
+        self._global_id = None
+        if not result.get("loaderId"):
+            # 同文档内跳转（如只改 hash）没有加载事件
+            return
+        with self._cond:
+            loaded = self._cond.wait_for(
+                lambda: self.page_load_event in self._page_events or self._closed,
+                self.page_load_timeout)
+            if self._closed:
+                raise ConnectionError("DevTools 连接已断开")
+        if not loaded:
+            raise TimeoutError(f"页面加载超时（{self.page_load_timeout:.0f}s）: {url}")
+
+    @property
+    def current_url(self) -> str:
+        """当前页面地址"""
+        result = self.execute_cdp_cmd("Runtime.evaluate", {"expression": "location.href",
+                                                           "returnByValue": True})
+        return result["result"].get("value", "")
+
+    # ---- 脚本 ----
+
+    def _global_object(self) -> str:
+        """当前文档 globalThis 的远程对象ID（导航后失效，重新获取）"""
+        if self._global_id is None:
+            result = self.execute_cdp_cmd("Runtime.evaluate", {"expression": "globalThis"})
+            self._global_id = result["result"]["objectId"]
+        return self._global_id
+
+    def call_function(self, object_id: str, declaration: str, args=(), timeout: float = None):
+        """
+        以远程对象为 this 调用函数，返回值按值传回
+        :param object_id: 远程对象ID
+        :param declaration: 函数源码
+        :param args: 参数（CdpElement 按引用传递）
+        :param timeout: 最长等待秒数，默认为脚本超时
+        :return: 返回值
+        """
+        arguments = [{"objectId": a.object_id} if isinstance(a, CdpElement) else {"value": a}
+                     for a in args]
+        result = self.execute_cdp_cmd("Runtime.callFunctionOn", {
+            "objectId": object_id,
+            "functionDeclaration": declaration,
+            "arguments": arguments,
+            "awaitPromise": True,
+            "returnByValue": True,
+        }, timeout=timeout or self.script_timeout)
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CdpError(details.get("exception", {}).get("description") or details.get("text"))
+        return result["result"].get("value")
+
+    def _run_script(self, script: str, args: tuple, asynchronous: bool):
+        """执行 WebDriver 风格的脚本，返回值中的节点转为 CdpElement"""
+        declaration = _SCRIPT_WRAPPER.replace("__CALL__", _ASYNC_CALL if asynchronous else _SYNC_CALL) \
+                                     .replace("__BODY__", script)
+        element = next((a for a in args if isinstance(a, CdpElement)), None)
+        try:
+            target = element.object_id if element else self._global_object()
+            result = self.call_function(target, declaration, args)
+        except CdpError as e:
+            if element or "Could not find object" not in str(e):
+                raise
+            # 页面已跳转，缓存的 globalThis 失效
+            self._global_id = None
+            result = self.call_function(self._global_object(), declaration, args)
+
+        if not result or not result.get("nodes"):
+            return (result or {}).get("value")
+        nodes = []
+        for index in range(result["nodes"]):
+            handle = self.execute_cdp_cmd("Runtime.evaluate", {
+                "expression": f"globalThis.__rainyunNodes[{index}]"})
+            nodes.append(CdpElement(self, handle["result"]["objectId"]))
+        return self._decode(result["value"], nodes)
+
+    def _decode(self, value, nodes: list):
+        """把占位符替换回元素"""
+        if isinstance(value, list):
+            return [self._decode(v, nodes) for v in value]
+        if isinstance(value, dict):
+            if set(value) == {"__node__"}:
+                return nodes[value["__node__"]]
+            return {k: self._decode(v, nodes) for k, v in value.items()}
+        return value
+
+    def execute_script(self, script: str, *args):
+        """执行脚本（函数体，通过 arguments 取参数）"""
+        return self._run_script(script, args, asynchronous=False)
+
+    def execute_async_script(self, script: str, *args):
+        """执行异步脚本（最后一个参数是完成回调）"""
+        return self._run_script(script, args, asynchronous=True)
+
+    def set_script_timeout(self, seconds: float):
+        """设置脚本超时"""
+        self.script_timeout = seconds
+
+    def set_page_load_timeout(self, seconds: float):
+        """设置页面加载超时"""
+        self.page_load_timeout = seconds
+
+    def implicitly_wait(self, seconds: float):
+        """不支持隐式等待，元素等待由定位器显式控制"""
+
+    # ---- cookies / 日志 / 截图 ----
+
+    def get_cookies(self) -> list:
+        """当前页面的 cookies（Selenium 格式）"""
+        cookies = []
+        for c in self.execute_cdp_cmd("Network.getCookies", {}).get("cookies", []):
+            cookie = {"name": c["name"], "value": c["value"], "domain": c.get("domain", ""),
+                      "path": c.get("path", "/"), "secure": c.get("secure", False),
+                      "httpOnly": c.get("httpOnly", False)}
+            if not c.get("session") and c.get("expires", -1) > 0:
+                cookie["expiry"] = int(c["expires"])
+            if c.get("sameSite"):
+                cookie["sameSite"] = c["sameSite"]
+            cookies.append(cookie)
+        return cookies
+
+    def get_log(self, log_type: str) -> list:
+        """读取并清空性能日志（仅支持 performance）"""
+        if log_type != "performance":
+            return []
+        with self._cond:
+            entries, self._perf_log = self._perf_log, []
+        return entries
+
+    def get_screenshot_as_png(self) -> bytes:
+        """当前视口截图"""
+        return base64.b64decode(self.execute_cdp_cmd("Page.captureScreenshot",
+                                                     {"format": "png"})["data"])
+
+    def save_screenshot(self, filename: str) -> bool:
+        """保存当前视口截图"""
+        with open(filename, "wb") as f:
+            f.write(self.get_screenshot_as_png())
+        return True
+
+    # ---- 生命周期 ----
+
+    def close_other_windows(self):
+        """关闭除当前页面外的其他页面（驱动池归还时使用）"""
+        base = f"http://127.0.0.1:{self.port}"
+        for target in _http_json(f"{base}/json/list"):
+            if target.get("type") == "page" and target.get("id") != self.target_id:
+                with urlopen(f"{base}/json/close/{target['id']}", timeout=5):
+                    pass
+
+    def quit(self):
+        """关闭浏览器，删除临时配置目录"""
+        try:
+            self.execute_cdp_cmd("Browser.close", {}, timeout=2)
+        except Exception:
+            pass
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if self.temporary:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+def launch(headless: bool = True, lean: bool = False, profile_user: str = None,
+           performance_log: bool = None) -> CdpDriver:
+    """
+    启动 Chrome 并连接 DevTools
+    :param headless: 是否无头模式
+    :param lean: 是否启用精简浏览（eager 加载、关闭图片、拦截无关请求）
+    :param profile_user: 使用该账号的持久化配置目录，为空时使用临时目录
+    :param performance_log: 是否记录性能日志，默认精简浏览或持久化配置时开启
+    :return: CdpDriver
+    """
+    from lean_browsing import apply_lean_cdp
+
+    arguments = [find_chrome(), "--remote-debugging-port=0", "--no-first-run",
+                 "--no-default-browser-check", *CHROME_ARGUMENTS, f"--user-agent={USER_AGENT}"]
+    if headless:
+        arguments.append("--headless")
+    if lean:
+        arguments.append("--blink-settings=imagesEnabled=false")
+    if profile_user:
+        from browser_profiles import get_profile_store
+        store = get_profile_store()
+        data_dir = store.path_for(profile_user)
+        arguments.append(f"--disk-cache-size={store.cache_bytes}")
+    else:
+        data_dir = tempfile.mkdtemp(prefix="rainyun-cdp-")
+    arguments += [f"--user-data-dir={data_dir}", "about:blank"]
+
+    # Chrome 选好端口后写入该文件，上次运行留下的要先删掉
+    port_file = os.path.join(data_dir, "DevToolsActivePort")
+    if os.path.exists(port_file):
+        os.unlink(port_file)
+    process = subprocess.Popen(arguments, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=sys.platform != "win32")
+
+    deadline = time.monotonic() + 20
+    port = None
+    while port is None:
+        if process.poll() is not None:
+            raise RuntimeError(f"Chrome 启动失败（退出码 {process.returncode}）")
+        if time.monotonic() > deadline:
+            process.kill()
+            raise TimeoutError("等待 Chrome DevTools 端口超时")
+        try:
+            with open(port_file, "r") as f:
+                port = int(f.readline().strip())
+        except (OSError, ValueError):
+            time.sleep(0.05)
+
+    try:
+        driver = CdpDriver(process, port, data_dir, temporary=not profile_user, eager=lean,
+                           performance_log=performance_log if performance_log is not None
+                           else bool(lean or profile_user))
+    except Exception:
+        process.kill()
+        raise
+    if lean:
+        apply_lean_cdp(driver)
+    return driver
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻模式
+保持 OCR 模型和浏览器常驻，每个账号每天在签到时间窗口内的随机时刻签到，
+账号文件变化时自动重新加载，并提供本地健康检查与指标接口
+
+用法: python daemon.py [--accounts-file accounts.txt] [--window 08:00-10:00] [--port 8787]
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from main import RainyunSignin, run_signin
+from main_multi import parse_accounts
+from runner import HostRateLimiter
+from driver_pool import DriverPool
+from ocr_provider import get_ocr
+from tracing import get_tracer
+from ledger import SHANGHAI, get_ledger
+from account_stream import iter_accounts
+from failures import RetryPolicy, CircuitBreaker
+from browser_profiles import profiles_enabled, get_profile_store
+
+
+def parse_window(spec: str) -> tuple:
+    """
+    解析签到时间窗口
+    :param spec: HH:MM-HH:MM（北京时间）
+    :return: (开始分钟, 结束分钟)
+    """
+    try:
+        start, end = (datetime.strptime(x.strip(), "%H:%M") for x in spec.split("-"))
+    except ValueError:
+        raise ValueError(f"时间窗口格式应为 HH:MM-HH:MM: {spec}")
+    start_minute, end_minute = start.hour * 60 + start.minute, end.hour * 60 + end.minute
+    if end_minute <= start_minute:
+        raise ValueError(f"时间窗口结束时间应晚于开始时间: {spec}")
+    return start_minute, end_minute
+
+
+def slot_for(username: str, day: str, window: tuple) -> float:
+    """
+    账号在某天的签到时刻，按用户名和日期稳定打散在窗口内（重新加载账号不会改变）
+    :param username: 用户名
+    :param day: 北京时间日期 YYYY-MM-DD
+    :param window: (开始分钟, 结束分钟)
+    :return: 时间戳
+    """
+    start_minute, end_minute = window
+    digest = hashlib.sha256(f"{username}|{day}".encode("utf-8")).digest()
+    offset = int.from_bytes(digest[:8], "big") % ((end_minute - start_minute) * 60)
+    midnight = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=SHANGHAI)
+    return (midnight + timedelta(minutes=start_minute, seconds=offset)).timestamp()
+
+
+class SigninDaemon:
+    """常驻签到进程"""
+
+    # 检查账号文件变化的间隔（秒）
+    RELOAD_INTERVAL = 10
+
+    def __init__(self, accounts_file: str = None, window: tuple = (480, 600),
+                 engine: str = "auto", concurrency: int = 1, use_session_cache: bool = True):
+        """
+        初始化
+        :param accounts_file: 账号文件，为空时读取 RAINYUN_ACCOUNTS / RAINYUN_USERNAME（不会重新加载）
+        :param window: 签到时间窗口 (开始分钟, 结束分钟)，北京时间
+        :param engine: 签到引擎
+        :param concurrency: 同时签到的账号数
+        :param use_session_cache: 是否使用会话缓存
+        """
+        self.accounts_file = accounts_file
+        self.window = window
+        self.engine = engine
+        self.concurrency = max(1, concurrency)
+        self.use_session_cache = use_session_cache
+        self.ledger = get_ledger()
+        self.retry = RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.limiter = HostRateLimiter(
+            interval=float(os.environ.get("RAINYUN_RATE_INTERVAL", "2")),
+            jitter=float(os.environ.get("RAINYUN_RATE_JITTER", "1"))
+        )
+        self.host = urlparse(RainyunSignin.BASE_URL).netloc
+        self.driver_pool = None
+        # 持久化配置目录按账号启动浏览器，不使用驱动池
+        if engine != "http" and not profiles_enabled():
+            self.driver_pool = DriverPool(
+                factory=lambda: RainyunSignin.create_driver(headless=True),
+                size=int(os.environ.get("RAINYUN_POOL_SIZE", self.concurrency)),
+                max_uses=int(os.environ.get("RAINYUN_POOL_MAX_USES", "20")),
+                max_rss_mb=int(os.environ.get("RAINYUN_POOL_MAX_RSS_MB", "1024")),
+                origins=[RainyunSignin.BASE_URL]
+            )
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                           thread_name_prefix="signin")
+        # 用户名 -> {"account", "due", "attempt", "last"}
+        self.entries = {}
+        self.in_flight = set()
+        self.counters = {"ok": 0, "fail": 0}
+        self.started_at = time.time()
+        self._accounts_mtime = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # ---------- 账号与调度 ----------
+
+    def _read_accounts(self) -> list:
+        """读取账号列表"""
+        if self.accounts_file:
+            return list(iter_accounts(self.accounts_file))
+        return parse_accounts()
+
+    def _next_due(self, username: str) -> float:
+        """下一次签到时间：今天已签到则排到明天，错过今天的时刻则尽快补签"""
+        today = datetime.now(SHANGHAI)
+        if self.ledger.signed_today(username):
+            tomorrow = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+            return slot_for(username, tomorrow, self.window)
+        return max(slot_for(username, today.strftime("%Y-%m-%d"), self.window), time.time())
+
+    def reload_accounts(self, force: bool = False):
+        """
+        账号文件有变化时重新加载，已有账号保留原来的调度
+        :param force: 忽略修改时间强制加载
+        """
+        if self.accounts_file and self.accounts_file != "-":
+            try:
+                mtime = os.stat(self.accounts_file).st_mtime
+            except OSError as e:
+                print(f"⚠️ 无法读取账号文件: {e}")
+                return
+            if not force and mtime == self._accounts_mtime:
+                return
+            self._accounts_mtime = mtime
+        elif not force:
+            return
+
+        accounts = {a["username"]: a for a in self._read_accounts() if a.get("username")}
+        with self._lock:
+            added = [u for u in accounts if u not in self.entries]
+            removed = [u for u in self.entries if u not in accounts]
+            for username in removed:
+                del self.entries[username]
+            for username, account in accounts.items():
+                if username in self.entries:
+                    self.entries[username]["account"] = account
+                else:
+                    self.entries[username] = {"account": account, "due": self._next_due(username),
+                                              "attempt": 1, "last": None}
+        if added or removed:
+            print(f"🔄 账号列表已更新: 共 {len(accounts)} 个，新增 {len(added)}，移除 {len(removed)}")
+
+    def _dispatch(self) -> float:
+        """
+        提交到期的账号
+        :return: 距离下一个到期账号的秒数
+        """
+        now = time.time()
+        next_due = float("inf")
+        with self._lock:
+            for username, entry in self.entries.items():
+                if username in self.in_flight:
+                    continue
+                if entry["due"] <= now:
+                    self.in_flight.add(username)
+                    self.executor.submit(self._run_account, username, dict(entry["account"]))
+                else:
+                    next_due = min(next_due, entry["due"])
+        return next_due - now
+
+    def _run_account(self, username: str, account: dict):
+        """执行单个账号并安排下一次签到"""
+        result = None
+        try:
+            permit = self.breaker.allow()
+            if not permit:
+                delay = self.breaker.retry_after()
+                print(f"🔌 {username[:3]}*** 站点熔断中，{delay:.0f} 秒后再试")
+                with self._lock:
+                    if username in self.entries:
+                        self.entries[username]["due"] = time.time() + delay
+                return
+
+            self.limiter.acquire(self.host)
+            print(f"\n⏰ {time.strftime('%Y-%m-%d %H:%M:%S')} 账号 {username[:3]}*** 开始签到")
+            try:
+                result = run_signin(username, account.get("password", ""), engine=self.engine,
+                                    headless=True, use_session_cache=self.use_session_cache,
+                                    driver_pool=self.driver_pool)
+            except Exception as e:
+                print(f"❌ 账号 {username[:3]}*** 签到出错: {e}")
+                result = {"success": False, "engine": None, "session": None, "reason": "unknown"}
+            self.breaker.record(result.get("reason"), permit)
+            self._reschedule(username, result)
+        finally:
+            with self._lock:
+                self.in_flight.discard(username)
+                idle = not self.in_flight
+            if result is not None and idle:
+                get_tracer().export()
+                if profiles_enabled():
+                    get_profile_store().prune()
+
+    def _reschedule(self, username: str, result: dict):
+        """根据结果安排下一次签到"""
+        with self._lock:
+            self.counters["ok" if result["success"] else "fail"] += 1
+            entry = self.entries.get(username)
+            if entry is None:
+                return
+            entry["last"] = {"at": time.time(), "success": result["success"],
+                             "engine": result.get("engine"), "reason": result.get("reason")}
+            if self.retry.should_retry(result, entry["attempt"]):
+                delay = self.retry.delay(entry["attempt"], result)
+                entry["attempt"] += 1
+                entry["due"] = time.time() + delay
+                print(f"🔁 {username[:3]}*** 失败（{result.get('reason')}），{delay:.0f} 秒后重试")
+                return
+            # 成功或放弃重试，排到明天的时间窗口
+            tomorrow = (datetime.now(SHANGHAI) + timedelta(days=1)).strftime("%Y-%m-%d")
+            entry["attempt"] = 1
+            entry["due"] = slot_for(username, tomorrow, self.window)
+        status = "✅" if result["success"] else "❌"
+        print(f"{status} {username[:3]}*** 下次签到: "
+              f"{datetime.fromtimestamp(entry['due'], SHANGHAI):%m-%d %H:%M}")
+
+    # ---------- 预热与运行 ----------
+
+    def warm_up(self):
+        """预先加载OCR模型和启动浏览器"""
+        get_ocr().prewarm()
+        if self.driver_pool:
+            try:
+                self.driver_pool.release(self.driver_pool.acquire())
+                print("🔥 浏览器已预热")
+            except Exception as e:
+                print(f"⚠️ 浏览器预热失败，首次签到时再启动: {e}")
+
+    def health(self) -> dict:
+        """健康状态"""
+        with self._lock:
+            upcoming = [e["due"] for u, e in self.entries.items() if u not in self.in_flight]
+            last = [e["last"] for e in self.entries.values() if e["last"]]
+            return {
+                "status": "degraded" if self.breaker.is_open else "ok",
+                "uptime_seconds": round(time.time() - self.started_at),
+                "accounts": len(self.entries),
+                "in_flight": len(self.in_flight),
+                "next_run": min(upcoming) if upcoming else None,
+                "last_run": max(last, key=lambda x: x["at"]) if last else None,
+                "signins": dict(self.counters),
+                "ocr_loaded": get_ocr().loaded,
+                "driver_pool": dict(self.driver_pool.stats) if self.driver_pool else None,
+            }
+
+    def metrics(self) -> str:
+        """Prometheus 指标（阶段耗时 + 常驻进程状态）"""
+        health = self.health()
+        lines = [
+            "# HELP rainyun_daemon_up Whether the sign-in daemon is healthy.",
+            "# TYPE rainyun_daemon_up gauge",
+            f"rainyun_daemon_up {1 if health['status'] == 'ok' else 0}",
+            f"rainyun_daemon_uptime_seconds {health['uptime_seconds']}",
+            f"rainyun_daemon_accounts {health['accounts']}",
+            f"rainyun_daemon_in_flight {health['in_flight']}",
+            "# TYPE rainyun_daemon_signins_total counter",
+        ]
+        for result, count in health["signins"].items():
+            lines.append(f'rainyun_daemon_signins_total{{result="{result}"}} {count}')
+        if health["next_run"]:
+            lines.append(f"rainyun_daemon_next_run_timestamp_seconds {health['next_run']:.0f}")
+        lines.append(f"rainyun_daemon_ocr_loaded {int(health['ocr_loaded'])}")
+        for key, value in (health["driver_pool"] or {}).items():
+            lines.append(f'rainyun_daemon_driver_pool_total{{event="{key}"}} {value}')
+        return get_tracer().prometheus() + "\n".join(lines) + "\n"
+
+    def serve_status(self, host: str, port: int) -> ThreadingHTTPServer:
+        """
+        在后台线程启动健康检查与指标接口
+        :return: HTTP服务
+        """
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path in ("/healthz", "/health"):
+                    health = daemon.health()
+                    body = json.dumps(health, ensure_ascii=False).encode("utf-8")
+                    status, content_type = 200 if health["status"] == "ok" else 503, "application/json"
+                elif path == "/metrics":
+                    body = daemon.metrics().encode("utf-8")
+                    status, content_type = 200, "text/plain; version=0.0.4"
+                else:
+                    body, status, content_type = b"Not Found", 404, "text/plain"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="daemon-status", daemon=True).start()
+        return server
+
+    def stop(self, *_):
+        """请求退出"""
+        self._stop.set()
+
+    def run_forever(self, host: str = "127.0.0.1", port: int = 8787):
+        """运行直到收到 SIGINT / SIGTERM"""
+        self.reload_accounts(force=True)
+        if not self.entries:
+            print("❌ 未配置任何账号")
+            sys.exit(1)
+
+        server = self.serve_status(host, port) if port else None
+        if server:
+            print(f"🩺 健康检查: http://{host}:{server.server_address[1]}/healthz  指标: /metrics")
+        self.warm_up()
+
+        last_reload = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() - last_reload >= self.RELOAD_INTERVAL:
+                    self.reload_accounts()
+                    last_reload = time.monotonic()
+                wait = self._dispatch()
+                self._stop.wait(max(0.5, min(wait, self.RELOAD_INTERVAL)))
+        finally:
+            print("👋 正在退出...")
+            if server:
+                server.shutdown()
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            if self.driver_pool:
+                self.driver_pool.close()
+            get_tracer().export()
+
+
+def main(argv: list = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="雨云自动签到工具 - 常驻模式")
+    parser.add_argument("--accounts-file", default=os.environ.get("RAINYUN_ACCOUNTS_FILE"),
+                        help="账号文件（JSON lines 或 user----pass），修改后自动重新加载")
+    parser.add_argument("--window", default=os.environ.get("RAINYUN_DAEMON_WINDOW", "08:00-10:00"),
+                        help="每天签到的时间窗口（北京时间），账号在窗口内随机分散")
+    parser.add_argument("--host", default=os.environ.get("RAINYUN_DAEMON_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("RAINYUN_DAEMON_PORT", "8787")),
+                        help="健康检查与指标端口，0 表示不启动")
+    args = parser.parse_args(argv)
+
+    if args.accounts_file and args.accounts_file != "-" and not os.path.isfile(args.accounts_file):
+        print(f"❌ 账号文件不存在: {args.accounts_file}")
+        sys.exit(1)
+    try:
+        window = parse_window(args.window)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    daemon = SigninDaemon(
+        accounts_file=args.accounts_file,
+        window=window,
+        engine=os.environ.get("RAINYUN_ENGINE", "auto"),
+        concurrency=int(os.environ.get("RAINYUN_CONCURRENCY", "1")),
+        use_session_cache=os.environ.get("RAINYUN_SESSION_CACHE", "1") != "0"
+    )
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+
+    print("=" * 50)
+    print("🌧️ 雨云自动签到工具 - 常驻模式")
+    print(f"🕗 签到时间窗口: {args.window}（北京时间）")
+    print("=" * 50)
+    daemon.run_forever(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+失败现场记录
+出错时只在当前线程从浏览器取出截图、精简后的 DOM、当前地址和阶段耗时，压缩与写盘交给后台线程；
+每次运行写成一个带索引的 zip，按运行总量和单账号用量设上限，超出时淘汰最早的记录
+"""
+
+import io
+import os
+import json
+import time
+import zlib
+import queue
+import atexit
+import zipfile
+import threading
+from tracing import hash_account, get_tracer
+from state import atomic_write
+
+
+# 去掉脚本、样式等与排查无关的内容，超长时截断
+_DOM_SCRIPT = """
+const clone = document.documentElement.cloneNode(true);
+clone.querySelectorAll('script, style, svg, noscript, link[rel=stylesheet]')
+    .forEach(el => el.remove());
+clone.querySelectorAll('input').forEach(el => el.removeAttribute('value'));
+const html = clone.outerHTML, limit = arguments[0];
+return html.length > limit ? html.slice(0, limit) + '\\n<!-- truncated -->' : html;
+"""
+
+
+class DiagnosticsRecorder:
+    """按运行归档的失败现场记录"""
+
+    # 保留的历史归档数量
+    KEEP_RUNS = 30
+    # 截图压缩后的最大宽度
+    MAX_WIDTH = 1280
+
+    def __init__(self, directory: str = None, run_id: str = None, max_mb: float = None,
+                 account_mb: float = None, dom_kb: int = None):
+        """
+        初始化
+        :param directory: 归档目录，默认读取 RAINYUN_DIAGNOSTICS_DIR
+        :param run_id: 运行ID，默认与阶段耗时记录一致
+        :param max_mb: 单次运行的归档上限（MB），默认读取 RAINYUN_DIAGNOSTICS_MAX_MB
+        :param account_mb: 单个账号的归档上限（MB），默认读取 RAINYUN_DIAGNOSTICS_ACCOUNT_MB
+        :param dom_kb: DOM 快照截断长度（KB）
+        """
+        env = os.environ.get
+        self.directory = directory or env("RAINYUN_DIAGNOSTICS_DIR", "diagnostics")
+        self.run_id = run_id or get_tracer().run_id
+        self.max_bytes = int(float(max_mb if max_mb is not None else
+                                   env("RAINYUN_DIAGNOSTICS_MAX_MB", "20")) * 1024 * 1024)
+        self.account_bytes = int(float(account_mb if account_mb is not None else
+                                       env("RAINYUN_DIAGNOSTICS_ACCOUNT_MB", "4")) * 1024 * 1024)
+        self.dom_limit = (dom_kb or 256) * 1024
+        self.path = os.path.join(self.directory, f"{self.run_id}.zip")
+        # 已保留的记录（按时间从旧到新），每条包含文件内容
+        self.entries = []
+        self.evicted = 0
+        self._sequence = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def capture(self, driver, username: str, name: str, timings: dict = None):
+        """
+        记录一次失败现场（只读取浏览器数据，压缩写盘在后台进行）
+        :param driver: WebDriver
+        :param username: 用户名
+        :param name: 失败名称，如 login_error
+        :param timings: 阶段耗时等附加信息
+        """
+        item = {"account": hash_account(username), "name": name, "time": time.time(),
+                "timings": timings or {}, "url": None, "screenshot": None, "dom": None}
+        try:
+            item["url"] = driver.current_url
+        except Exception:
+            pass
+        try:
+            item["screenshot"] = driver.get_screenshot_as_png()
+        except Exception as e:
+            print(f"⚠️ 截图失败: {e}")
+        try:
+            item["dom"] = driver.execute_script(_DOM_SCRIPT, self.dom_limit)
+        except Exception:
+            pass
+
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="diagnostics",
+                                                daemon=True)
+                self._writer.start()
+                # 进程退出前写完队列中的记录
+                atexit.register(self.flush)
+        self._queue.put(item)
+        print(f"📸 已记录失败现场: {name}（后台写入 {self.path}）")
+
+    def _compress(self, item: dict) -> dict:
+        """压缩截图与 DOM，生成一条记录"""
+        with self._lock:
+            self._sequence += 1
+            entry_id = f"{self._sequence:04d}-{item['account'] or 'unknown'}-{item['name']}"
+        files = {}
+        if item["screenshot"]:
+            image, ext = self._shrink(item["screenshot"])
+            files[f"{entry_id}/screenshot.{ext}"] = image
+        if item["dom"]:
+            # 按压缩后的大小计入上限，写入时用 deflate
+            files[f"{entry_id}/dom.html"] = item["dom"].encode("utf-8")
+        meta = {"id": entry_id, "account": item["account"], "name": item["name"],
+                "time": round(item["time"], 3), "url": item["url"], "timings": item["timings"]}
+        size = sum(len(zlib.compress(data, 6)) if path.endswith(".html") else len(data)
+                   for path, data in files.items())
+        return {"meta": dict(meta, files=sorted(files), bytes=size), "files": files, "bytes": size}
+
+    def _shrink(self, png: bytes) -> tuple:
+        """
+        截图转为缩小后的 JPEG，没有 PIL 时保留原 PNG
+        :return: (图片数据, 扩展名)
+        """
+        try:
+            from PIL import Image
+        except ImportError:
+            return png, "png"
+        image = Image.open(io.BytesIO(png)).convert("RGB")
+        if image.width > self.MAX_WIDTH:
+            image = image.resize((self.MAX_WIDTH, image.height * self.MAX_WIDTH // image.width))
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=60, optimize=True)
+        return output.getvalue(), "jpg"
+
+    def _add(self, entry: dict):
+        """加入记录，超出单账号或总上限时淘汰最早的记录"""
+        if entry["bytes"] > self.account_bytes:
+            # 单条就超出上限时只保留 DOM
+            entry["files"] = {p: d for p, d in entry["files"].items() if p.endswith(".html")}
+            entry["bytes"] = sum(len(zlib.compress(d, 6)) for d in entry["files"].values())
+            entry["meta"].update(files=sorted(entry["files"]), bytes=entry["bytes"],
+                                 truncated=True)
+        self.entries.append(entry)
+
+        account = entry["meta"]["account"]
+        mine = [e for e in self.entries if e["meta"]["account"] == account]
+        while sum(e["bytes"] for e in mine) > self.account_bytes and len(mine) > 1:
+            self.entries.remove(mine.pop(0))
+            self.evicted += 1
+        while sum(e["bytes"] for e in self.entries) > self.max_bytes and len(self.entries) > 1:
+            self.entries.pop(0)
+            self.evicted += 1
+
+    def _write_archive(self):
+        """重写本次运行的归档（先写临时文件再替换）"""
+        index = {"run_id": self.run_id, "updated": round(time.time(), 3),
+                 "evicted": self.evicted,
+                 "budget": {"run_bytes": self.max_bytes, "account_bytes": self.account_bytes},
+                 "entries": [e["meta"] for e in self.entries]}
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("index.json", json.dumps(index, ensure_ascii=False, indent=2),
+                             compress_type=zipfile.ZIP_DEFLATED)
+            for entry in self.entries:
+                for path, data in entry["files"].items():
+                    # JPEG / PNG 已压缩，直接存储
+                    archive.writestr(path, data, compress_type=zipfile.ZIP_DEFLATED
+                                     if path.endswith(".html") else zipfile.ZIP_STORED)
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(self.path, buffer.getvalue())
+
+    def _write_loop(self):
+        """后台线程：压缩记录，合并同一批到达的记录后重写归档"""
+        first_write = True
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for item in items:
+                    try:
+                        self._add(self._compress(item))
+                    except Exception as e:
+                        print(f"⚠️ 压缩失败现场失败: {e}")
+                self._write_archive()
+                if first_write:
+                    first_write = False
+                    self._prune()
+            except Exception as e:
+                print(f"⚠️ 写入失败现场失败: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _prune(self):
+        """只保留最近的若干个归档"""
+        try:
+            archives = sorted(name for name in os.listdir(self.directory) if name.endswith(".zip"))
+        except OSError:
+            return
+        for name in archives[:-self.KEEP_RUNS]:
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def flush(self):
+        """等待后台写完已提交的记录"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def summary(self) -> str:
+        """归档汇总"""
+        total = sum(e["bytes"] for e in self.entries)
+        return (f"{len(self.entries)} 条记录, {total / 1024:.0f} KB, 淘汰 {self.evicted} 条"
+                f"（{self.path}）")
+
+
+_shared_recorder = None
+_shared_recorder_lock = threading.Lock()
+
+
+def get_diagnostics() -> DiagnosticsRecorder:
+    """获取进程内共享的失败现场记录"""
+    global _shared_recorder
+    with _shared_recorder_lock:
+        if _shared_recorder is None:
+            _shared_recorder = DiagnosticsRecorder()
+        return _shared_recorder
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器驱动池
+复用少量常驻的 Chrome 进程，每个账号使用前后清空 cookies 与存储，
+达到使用次数或内存上限时回收重建
+"""
+
+import os
+import queue
+import threading
+
+
+def process_tree_rss(pid: int) -> int:
+    """
+    统计进程及其所有子进程的常驻内存（仅Linux，其他平台返回0）
+    :param pid: 根进程ID
+    :return: RSS字节数
+    """
+    if not os.path.isdir("/proc"):
+        return 0
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # 进程名可能包含空格，从最后一个右括号之后解析
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+class DriverPool:
+    """线程安全的 Chrome 驱动池"""
+
+    def __init__(self, factory, size: int = 2, max_uses: int = 20,
+                 max_rss_mb: int = 1024, origins: list = None):
+        """
+        初始化
+        :param factory: 创建新驱动的函数 factory() -> WebDriver
+        :param size: 池中最多同时存在的浏览器数
+        :param max_uses: 单个浏览器最多服务的账号数，超过后回收
+        :param max_rss_mb: 单个浏览器进程树的内存上限（MB），超过后回收
+        :param origins: 归还时需要清空存储的站点
+        """
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.origins = origins or []
+        self._idle = queue.LifoQueue()
+        self._uses = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        # 统计: 新建 / 复用 / 回收 次数
+        self.stats = {"created": 0, "reused": 0, "recycled": 0}
+
+    def acquire(self):
+        """
+        获取一个干净的驱动，池满时阻塞等待
+        :return: WebDriver（或接口相同的浏览器后端）
+        """
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+                with self._lock:
+                    self.stats["reused"] += 1
+                return driver
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    driver = self.factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                with self._lock:
+                    self._uses[id(driver)] = 0
+                    self.stats["created"] += 1
+                return driver
+
+            # 池已满，等待其他账号归还
+            try:
+                driver = self._idle.get(timeout=1)
+                with self._lock:
+                    self.stats["reused"] += 1
+                return driver
+            except queue.Empty:
+                continue
+
+    def release(self, driver, broken: bool = False):
+        """
+        归还驱动，清空账号数据；超过使用次数或内存上限时直接回收
+        :param driver: 之前获取的驱动
+        :param broken: 驱动是否已不可用
+        """
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+
+        with self._lock:
+            # 池已缩小时多出的浏览器不再放回
+            surplus = self._created > self.size
+        recycle = broken or surplus or uses >= self.max_uses
+        if not recycle and self.max_rss:
+            try:
+                recycle = process_tree_rss(self._browser_pid(driver)) > self.max_rss
+            except Exception:
+                pass
+
+        if not recycle:
+            try:
+                self._wipe(driver)
+                self._idle.put(driver)
+                return
+            except Exception as e:
+                print(f"⚠️ 清理浏览器状态失败，回收该浏览器: {e}")
+
+        self._discard(driver)
+
+    @staticmethod
+    def _browser_pid(driver) -> int:
+        """浏览器进程树的根进程（cdp 后端没有 chromedriver，直接是 Chrome）"""
+        return getattr(driver, "browser_pid", None) or driver.service.process.pid
+
+    def idle_rss(self) -> int:
+        """空闲浏览器占用的内存字节数"""
+        with self._idle.mutex:
+            drivers = list(self._idle.queue)
+        total = 0
+        for driver in drivers:
+            try:
+                total += process_tree_rss(self._browser_pid(driver))
+            except Exception:
+                pass
+        return total
+
+    def resize(self, size: int):
+        """
+        调整池中最多同时存在的浏览器数，缩小时立即关闭多出的空闲浏览器以释放内存
+        :param size: 新的上限
+        """
+        with self._lock:
+            self.size = max(1, size)
+        while True:
+            with self._lock:
+                if self._created <= self.size:
+                    return
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                # 其余多出的浏览器在归还时关闭
+                return
+            self._discard(driver)
+
+    def _wipe(self, driver):
+        """清空 cookies、站点存储和多余的窗口"""
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in self.origins:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": origin,
+                "storageTypes": "local_storage,session_storage,indexeddb,"
+                                "websql,service_workers,cache_storage,cookies"
+            })
+
+        if hasattr(driver, "close_other_windows"):
+            driver.close_other_windows()
+        else:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+        driver.get("about:blank")
+
+    def _discard(self, driver):
+        """关闭并移除驱动"""
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            self._created -= 1
+            self.stats["recycled"] += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """关闭池中所有空闲浏览器"""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._uses.pop(id(driver), None)
+                self._created -= 1
+            try:
+                driver.quit()
+            except Exception:
+                pass
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+chromedriver 本地解析
+按本机 Chrome 主版本号查找缓存的 chromedriver，每个进程只解析一次；
+只有显式刷新（--refresh 或 RAINYUN_DRIVER_REFRESH=1）时才联网下载，
+缓存缺失时交给 Selenium Manager 查找驱动，离线模式下直接报错
+
+用法: python driver_resolver.py [--refresh]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+import subprocess
+from state import state_path, atomic_write
+
+
+# 常见的 Chrome 可执行文件
+CHROME_BINARIES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+
+# None 表示尚未解析，空字符串表示交给 Selenium Manager
+_resolved_path = None
+_resolve_lock = threading.Lock()
+
+
+def detect_chrome_version() -> str:
+    """
+    检测本机安装的 Chrome 版本
+    :return: 版本号（如 120.0.6099.109），检测不到时返回空字符串
+    """
+    candidates = [os.environ.get("CHROME_BIN", "")] + CHROME_BINARIES
+    for binary in candidates:
+        if not binary:
+            continue
+        path = binary if os.path.isabs(binary) else shutil.which(binary)
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            output = subprocess.run(
+                [path, "--version"], capture_output=True, text=True, timeout=10
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+        if match:
+            return match.group(1)
+
+    if sys.platform == "win32":
+        try:
+            output = subprocess.run(
+                ["reg", "query", r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon",
+                 "/v", "version"],
+                capture_output=True, text=True, timeout=10
+            ).stdout
+            match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+            if match:
+                return match.group(1)
+        except (OSError, subprocess.SubprocessError):
+            pass
+
+    return ""
+
+
+class DriverResolver:
+    """chromedriver 缓存目录管理"""
+
+    def __init__(self, directory: str = None):
+        """
+        初始化
+        :param directory: 缓存目录，默认在状态目录下的 drivers
+        """
+        self.directory = directory or os.environ.get("RAINYUN_DRIVER_DIR") or state_path("drivers")
+        self.index_path = os.path.join(self.directory, "index.json")
+
+    def _load_index(self) -> dict:
+        """读取 主版本号 -> 驱动路径 的索引"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, major: str) -> str:
+        """
+        查找缓存的驱动
+        :param major: Chrome 主版本号
+        :return: 驱动路径，未缓存时返回空字符串
+        """
+        path = self._load_index().get(major or "unknown", "")
+        if path and os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+        return ""
+
+    def refresh(self, major: str) -> str:
+        """
+        联网下载与本机 Chrome 匹配的驱动并放入缓存
+        :param major: Chrome 主版本号
+        :return: 缓存后的驱动路径
+        """
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        downloaded = ChromeDriverManager().install()
+        target_dir = os.path.join(self.directory, major or "unknown")
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, os.path.basename(downloaded))
+        shutil.copy2(downloaded, target)
+        os.chmod(target, 0o755)
+
+        index = self._load_index()
+        index[major or "unknown"] = target
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(self.index_path, json.dumps(index, indent=2).encode("utf-8"))
+        return target
+
+
+def resolve_chromedriver(refresh: bool = False) -> str:
+    """
+    获取 chromedriver 路径（进程内只解析一次）
+    :param refresh: 是否联网下载并刷新缓存；RAINYUN_DRIVER_REFRESH=1 只在进程内首次解析时生效
+    :return: 驱动路径，缓存缺失时返回空字符串（由 Selenium Manager 查找驱动，可能联网）
+    """
+    global _resolved_path
+    with _resolve_lock:
+        if _resolved_path is not None and not refresh:
+            return _resolved_path
+        refresh = refresh or os.environ.get("RAINYUN_DRIVER_REFRESH", "0") == "1"
+
+        start = time.monotonic()
+        version = detect_chrome_version()
+        major = version.split(".")[0] if version else ""
+        resolver = DriverResolver()
+
+        path = "" if refresh else resolver.lookup(major)
+        source = "缓存"
+        if refresh:
+            path = resolver.refresh(major)
+            source = "下载"
+        elif not path:
+            if os.environ.get("RAINYUN_DRIVER_OFFLINE", "0") == "1":
+                raise RuntimeError(
+                    f"离线模式下没有 Chrome {major or '?'} 对应的 chromedriver 缓存，"
+                    "请先运行 python driver_resolver.py --refresh"
+                )
+            print(f"ℹ️ 没有 Chrome {major or '?'} 对应的 chromedriver 缓存，交给 Selenium Manager 查找"
+                  "（运行 python driver_resolver.py --refresh 可写入缓存）")
+            _resolved_path = ""
+            return _resolved_path
+
+        elapsed = (time.monotonic() - start) * 1000
+        print(f"✅ chromedriver ({source}, Chrome {version or '未知'}): {path} [{elapsed:.0f} ms]")
+        _resolved_path = path
+        return path
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="解析并缓存 chromedriver")
+    parser.add_argument("--refresh", action="store_true", help="联网下载并更新缓存")
+    args = parser.parse_args()
+    path = resolve_chromedriver(refresh=args.refresh)
+    if not path:
+        sys.exit(1)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
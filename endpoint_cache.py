@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接口缓存
+记住探测成功的接口地址及其响应结构，后续运行和其他账号直接使用，接口失效时遗忘
+"""
+
+import json
+import time
+import threading
+from state import state_path, atomic_write
+
+
+class EndpointCache:
+    """持久化的接口缓存: 接口类型 -> {"url", "schema", "learned_at"}"""
+
+    def __init__(self, path: str = None):
+        self.path = path or state_path("endpoints.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    def _save(self):
+        """写盘（调用方持有锁）"""
+        try:
+            atomic_write(self.path, json.dumps(self._data, ensure_ascii=False,
+                                               indent=2).encode("utf-8"))
+        except OSError:
+            pass
+
+    def get(self, kind: str) -> dict:
+        """
+        获取缓存的接口
+        :param kind: 接口类型，如 signin
+        :return: {"url", "schema", "learned_at"}，未缓存时返回 None
+        """
+        with self._lock:
+            entry = self._data.get(kind)
+            return dict(entry) if entry else None
+
+    def learn(self, kind: str, url: str, schema: dict):
+        """
+        记录可用的接口
+        :param kind: 接口类型
+        :param url: 接口地址
+        :param schema: 响应结构
+        """
+        with self._lock:
+            entry = self._data.get(kind)
+            if entry and entry["url"] == url and entry["schema"] == schema:
+                return
+            self._data[kind] = {"url": url, "schema": schema, "learned_at": int(time.time())}
+            self._save()
+
+    def forget(self, kind: str):
+        """接口失效，删除缓存"""
+        with self._lock:
+            if self._data.pop(kind, None) is not None:
+                self._save()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_endpoint_cache() -> EndpointCache:
+    """获取进程内共享的接口缓存"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = EndpointCache()
+        return _shared_cache
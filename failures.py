@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+失败分类、重试退避与熔断
+把签到失败归为 验证码 / 账号密码 / 超时 / 站点故障 几类，决定是否值得重试；
+站点错误率过高时熔断，不再启动新的浏览器
+"""
+
+import os
+import time
+import random
+import threading
+from collections import deque
+
+
+CAPTCHA = "captcha"
+CREDENTIALS = "credentials"
+TIMEOUT = "timeout"
+SITE_DOWN = "site_down"
+UNKNOWN = "unknown"
+# 熔断期间未尝试签到，不算失败也不消耗重试次数
+CIRCUIT_OPEN = "circuit_open"
+
+# 账号密码错误重试也不会成功
+RETRYABLE = (CAPTCHA, TIMEOUT, SITE_DOWN, UNKNOWN)
+# 计入站点错误率的失败
+SITE_ERRORS = (TIMEOUT, SITE_DOWN)
+
+
+def classify_message(message: str) -> str:
+    """
+    按站点返回的提示文字分类
+    :param message: 提示文字
+    :return: 失败类型，无法判断时返回 None
+    """
+    message = (message or "").lower()
+    if not message:
+        return None
+    if "验证码" in message or "captcha" in message:
+        return CAPTCHA
+    if any(k in message for k in ("密码", "账号", "用户不存在", "password", "credential")):
+        return CREDENTIALS
+    if any(k in message for k in ("超时", "timeout", "timed out")):
+        return TIMEOUT
+    if any(k in message for k in ("繁忙", "维护", "unavailable", "bad gateway", "err_connection",
+                                  "err_name_not_resolved", "connection refused")):
+        return SITE_DOWN
+    return None
+
+
+def classify_status(status_code: int) -> str:
+    """
+    按HTTP状态码分类
+    :param status_code: 状态码
+    :return: 失败类型，无法判断时返回 None
+    """
+    if status_code in (408, 504):
+        return TIMEOUT
+    if status_code == 429 or status_code >= 500:
+        return SITE_DOWN
+    return None
+
+
+def classify_exception(error: Exception) -> str:
+    """
+    按异常分类（按类名判断，不导入 requests / selenium）
+    :param error: 异常
+    :return: 失败类型
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & {"Timeout", "ReadTimeout", "ConnectTimeout", "TimeoutException",
+                "TimeoutError"}:
+        return TIMEOUT
+    if names & {"ConnectionError", "ConnectionRefusedError", "ConnectionResetError"}:
+        return SITE_DOWN
+    return classify_message(str(error)) or UNKNOWN
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    指数退避 + 完全抖动
+    :param attempt: 第几次重试（从1开始）
+    :param base: 首次重试的基准间隔（秒）
+    :param cap: 间隔上限（秒）
+    :return: 等待秒数
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class RetryPolicy:
+    """失败账号的重试策略"""
+
+    def __init__(self, max_retries: int = None, base: float = None, cap: float = None,
+                 max_deferrals: int = None):
+        """
+        初始化
+        :param max_retries: 单个账号最多重试次数，默认读取 RAINYUN_RETRY_MAX
+        :param base: 首次重试的基准间隔（秒），默认读取 RAINYUN_RETRY_BASE
+        :param cap: 重试间隔上限（秒），默认读取 RAINYUN_RETRY_CAP
+        :param max_deferrals: 熔断期间单个账号最多推迟几次，默认读取 RAINYUN_RETRY_MAX_DEFER
+        """
+        self.max_retries = max_retries if max_retries is not None else \
+            int(os.environ.get("RAINYUN_RETRY_MAX", "2"))
+        self.base = base if base is not None else float(os.environ.get("RAINYUN_RETRY_BASE", "15"))
+        self.cap = cap if cap is not None else float(os.environ.get("RAINYUN_RETRY_CAP", "300"))
+        self.max_deferrals = max_deferrals if max_deferrals is not None else \
+            int(os.environ.get("RAINYUN_RETRY_MAX_DEFER", "10"))
+
+    def should_retry(self, result: dict, attempt: int) -> bool:
+        """
+        是否重试
+        :param result: 本次结果
+        :param attempt: 已尝试次数
+        """
+        if result.get("success") or attempt > self.max_retries:
+            return False
+        return result.get("reason", UNKNOWN) in RETRYABLE
+
+    def should_defer(self, result: dict, deferrals: int) -> bool:
+        """
+        熔断拒绝的账号是否推迟到熔断恢复后再试（不计入重试次数）
+        :param result: 本次结果
+        :param deferrals: 已推迟次数
+        """
+        return result.get("reason") == CIRCUIT_OPEN and deferrals < self.max_deferrals
+
+    def delay(self, attempt: int, result: dict = None) -> float:
+        """
+        第 attempt 次重试前的等待秒数
+        :param attempt: 已尝试次数
+        :param result: 本次结果，其中的 retry_after（如熔断剩余时间）是等待下限
+        """
+        delay = backoff_delay(attempt, self.base, self.cap)
+        return max(delay, (result or {}).get("retry_after", 0))
+
+
+class CircuitBreaker:
+    """
+    站点熔断器
+    最近 window 个结果中站点错误占比达到 threshold 时断开，cooldown 秒后放行一个试探请求，
+    试探成功则恢复，否则继续断开
+    """
+
+    def __init__(self, threshold: float = None, window: int = None,
+                 min_samples: int = None, cooldown: float = None):
+        """
+        初始化
+        :param threshold: 站点错误率阈值，默认读取 RAINYUN_BREAKER_THRESHOLD
+        :param window: 统计最近多少个结果，默认读取 RAINYUN_BREAKER_WINDOW
+        :param min_samples: 至少多少个结果才判断，默认读取 RAINYUN_BREAKER_MIN
+        :param cooldown: 断开后多久放行试探（秒），默认读取 RAINYUN_BREAKER_COOLDOWN
+        """
+        env = os.environ.get
+        self.threshold = threshold if threshold is not None else \
+            float(env("RAINYUN_BREAKER_THRESHOLD", "0.5"))
+        self.min_samples = min_samples if min_samples is not None else \
+            int(env("RAINYUN_BREAKER_MIN", "4"))
+        self.cooldown = cooldown if cooldown is not None else \
+            float(env("RAINYUN_BREAKER_COOLDOWN", "120"))
+        self._recent = deque(maxlen=window if window is not None else
+                             int(env("RAINYUN_BREAKER_WINDOW", "20")))
+        self._open_until = 0.0
+        # 进行中的试探令牌，只有拿到它的签到结果才能决定恢复或继续断开
+        self._probe = None
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+        # 最近一次断开的时间（time.time()）
+        self.last_trip = None
+
+    @property
+    def is_open(self) -> bool:
+        """是否处于断开状态"""
+        return self._open_until > 0
+
+    def allow(self):
+        """
+        是否允许开始一次签到
+        :return: 断开且未到试探时间时返回 False；放行试探时返回试探令牌，否则返回 True，
+                 签到结束后原样传给 record
+        """
+        with self._lock:
+            if not self._open_until:
+                return True
+            if time.monotonic() >= self._open_until and self._probe is None:
+                self._probe = object()
+                return self._probe
+            self.rejected += 1
+            return False
+
+    def retry_after(self) -> float:
+        """断开期间被拒绝的签到建议多久后再试（秒，带抖动避免同时涌入）"""
+        with self._lock:
+            remaining = self._open_until - time.monotonic()
+        if remaining <= 0:
+            # 试探进行中，结果出来前再等一会
+            remaining = self.cooldown / 4
+        return remaining + random.uniform(0, self.cooldown / 4)
+
+    def record(self, reason: str, permit=True):
+        """
+        记录一次签到结果
+        :param reason: 失败类型，成功时为 None
+        :param permit: 开始签到时 allow() 的返回值；只有试探令牌的结果会解除或重新断开熔断，
+                       断开前已开始的签到结果照常计入统计
+        """
+        site_error = reason in SITE_ERRORS
+        with self._lock:
+            if permit is not True and permit is self._probe:
+                self._probe = None
+                if site_error:
+                    self._trip("试探失败")
+                else:
+                    self._open_until = 0.0
+                    self._recent.clear()
+                    print("🔌 站点恢复，熔断解除")
+                return
+
+            self._recent.append(site_error)
+            if self._open_until or len(self._recent) < self.min_samples:
+                return
+            rate = sum(self._recent) / len(self._recent)
+            if rate >= self.threshold:
+                self._trip(f"站点错误率 {rate:.0%}")
+
+    def _trip(self, cause: str):
+        """
+        断开熔断器（调用方持有锁）
+        :param cause: 断开原因
+        """
+        self._open_until = time.monotonic() + self.cooldown
+        self.trips += 1
+        self.last_trip = time.time()
+        print(f"🔌 {cause}，熔断 {self.cooldown:.0f} 秒")
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+雨云签到 - 纯HTTP引擎
+不启动浏览器，基于 requests.Session 完成登录、验证码识别和签到
+"""
+
+import os
+import time
+import base64
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from session_cache import SessionStore
+from endpoint_cache import get_endpoint_cache
+from tracing import get_tracer
+from captcha_solver import get_solver
+from failures import (CAPTCHA, CREDENTIALS, SITE_DOWN, UNKNOWN, classify_message,
+                      classify_status, classify_exception)
+
+# 所有账号共享的连接池（cookies 仍按账号隔离在各自的 Session 中）
+_shared_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+
+
+class RainyunHttpSignin:
+    """基于HTTP接口的雨云签到类"""
+
+    # 雨云相关URL（可通过 RAINYUN_BASE_URL 指向本地模拟服务）
+    BASE_URL = os.environ.get("RAINYUN_BASE_URL", "https://app.rainyun.com").rstrip("/")
+    LOGIN_URL = f"{BASE_URL}/account/signin"
+    USER_CENTER_URL = f"{BASE_URL}/account/overview"
+
+    # 接口地址（需要根据实际情况调整）
+    LOGIN_API_URLS = [
+        f"{BASE_URL}/api/user/login",
+        f"{BASE_URL}/api/account/login"
+    ]
+    CAPTCHA_API_URL = f"{BASE_URL}/api/captcha"
+    SIGNIN_API_URLS = [
+        f"{BASE_URL}/api/user/sign",
+        f"{BASE_URL}/api/user/reward/sign",
+        f"{BASE_URL}/api/account/sign"
+    ]
+
+    USER_AGENT = (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+
+    def __init__(self, username: str, password: str, use_session_cache: bool = True):
+        """
+        初始化
+        :param username: 用户名/邮箱/手机号
+        :param password: 密码
+        :param use_session_cache: 是否使用会话缓存跳过登录
+        """
+        self.username = username
+        self.password = password
+        # 共享的验证码识别器，首次识别时才加载OCR模型
+        self.captcha_solver = get_solver()
+        self.session = requests.Session()
+        self.session.mount("https://", _shared_adapter)
+        self.session.mount("http://", _shared_adapter)
+        self.endpoints = get_endpoint_cache()
+        # 最近一次登录的重试次数
+        self.login_attempts = 0
+        # 失败类型（failures 中的常量），成功时为 None
+        self.failure = None
+        # 最近一次请求错误的类型
+        self.last_error = None
+        # 最近一次请求错误的HTTP状态码，连接失败或超时时为 None
+        self.error_status = None
+        self.session.headers.update({
+            "User-Agent": self.USER_AGENT,
+            "Referer": self.USER_CENTER_URL,
+            "Accept": "application/json, text/plain, */*"
+        })
+        self.session_store = SessionStore() if use_session_cache else None
+        # 会话缓存状态: hit / miss / stale，未启用时为 None
+        self.session_status = None
+
+    @staticmethod
+    def _is_ok(result: dict) -> bool:
+        """判断接口返回是否成功"""
+        return result.get("code") in (0, 200) or bool(result.get("success"))
+
+    @staticmethod
+    def _is_already_signed(result: dict) -> bool:
+        """判断接口返回是否为今日已签到"""
+        message = str(result.get("message") or result.get("msg") or "")
+        return "已签到" in message or "已经签到" in message
+
+    def _post_json(self, url: str, payload: dict = None) -> tuple:
+        """
+        POST请求并解析JSON（可在探测线程中并发调用，不修改实例状态）
+        :return: (响应JSON, 错误)，失败时响应为 None，
+                 错误为 (失败类型, HTTP状态码)，连接失败或超时时状态码为 None
+        """
+        try:
+            response = self.session.post(url, json=payload or {}, timeout=10)
+        except requests.RequestException as e:
+            return None, (classify_exception(e), None)
+        if response.status_code in (401, 403):
+            return {"code": response.status_code, "message": "unauthorized"}, None
+        if response.status_code != 200:
+            return None, (classify_status(response.status_code) or UNKNOWN, response.status_code)
+        try:
+            return response.json(), None
+        except ValueError:
+            return None, (UNKNOWN, response.status_code)
+
+    def _note_error(self, error: tuple):
+        """
+        记录最近一次请求错误（只在调用线程中使用 _post_json 的返回值调用）
+        :param error: _post_json 返回的错误，为 None 时不记录
+        """
+        if error:
+            self.last_error, self.error_status = error
+
+    def _fetch_captcha(self) -> tuple:
+        """
+        获取验证码图片
+        :return: (图片数据, 验证码key)，失败时返回 (None, None)
+        """
+        try:
+            response = self.session.get(
+                self.CAPTCHA_API_URL,
+                params={"t": int(time.time() * 1000)},
+                timeout=10
+            )
+            if response.status_code != 200:
+                return None, None
+
+            content_type = response.headers.get("Content-Type", "")
+            if content_type.startswith("image/"):
+                return response.content, None
+
+            # JSON格式: {"data": {"image": "data:image/png;base64,...", "key": "..."}}
+            result = response.json()
+            data = result.get("data", result)
+            img_src = data.get("image") or data.get("img") or ""
+            captcha_key = data.get("key") or data.get("captcha_key")
+            if "," in img_src:
+                img_src = img_src.split(",", 1)[1]
+            return base64.b64decode(img_src), captcha_key
+        except (requests.RequestException, ValueError, AttributeError):
+            return None, None
+
+    def _recognize_captcha(self, img_data: bytes) -> str:
+        """
+        识别验证码
+        :param img_data: 图片数据
+        :return: 识别结果
+        """
+        try:
+            result = self.captcha_solver.solve(img_data)
+            print(f"🔍 验证码识别结果: {result}")
+            return result
+        except Exception as e:
+            print(f"❌ 验证码识别失败: {e}")
+            return ""
+
+    def _solve_captcha(self, max_fetch: int = 3) -> tuple:
+        """
+        获取并识别验证码，识别结果不符合规则时直接换一张，不浪费登录请求
+        :param max_fetch: 最多获取的验证码张数
+        :return: (图片数据, 识别结果, 验证码key)，失败时识别结果为空
+        """
+        for _ in range(max_fetch):
+            img_data, captcha_key = self._fetch_captcha()
+            if not img_data:
+                continue
+            captcha_code = self._recognize_captcha(img_data)
+            if captcha_code:
+                return img_data, captcha_code, captcha_key
+        return None, "", None
+
+    def login(self, max_retry: int = 3) -> bool:
+        """
+        登录雨云
+        :param max_retry: 验证码最大重试次数
+        :return: 是否登录成功
+        """
+        print("🚀 开始登录雨云（HTTP）...")
+        try:
+            # 获取初始cookies
+            self.session.get(self.LOGIN_URL, timeout=10)
+        except requests.RequestException as e:
+            print(f"❌ 无法访问登录页: {e}")
+            self.failure = classify_exception(e)
+            self.error_status = None
+            return False
+
+        payload = {
+            "username": self.username,
+            "field": self.username,
+            "password": self.password
+        }
+
+        img_data = None
+        for i in range(max_retry + 1):
+            self.login_attempts = i
+            for api_url in self.LOGIN_API_URLS:
+                result, error = self._post_json(api_url, payload)
+                if result is None:
+                    self._note_error(error)
+                    continue
+                if self._is_ok(result):
+                    if img_data:
+                        self.captcha_solver.record_outcome(img_data, True)
+                    print("✅ 登录成功！")
+                    return True
+                message = str(result.get("message") or result.get("msg") or "")
+                print(f"📡 登录响应: {message or result}")
+                if "验证码" in message or "captcha" in message.lower():
+                    if img_data:
+                        self.captcha_solver.record_outcome(img_data, False)
+                    break
+                # 非验证码错误（如账号密码错误），重试无意义
+                self.failure = classify_message(message) or CREDENTIALS
+                return False
+            else:
+                print("❌ 没有可用的登录接口")
+                self.failure = self.last_error or SITE_DOWN
+                return False
+
+            if i == max_retry:
+                break
+
+            img_data, captcha_code, captcha_key = self._solve_captcha()
+            if not captcha_code:
+                print(f"⚠️ 获取验证码失败 (尝试 {i+1}/{max_retry})")
+                continue
+            payload["captcha"] = captcha_code
+            if captcha_key:
+                payload["captcha_key"] = captcha_key
+
+        print("❌ 登录失败，请检查账号密码")
+        self.failure = CAPTCHA
+        return False
+
+    def signin_with_cookies(self, cookies: dict = None, user_agent: str = None) -> bool:
+        """
+        调用签到接口
+        :param cookies: 额外的cookies（如浏览器中的登录态）
+        :param user_agent: 覆盖User-Agent
+        :return: 是否签到成功
+        """
+        print("🔄 尝试通过API接口签到...")
+        if cookies:
+            self.session.cookies.update(cookies)
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+
+        # 优先使用上次成功的接口
+        cached = self.endpoints.get("signin")
+        if cached and cached["url"] in self.SIGNIN_API_URLS:
+            result, error = self._post_json(cached["url"])
+            self._note_error(error)
+            outcome = self._signin_outcome(result, cached["schema"])
+            if outcome == "unauthorized":
+                # 登录态问题，与接口无关
+                return False
+            if outcome in ("ok", "signed"):
+                return True
+            if result is None:
+                # 网络错误或 5xx 不代表接口失效，保留学到的接口，本次重新探测
+                print("⚠️ 缓存的签到接口请求失败，重新探测")
+            else:
+                print("⚠️ 缓存的签到接口已失效，重新探测")
+                self.endpoints.forget("signin")
+
+        return self._probe_signin()
+
+    @staticmethod
+    def _schema(result: dict) -> dict:
+        """提取响应结构（顶层字段）"""
+        return {"keys": sorted(result.keys())}
+
+    def _signin_outcome(self, result: dict, schema: dict = None) -> str:
+        """
+        解析签到接口响应
+        :param result: 响应JSON
+        :param schema: 期望的响应结构，签到成功的响应与之不匹配时视为失败
+        :return: ok / signed / unauthorized / fail
+        """
+        if result is None:
+            return "fail"
+        print(f"📡 API响应: {result}")
+        if result.get("code") in (401, 403):
+            return "unauthorized"
+        # "今日已签到" 的响应通常没有 data 等字段，先于结构检查判断
+        if self._is_already_signed(result):
+            print("ℹ️ 今日已经签到过了")
+            return "signed"
+        if schema and not set(schema["keys"]) <= set(result.keys()):
+            return "fail"
+        if self._is_ok(result):
+            print("🎉 API签到成功！")
+            return "ok"
+        return "fail"
+
+    def _probe_signin(self) -> bool:
+        """并发探测所有候选签到接口，记住第一个成功的"""
+        executor = ThreadPoolExecutor(max_workers=len(self.SIGNIN_API_URLS))
+        futures = {executor.submit(self._post_json, url): url
+                   for url in self.SIGNIN_API_URLS}
+        errors = []
+        try:
+            for future in as_completed(futures):
+                result, error = future.result()
+                if self._signin_outcome(result) in ("ok", "signed"):
+                    self.endpoints.learn("signin", futures[future], self._schema(result))
+                    return True
+                if error:
+                    errors.append(error)
+            # 有接口返回了HTTP状态码说明站点可达，优先报告这类错误
+            if errors:
+                self._note_error(next((e for e in errors if e[1] is not None), errors[0]))
+            return False
+        finally:
+            # 不等待其余请求
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _restore_session(self) -> bool:
+        """从会话缓存加载cookies"""
+        if not self.session_store:
+            return False
+
+        cookies = self.session_store.load(self.username, self.password)
+        if not cookies:
+            self.session_status = "miss"
+            return False
+
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain", ""), path=cookie.get("path", "/")
+            )
+        return True
+
+    def _save_session(self):
+        """将当前cookies以浏览器格式写入会话缓存"""
+        if not self.session_store:
+            return
+
+        cookies = []
+        for cookie in self.session.cookies:
+            item = {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": cookie.secure
+            }
+            if cookie.expires:
+                item["expiry"] = cookie.expires
+            cookies.append(item)
+        try:
+            self.session_store.save(self.username, self.password, cookies)
+        except Exception as e:
+            print(f"⚠️ 保存会话失败: {e}")
+
+    def run(self) -> bool:
+        """
+        运行签到流程
+        :return: 是否成功
+        """
+        tracer = get_tracer()
+        try:
+            if self._restore_session():
+                with tracer.span("http_signin", self.username, session="cached") as span:
+                    signed = self.signin_with_cookies()
+                    span.outcome = "ok" if signed else "fail"
+                if signed:
+                    self.session_status = "hit"
+                    print("✅ 会话缓存有效，跳过登录")
+                    return True
+                self.session_status = "stale"
+                self.session.cookies.clear()
+
+            with tracer.span("http_login", self.username) as span:
+                logged_in = self.login()
+                span.outcome = "ok" if logged_in else "fail"
+                span.retries = self.login_attempts
+            if not logged_in:
+                return False
+            self._save_session()
+
+            self.last_error = None
+            with tracer.span("http_signin", self.username) as span:
+                signed = self.signin_with_cookies()
+                span.outcome = "ok" if signed else "fail"
+            if not signed:
+                self.failure = self.last_error or UNKNOWN
+            return signed
+
+        except Exception as e:
+            print(f"❌ 运行出错: {e}")
+            self.failure = classify_exception(e)
+            self.error_status = None
+            return False
+
+        finally:
+            # 不调用 session.close()，避免关闭共享连接池
+            self.session.cookies.clear()
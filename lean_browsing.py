@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精简浏览配置
+拦截字体、统计、广告等与签到无关的请求，关闭图片加载，使用 eager 页面加载策略，
+并统计每个页面的请求数、流量和拦截大约节省的流量（默认关闭，RAINYUN_LEAN=1 开启）
+"""
+
+import os
+import json
+
+
+# 默认拦截的URL模式（Network.setBlockedURLs 通配符格式）
+LEAN_BLOCKED_URLS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hm.baidu.com*", "*cnzz.com*", "*clarity.ms*", "*sentry.io*",
+]
+
+# 被拦截请求按资源类型估算的典型大小（字节），用于估算节省的流量
+TYPICAL_BYTES = {
+    "Font": 40 * 1024,
+    "Script": 30 * 1024,
+    "Media": 500 * 1024,
+    "Image": 20 * 1024,
+}
+DEFAULT_TYPICAL_BYTES = 10 * 1024
+
+
+def lean_enabled() -> bool:
+    """是否启用精简浏览（RAINYUN_LEAN=1，默认关闭）"""
+    return os.environ.get("RAINYUN_LEAN", "0") == "1"
+
+
+def blocked_urls() -> list:
+    """默认拦截模式加上 RAINYUN_BLOCKED_URLS 中逗号分隔的额外模式"""
+    extra = os.environ.get("RAINYUN_BLOCKED_URLS", "")
+    return LEAN_BLOCKED_URLS + [p.strip() for p in extra.split(",") if p.strip()]
+
+
+def apply_lean_options(chrome_options):
+    """
+    设置启动参数：eager 加载策略、关闭图片、开启性能日志用于流量统计
+    :param chrome_options: selenium ChromeOptions
+    """
+    chrome_options.page_load_strategy = "eager"
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    enable_performance_log(chrome_options)
+
+
+def apply_lean_cdp(driver):
+    """
+    通过CDP设置请求拦截
+    :param driver: WebDriver
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls()})
+
+
+def enable_performance_log(chrome_options):
+    """
+    开启性能日志（精简浏览或持久化配置目录时用于统计流量和缓存命中）
+    :param chrome_options: selenium ChromeOptions
+    """
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+class TrafficMeter:
+    """基于性能日志按页面统计请求数、传输字节数、缓存命中数和被拦截的请求数"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.current_url = None
+        # 每个页面的统计: {"url", "requests", "bytes", "blocked", "saved", "responses", "cached"}
+        self.pages = []
+
+    @property
+    def bytes(self) -> int:
+        """已统计页面的传输字节数"""
+        return sum(p["bytes"] for p in self.pages)
+
+    @property
+    def saved(self) -> int:
+        """
+        拦截请求大约节省的字节数（按资源类型的典型大小估算，
+        关闭图片后不再发出的图片请求不在性能日志中，未计入）
+        """
+        return sum(p["saved"] for p in self.pages)
+
+    @property
+    def responses(self) -> int:
+        """已统计页面的响应总数"""
+        return sum(p["responses"] for p in self.pages)
+
+    @property
+    def cached(self) -> int:
+        """已统计页面中来自浏览器缓存的响应数"""
+        return sum(p["cached"] for p in self.pages)
+
+    def _drain(self) -> list:
+        """读取并清空性能日志"""
+        try:
+            return self.driver.get_log("performance")
+        except Exception:
+            return []
+
+    def start_page(self, url: str):
+        """
+        开始统计新页面，结算上一个页面
+        :param url: 即将打开的页面
+        """
+        if self.current_url is None:
+            # 丢弃之前（如驱动池复用前）的日志
+            self._drain()
+        else:
+            self.flush()
+        self.current_url = url
+
+    def flush(self):
+        """结算当前页面的统计"""
+        if self.current_url is None:
+            return
+
+        requests_count = 0
+        bytes_count = 0
+        blocked = 0
+        saved = 0
+        types = {}
+        responses = set()
+        cached = set()
+        for entry in self._drain():
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                requests_count += 1
+                types[params.get("requestId")] = params.get("type")
+            elif method == "Network.loadingFinished":
+                bytes_count += params.get("encodedDataLength", 0)
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                blocked += 1
+                resource = params.get("type") or types.get(params.get("requestId"))
+                saved += TYPICAL_BYTES.get(resource, DEFAULT_TYPICAL_BYTES)
+            elif method == "Network.responseReceived":
+                responses.add(params.get("requestId"))
+                if params.get("response", {}).get("fromDiskCache"):
+                    cached.add(params.get("requestId"))
+            elif method == "Network.requestServedFromCache":
+                cached.add(params.get("requestId"))
+
+        page = {
+            "url": self.current_url,
+            "requests": requests_count,
+            "bytes": int(bytes_count),
+            "blocked": blocked,
+            "saved": saved,
+            "responses": len(responses),
+            "cached": len(cached & responses)
+        }
+        self.pages.append(page)
+        self.current_url = None
+        print(f"🪶 {page['url']}: {requests_count} 个请求, "
+              f"{bytes_count / 1024:.0f} KB, 拦截 {blocked} 个（约节省 {saved / 1024:.0f} KB）, "
+              f"缓存命中 {page['cached']} 个")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+签到账本
+按北京时间（Asia/Shanghai）日期记录每个账号最近一次成功签到，
+当天已签到的账号无需再启动浏览器
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from state import state_path
+
+
+# 北京时间无夏令时，固定 UTC+8
+SHANGHAI = timezone(timedelta(hours=8), "Asia/Shanghai")
+
+
+def today() -> str:
+    """北京时间的今天（YYYY-MM-DD）"""
+    return datetime.now(SHANGHAI).strftime("%Y-%m-%d")
+
+
+class Ledger:
+    """基于 SQLite 的签到账本"""
+
+    def __init__(self, path: str = None):
+        """
+        初始化
+        :param path: 数据库路径，默认在状态目录下的 ledger.sqlite3
+        """
+        self.path = path or state_path("ledger.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signins ("
+            "account TEXT PRIMARY KEY, day TEXT NOT NULL, signed_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(username: str) -> str:
+        """账本中不保存明文用户名"""
+        return hashlib.sha256(username.encode("utf-8")).hexdigest()
+
+    def signed_today(self, username: str) -> bool:
+        """
+        今天是否已成功签到
+        :param username: 用户名
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT day FROM signins WHERE account = ?", (self._key(username),)
+            ).fetchone()
+        return bool(row) and row[0] == today()
+
+    def record(self, username: str):
+        """
+        记录今天签到成功
+        :param username: 用户名
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO signins (account, day, signed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(account) DO UPDATE SET day = excluded.day, "
+                "signed_at = excluded.signed_at",
+                (self._key(username), today(), int(time.time()))
+            )
+            self._conn.commit()
+
+
+_shared_ledger = None
+_shared_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Ledger:
+    """获取进程内共享的账本"""
+    global _shared_ledger
+    with _shared_ledger_lock:
+        if _shared_ledger is None:
+            _shared_ledger = Ledger()
+        return _shared_ledger
+
+
+def force_enabled() -> bool:
+    """是否忽略账本强制签到（RAINYUN_FORCE=1）"""
+    return os.environ.get("RAINYUN_FORCE", "0") == "1"
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素定位器
+一次脚本调用解析整组候选 XPath，记住上次命中的候选并优先尝试，记录每次定位耗时
+"""
+
+import json
+import time
+import threading
+from state import state_path, atomic_write
+
+
+# 按优先级依次求值候选XPath，返回 [命中下标, 元素]
+_RESOLVE_SCRIPT = """
+const xpaths = arguments[0], visibleOnly = arguments[1];
+for (let i = 0; i < xpaths.length; i++) {
+    const nodes = document.evaluate(
+        xpaths[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (let j = 0; j < nodes.snapshotLength; j++) {
+        const node = nodes.snapshotItem(j);
+        if (!visibleOnly) return [i, node];
+        if (node.getClientRects().length && !node.disabled) return [i, node];
+    }
+}
+return null;
+"""
+
+
+class SelectorCache:
+    """持久化的候选命中缓存: 定位名称 -> 上次命中的XPath"""
+
+    def __init__(self, path: str = None):
+        self.path = path or state_path("selectors.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    def get(self, name: str) -> str:
+        """获取上次命中的XPath"""
+        return self._data.get(name)
+
+    def put(self, name: str, xpath: str):
+        """记录命中的XPath，有变化时写盘"""
+        with self._lock:
+            if self._data.get(name) == xpath:
+                return
+            self._data[name] = xpath
+            try:
+                atomic_write(self.path, json.dumps(self._data, ensure_ascii=False,
+                                                   indent=2).encode("utf-8"))
+            except OSError:
+                pass
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_selector_cache() -> SelectorCache:
+    """获取进程内共享的候选命中缓存"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SelectorCache()
+        return _shared_cache
+
+
+class Locator:
+    """基于脚本的批量XPath定位"""
+
+    def __init__(self, driver, cache: SelectorCache = None):
+        """
+        初始化
+        :param driver: WebDriver
+        :param cache: 候选命中缓存，默认使用进程内共享缓存
+        """
+        self.driver = driver
+        self.cache = cache or get_selector_cache()
+        # 每次定位的记录: (名称, 耗时秒, 是否找到)
+        self.timings = []
+
+    def find(self, name: str, xpaths: list, timeout: float = 0,
+             visible: bool = False, poll: float = 0.2):
+        """
+        按优先级查找第一个匹配的元素
+        :param name: 定位名称，用于缓存和统计
+        :param xpaths: 候选XPath列表
+        :param timeout: 最长等待秒数，0表示只查一次
+        :param visible: 是否只匹配可见且未禁用的元素
+        :param poll: 轮询间隔
+        :return: WebElement，找不到时返回 None
+        """
+        cached = self.cache.get(name)
+        if cached in xpaths:
+            xpaths = [cached] + [x for x in xpaths if x != cached]
+
+        start = time.monotonic()
+        deadline = start + timeout
+        found = None
+        while True:
+            try:
+                found = self.driver.execute_script(_RESOLVE_SCRIPT, xpaths, visible)
+            except Exception:
+                # 页面跳转时脚本所在文档被卸载或上下文失效，在截止时间前继续轮询
+                found = None
+            if found or time.monotonic() >= deadline:
+                break
+            time.sleep(poll)
+
+        self.timings.append((name, time.monotonic() - start, bool(found)))
+        if not found:
+            return None
+
+        index, element = found
+        self.cache.put(name, xpaths[index])
+        return element
+
+    def summary(self) -> str:
+        """定位耗时汇总"""
+        total = sum(t[1] for t in self.timings)
+        missed = sum(1 for t in self.timings if not t[2])
+        return (f"{len(self.timings)} 次定位, 共 {total * 1000:.0f} ms, "
+                f"未找到 {missed} 次")
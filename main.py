@@ -3,84 +3,167 @@
 """
 雨云自动签到工具
 基于 Selenium + ddddocr
+
+selenium / requests / PIL / ddddocr / cryptography 都在用到时才导入，
+导入本模块很快，main_multi 的参数错误、--help、合并结果等不启动浏览器的路径也因此可以很快返回
 """
 
 import os
 import sys
 import time
-import base64
-import requests
-import ddddocr
-from io import BytesIO
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
+from session_cache import SessionStore, to_cdp_cookie
+from ocr_provider import get_ocr
+from captcha_solver import get_solver
+from tracing import get_tracer
+from ledger import get_ledger, force_enabled
+from locator import Locator
+from page_probe import PageProbe
+from captcha_fetch import CaptchaFetcher
+from failures import (CAPTCHA, CREDENTIALS, TIMEOUT, UNKNOWN, SITE_ERRORS,
+                      classify_message, classify_exception)
+from driver_resolver import resolve_chromedriver
+from lean_browsing import (lean_enabled, apply_lean_options, apply_lean_cdp,
+                           enable_performance_log, TrafficMeter)
+from browser_profiles import profiles_enabled, get_profile_store
+from browser_backend import backend_name, CHROME_ARGUMENTS, USER_AGENT, STEALTH_SCRIPT
+from diagnostics import get_diagnostics
 
 
 class RainyunSignin:
     """雨云自动签到类"""
     
-    # 雨云相关URL
-    BASE_URL = "https://app.rainyun.com"
+    # 雨云相关URL（与HTTP引擎一致，可通过 RAINYUN_BASE_URL 覆盖）
+    BASE_URL = os.environ.get("RAINYUN_BASE_URL", "https://app.rainyun.com").rstrip("/")
     LOGIN_URL = f"{BASE_URL}/account/signin"
     SIGNIN_URL = f"{BASE_URL}/account/reward/bindwxtips"
     USER_CENTER_URL = f"{BASE_URL}/account/overview"
     
-    def __init__(self, username: str, password: str, headless: bool = True):
+    def __init__(self, username: str, password: str, headless: bool = True,
+                 use_session_cache: bool = True, driver_pool=None):
         """
         初始化
         :param username: 用户名/邮箱/手机号
         :param password: 密码
         :param headless: 是否无头模式
+        :param use_session_cache: 是否使用会话缓存跳过登录
+        :param driver_pool: 浏览器驱动池，为空时每次新建浏览器
         """
         self.username = username
         self.password = password
         self.headless = headless
         self.driver = None
-        self.ocr = ddddocr.DdddOcr(show_ad=False)
+        self.driver_pool = driver_pool
+        # 持久化配置目录与浏览器绑定，不能与驱动池共用
+        self.use_profile = profiles_enabled() and not driver_pool
+        self.locator = None
+        self.probe = None
+        self.captcha_fetcher = None
+        # 精简浏览模式下关闭了图片加载，验证码改为在页面内 fetch
+        self.lean = lean_enabled()
+        self.traffic = None
+        # 共享的OCR模型，首次识别验证码时才加载
+        self.ocr = get_ocr()
+        self.captcha_solver = get_solver()
+        # 最近一次提交的验证码图片，用于登录后反馈识别是否正确
+        self._last_captcha_image = None
+        self.session_store = SessionStore() if use_session_cache else None
+        # 会话缓存状态: hit / miss / stale，未启用时为 None
+        self.session_status = None
+        # 失败类型（failures 中的常量），成功时为 None
+        self.failure = None
+        # 最近一次登录检查时页面上的错误提示
+        self._login_error = ""
+        # 已完成阶段的耗时（秒），随失败现场一起记录
+        self.phases = {}
         
-    def _init_driver(self):
-        """初始化Chrome驱动"""
+    @staticmethod
+    def create_driver(headless: bool = True, lean: bool = None, profile_user: str = None,
+                      backend: str = None):
+        """
+        创建Chrome驱动
+        :param headless: 是否无头模式
+        :param lean: 是否启用精简浏览，默认读取 RAINYUN_LEAN（默认关闭）
+        :param profile_user: 使用该账号的持久化配置目录，为空时使用临时配置
+        :param backend: 浏览器后端 selenium / cdp，默认读取 RAINYUN_BROWSER
+        :return: WebDriver（cdp 后端为接口相同的 CdpDriver）
+        """
+        if lean is None:
+            lean = lean_enabled()
+        if (backend or backend_name()) == "cdp":
+            # 直连 DevTools，不启动 chromedriver
+            from cdp_driver import launch
+            return launch(headless, lean=lean, profile_user=profile_user)
+
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
         chrome_options = Options()
         
-        if self.headless:
+        if headless:
             chrome_options.add_argument("--headless")
             
         # 常用配置
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        for argument in CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option("useAutomationExtension", False)
         
         # 设置User-Agent
-        chrome_options.add_argument(
-            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        chrome_options.add_argument(f"user-agent={USER_AGENT}")
         
-        # 使用webdriver_manager自动管理chromedriver
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        if lean:
+            apply_lean_options(chrome_options)
+        if profile_user:
+            get_profile_store().apply_options(chrome_options, profile_user)
+            enable_performance_log(chrome_options)
+            
+        # 使用本地缓存的chromedriver，缺失时由 Selenium Manager 查找
+        service = Service(resolve_chromedriver() or None)
+        driver = webdriver.Chrome(service=service, options=chrome_options)
         
         # 防止被检测
-        self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                })
-            """
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": STEALTH_SCRIPT
         })
         
-        self.driver.implicitly_wait(10)
-        print("✅ 浏览器驱动初始化成功")
+        if lean:
+            apply_lean_cdp(driver)
+            
+        # 不使用隐式等待，元素等待由定位器显式控制
+        driver.implicitly_wait(0)
+        return driver
+        
+    def _init_driver(self):
+        """初始化Chrome驱动（有驱动池时从池中获取）"""
+        # 浏览器启动期间在后台加载OCR模型
+        if os.environ.get("RAINYUN_OCR_PREWARM", "0") == "1":
+            self.ocr.prewarm()
+            
+        if self.driver_pool:
+            self.driver = self.driver_pool.acquire()
+            print("✅ 已从驱动池获取浏览器")
+        else:
+            self.driver = self.create_driver(self.headless, lean=self.lean,
+                                             profile_user=self.username if self.use_profile else None)
+            print(f"✅ 浏览器驱动初始化成功（{backend_name()}）")
+            
+        self.locator = Locator(self.driver)
+        self.probe = PageProbe(self.driver)
+        # 精简浏览关闭了图片加载，元素截图只会是空白
+        self.captcha_fetcher = CaptchaFetcher(self.driver, self.username,
+                                              allow_screenshot=not self.lean)
+        if self.lean or self.use_profile:
+            self.traffic = TrafficMeter(self.driver)
+            
+    def _navigate(self, url: str):
+        """
+        打开页面（精简浏览模式下按页面统计流量）
+        :param url: 页面地址
+        """
+        if self.traffic:
+            self.traffic.start_page(url)
+        self.driver.get(url)
         
     def _recognize_captcha(self, captcha_element) -> str:
         """
@@ -89,31 +172,11 @@ class RainyunSignin:
         :return: 识别结果
         """
         try:
-            # 方法1: 通过截图获取验证码
-            captcha_png = captcha_element.screenshot_as_png
-            result = self.ocr.classification(captcha_png)
-            print(f"🔍 验证码识别结果: {result}")
-            return result
-        except Exception as e:
-            print(f"❌ 验证码识别失败: {e}")
-            return ""
-    
-    def _recognize_captcha_from_src(self, img_src: str) -> str:
-        """
-        从图片src识别验证码
-        :param img_src: 图片地址或base64
-        :return: 识别结果
-        """
-        try:
-            if img_src.startswith("data:image"):
-                # Base64编码的图片
-                img_data = base64.b64decode(img_src.split(",")[1])
-            else:
-                # URL图片
-                response = requests.get(img_src, timeout=10)
-                img_data = response.content
-                
-            result = self.ocr.classification(img_data)
+            img_data = self.captcha_fetcher.fetch(captcha_element)
+            if not img_data:
+                return ""
+            self._last_captcha_image = img_data
+            result = self.captcha_solver.solve(img_data)
             print(f"🔍 验证码识别结果: {result}")
             return result
         except Exception as e:
@@ -127,11 +190,7 @@ class RainyunSignin:
         """
         try:
             print("🚀 开始登录雨云...")
-            self.driver.get(self.LOGIN_URL)
-            time.sleep(3)
-            
-            # 等待登录表单加载
-            wait = WebDriverWait(self.driver, 15)
+            self._navigate(self.LOGIN_URL)
             
             # 输入用户名 - 根据实际页面调整选择器
             username_selectors = [
@@ -141,19 +200,12 @@ class RainyunSignin:
                 "//input[contains(@class, 'username')]"
             ]
             
-            username_input = None
-            for selector in username_selectors:
-                try:
-                    username_input = wait.until(
-                        EC.presence_of_element_located((By.XPATH, selector))
-                    )
-                    if username_input:
-                        break
-                except:
-                    continue
-                    
+            # 等待登录表单加载
+            username_input = self.locator.find("username_input", username_selectors, timeout=15)
             if not username_input:
                 print("❌ 找不到用户名输入框")
+                # 登录页迟迟没有加载出表单
+                self.failure = TIMEOUT
                 return False
                 
             username_input.clear()
@@ -168,15 +220,7 @@ class RainyunSignin:
                 "//input[@type='password']"
             ]
             
-            password_input = None
-            for selector in password_selectors:
-                try:
-                    password_input = self.driver.find_element(By.XPATH, selector)
-                    if password_input:
-                        break
-                except:
-                    continue
-                    
+            password_input = self.locator.find("password_input", password_selectors, timeout=5)
             if not password_input:
                 print("❌ 找不到密码输入框")
                 return False
@@ -187,6 +231,7 @@ class RainyunSignin:
             time.sleep(0.5)
             
             # 处理验证码（如果存在）
+            self._last_captcha_image = None
             self._handle_captcha()
             
             # 点击登录按钮
@@ -198,15 +243,7 @@ class RainyunSignin:
                 "//button[contains(@class, 'login')]"
             ]
             
-            login_btn = None
-            for selector in login_btn_selectors:
-                try:
-                    login_btn = self.driver.find_element(By.XPATH, selector)
-                    if login_btn:
-                        break
-                except:
-                    continue
-                    
+            login_btn = self.locator.find("login_button", login_btn_selectors, timeout=5)
             if login_btn:
                 login_btn.click()
                 print("✅ 已点击登录按钮")
@@ -214,19 +251,28 @@ class RainyunSignin:
                 print("❌ 找不到登录按钮")
                 return False
                 
-            time.sleep(3)
-            
             # 验证登录是否成功
-            if self._check_login_status():
+            with get_tracer().span("check_login", self.username) as span:
+                logged_in = self._check_login_status(submitted=True)
+                span.outcome = "ok" if logged_in else "fail"
+            if logged_in:
+                if self._last_captcha_image is not None:
+                    self.captcha_solver.record_outcome(self._last_captcha_image, True)
                 print("✅ 登录成功！")
                 return True
             else:
                 print("❌ 登录失败，请检查账号密码")
+                self.failure = classify_message(self._login_error) or (
+                    CREDENTIALS if self._login_error else UNKNOWN)
+                # 只有页面提示验证码错误时才算识别错误，账号密码错误、超时等与识别无关
+                if self.failure == CAPTCHA and self._last_captcha_image is not None:
+                    self.captcha_solver.record_outcome(self._last_captcha_image, False)
                 return False
                 
         except Exception as e:
             print(f"❌ 登录过程出错: {e}")
-            self._save_screenshot("login_error")
+            self.failure = classify_exception(e)
+            self._capture_failure("login_error")
             return False
             
     def _handle_captcha(self, max_retry: int = 3):
@@ -234,96 +280,113 @@ class RainyunSignin:
         处理验证码
         :param max_retry: 最大重试次数
         """
-        for i in range(max_retry):
-            try:
-                # 查找验证码图片
-                captcha_selectors = [
-                    "//img[contains(@class, 'captcha')]",
-                    "//img[contains(@src, 'captcha')]",
-                    "//img[contains(@alt, '验证码')]",
-                    "//img[contains(@id, 'captcha')]"
-                ]
+        with get_tracer().span("captcha", self.username) as span:
+            for i in range(max_retry):
+                span.retries = i
+                try:
+                    # 查找验证码图片
+                    captcha_selectors = [
+                        "//img[contains(@class, 'captcha')]",
+                        "//img[contains(@src, 'captcha')]",
+                        "//img[contains(@alt, '验证码')]",
+                        "//img[contains(@id, 'captcha')]"
+                    ]
                 
-                captcha_img = None
-                for selector in captcha_selectors:
-                    try:
-                        captcha_img = self.driver.find_element(By.XPATH, selector)
-                        if captcha_img:
-                            break
-                    except:
-                        continue
-                        
-                if not captcha_img:
-                    print("ℹ️ 未发现验证码")
-                    return
+                    captcha_img = self.locator.find("captcha_image", captcha_selectors, timeout=1)
+                    if not captcha_img:
+                        print("ℹ️ 未发现验证码")
+                        span.outcome = "none"
+                        return
                     
-                # 识别验证码
-                captcha_code = self._recognize_captcha(captcha_img)
+                    # 识别验证码
+                    captcha_code = self._recognize_captcha(captcha_img)
                 
-                if not captcha_code:
-                    # 点击刷新验证码
-                    captcha_img.click()
-                    time.sleep(1)
-                    continue
+                    if not captcha_code:
+                        # 点击刷新验证码
+                        captcha_img.click()
+                        time.sleep(1)
+                        continue
                     
-                # 输入验证码
-                captcha_input_selectors = [
-                    "//input[@placeholder='验证码']",
-                    "//input[contains(@name, 'captcha')]",
-                    "//input[contains(@id, 'captcha')]"
-                ]
+                    # 输入验证码
+                    captcha_input_selectors = [
+                        "//input[@placeholder='验证码']",
+                        "//input[contains(@name, 'captcha')]",
+                        "//input[contains(@id, 'captcha')]"
+                    ]
                 
-                captcha_input = None
-                for selector in captcha_input_selectors:
-                    try:
-                        captcha_input = self.driver.find_element(By.XPATH, selector)
-                        if captcha_input:
-                            break
-                    except:
-                        continue
-                        
-                if captcha_input:
-                    captcha_input.clear()
-                    captcha_input.send_keys(captcha_code)
-                    print(f"✅ 已输入验证码: {captcha_code}")
-                    return
+                    captcha_input = self.locator.find("captcha_input", captcha_input_selectors, timeout=2)
+                    if captcha_input:
+                        captcha_input.clear()
+                        captcha_input.send_keys(captcha_code)
+                        print(f"✅ 已输入验证码: {captcha_code}")
+                        return
                     
-            except Exception as e:
-                print(f"⚠️ 处理验证码失败 (尝试 {i+1}/{max_retry}): {e}")
-                time.sleep(1)
+                except Exception as e:
+                    print(f"⚠️ 处理验证码失败 (尝试 {i+1}/{max_retry}): {e}")
+                    time.sleep(1)
+            span.outcome = "fail"
                 
-    def _check_login_status(self) -> bool:
-        """检查是否登录成功"""
+    def _check_login_status(self, submitted: bool = False) -> bool:
+        """
+        检查是否登录成功
+        :param submitted: 是否刚提交登录表单（仍停留在登录页时等待跳转或错误提示）
+        :return: 是否已登录
+        """
+        conditions = ["logged_in", "login_error"] if submitted else ["logged_in", "login_page"]
+        state = self.probe.wait_for(conditions, timeout=8 if submitted else 5)
+        self._login_error = state.get("login_error") or ""
+        if self._login_error:
+            print(f"⚠️ 登录提示: {state['login_error']}")
+            
+        if not submitted:
+            # 校验恢复的会话时必须看到已登录的元素，探测超时不能当作有效，否则会再次保存过期会话
+            return bool(state.get("logged_in"))
+        # 刚提交登录时找不到用户相关元素，离开登录页通常也表示登录成功
+        return bool(state.get("logged_in") or (state and not state.get("login_page")))
+            
+    def _restore_session(self) -> bool:
+        """
+        从会话缓存恢复登录状态
+        :return: 缓存的会话是否仍然有效
+        """
+        if not self.session_store:
+            return False
+            
+        cookies = self.session_store.load(self.username, self.password)
+        if not cookies:
+            self.session_status = "miss"
+            print("ℹ️ 无可用的会话缓存")
+            return False
+            
         try:
-            # 检查URL是否跳转
-            time.sleep(2)
-            current_url = self.driver.current_url
+            # 通过CDP注入cookies，无需先打开目标域名
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setCookies", {
+                "cookies": [to_cdp_cookie(c) for c in cookies]
+            })
+            self._navigate(self.USER_CENTER_URL)
             
-            # 如果还在登录页，说明登录失败
-            if "signin" in current_url or "login" in current_url:
-                return False
-                
-            # 检查是否有用户相关元素
-            user_indicators = [
-                "//div[contains(@class, 'user')]",
-                "//span[contains(@class, 'username')]",
-                "//a[contains(@href, 'logout')]",
-                "//div[contains(text(), '账户')]"
-            ]
+            if self._check_login_status():
+                self.session_status = "hit"
+                print("✅ 会话缓存有效，跳过登录")
+                return True
+        except Exception as e:
+            print(f"⚠️ 恢复会话失败: {e}")
             
-            for selector in user_indicators:
-                try:
-                    if self.driver.find_element(By.XPATH, selector):
-                        return True
-                except:
-                    continue
-                    
-            # 如果URL变化了，通常表示登录成功
-            return "signin" not in current_url
+        self.session_status = "stale"
+        self.session_store.invalidate(self.username)
+        print("ℹ️ 会话缓存已失效，重新登录")
+        return False
+        
+    def _save_session(self):
+        """保存当前会话到缓存"""
+        if not self.session_store:
+            return
             
+        try:
+            self.session_store.save(self.username, self.password, self.driver.get_cookies())
         except Exception as e:
-            print(f"⚠️ 检查登录状态失败: {e}")
-            return False
+            print(f"⚠️ 保存会话失败: {e}")
             
     def signin(self) -> bool:
         """
@@ -333,49 +396,27 @@ class RainyunSignin:
         try:
             print("🚀 开始执行签到...")
             
-            # 访问用户中心或签到页面
-            self.driver.get(self.USER_CENTER_URL)
-            time.sleep(3)
-            
-            # 查找签到按钮
-            signin_btn_selectors = [
-                "//button[contains(text(), '签到')]",
-                "//a[contains(text(), '签到')]",
-                "//div[contains(text(), '签到')]",
-                "//span[contains(text(), '签到')]",
-                "//button[contains(@class, 'sign')]",
-                "//div[contains(@class, 'sign')]"
-            ]
+            # 访问用户中心或签到页面（恢复会话时已在该页面）
+            if self.driver.current_url.rstrip("/") != self.USER_CENTER_URL:
+                self._navigate(self.USER_CENTER_URL)
             
-            signin_btn = None
-            for selector in signin_btn_selectors:
-                try:
-                    elements = self.driver.find_elements(By.XPATH, selector)
-                    for elem in elements:
-                        if elem.is_displayed() and elem.is_enabled():
-                            text = elem.text
-                            if "已签到" in text or "已签" in text:
-                                print("ℹ️ 今日已经签到过了")
-                                return True
-                            signin_btn = elem
-                            break
-                    if signin_btn:
-                        break
-                except:
-                    continue
-                    
-            if not signin_btn:
+            # 一次探测同时得到签到按钮和是否已签到
+            state = self.probe.wait_for(["signed", "signin_enabled"], timeout=10)
+            if state.get("signed"):
+                print("ℹ️ 今日已经签到过了")
+                return True
+                
+            signin_btn = state.get("signin_button")
+            if not signin_btn or not state.get("signin_enabled"):
                 # 尝试通过API接口签到
                 return self._signin_via_api()
                 
             # 点击签到按钮
             signin_btn.click()
             print("✅ 已点击签到按钮")
-            time.sleep(2)
             
             # 处理签到可能出现的验证码
             self._handle_captcha()
-            time.sleep(2)
             
             # 检查签到结果
             if self._check_signin_result():
@@ -383,125 +424,172 @@ class RainyunSignin:
                 return True
             else:
                 print("⚠️ 签到结果未知")
+                self.failure = UNKNOWN
                 return False
                 
         except Exception as e:
             print(f"❌ 签到过程出错: {e}")
-            self._save_screenshot("signin_error")
+            self.failure = classify_exception(e)
+            self._capture_failure("signin_error")
             return False
             
     def _signin_via_api(self) -> bool:
         """通过API接口签到"""
         try:
-            print("🔄 尝试通过API接口签到...")
-            
             # 获取cookies
             cookies = {cookie['name']: cookie['value'] 
                       for cookie in self.driver.get_cookies()}
+            user_agent = self.driver.execute_script("return navigator.userAgent")
             
-            # 雨云签到API（需要根据实际情况调整）
-            api_urls = [
-                f"{self.BASE_URL}/api/user/sign",
-                f"{self.BASE_URL}/api/user/reward/sign",
-                f"{self.BASE_URL}/api/account/sign"
-            ]
-            
-            headers = {
-                "User-Agent": self.driver.execute_script("return navigator.userAgent"),
-                "Referer": self.USER_CENTER_URL,
-                "Content-Type": "application/json"
-            }
-            
-            for api_url in api_urls:
-                try:
-                    response = requests.post(
-                        api_url, 
-                        cookies=cookies, 
-                        headers=headers,
-                        timeout=10
-                    )
-                    if response.status_code == 200:
-                        result = response.json()
-                        print(f"📡 API响应: {result}")
-                        if result.get("code") == 0 or result.get("success"):
-                            print("🎉 API签到成功！")
-                            return True
-                except Exception as e:
-                    continue
-                    
-            return False
+            from http_signin import RainyunHttpSignin
+            api = RainyunHttpSignin(self.username, self.password, use_session_cache=False)
+            signed = api.signin_with_cookies(cookies, user_agent)
+            if not signed:
+                self.failure = api.last_error or UNKNOWN
+            return signed
             
         except Exception as e:
             print(f"❌ API签到失败: {e}")
+            self.failure = classify_exception(e)
             return False
             
     def _check_signin_result(self) -> bool:
-        """检查签到结果"""
+        """检查签到结果（等待成功提示或按钮变为已签到）"""
         try:
-            # 检查页面是否有成功提示
-            success_indicators = [
-                "//*[contains(text(), '签到成功')]",
-                "//*[contains(text(), '获得')]",
-                "//*[contains(text(), '积分')]",
-                "//*[contains(@class, 'success')]"
-            ]
-            
-            for selector in success_indicators:
-                try:
-                    if self.driver.find_element(By.XPATH, selector):
-                        return True
-                except:
-                    continue
-                    
-            # 检查是否显示已签到
-            try:
-                page_source = self.driver.page_source
-                if "已签到" in page_source or "签到成功" in page_source:
-                    return True
-            except:
-                pass
-                
-            return False
+            state = self.probe.wait_for(["signin_success", "signed"], timeout=5)
+            if state.get("toast"):
+                print(f"💬 {state['toast']}")
+            if state.get("points") is not None:
+                print(f"💰 获得 {state['points']} 积分")
+            return bool(state.get("signin_success") or state.get("signed"))
             
         except Exception as e:
             print(f"⚠️ 检查签到结果失败: {e}")
             return False
             
-    def _save_screenshot(self, name: str):
-        """保存截图用于调试"""
-        try:
-            filename = f"{name}_{int(time.time())}.png"
-            self.driver.save_screenshot(filename)
-            print(f"📸 已保存截图: {filename}")
-        except Exception as e:
-            print(f"⚠️ 保存截图失败: {e}")
+    def _capture_failure(self, name: str):
+        """记录失败现场（截图、DOM、地址、阶段耗时）用于调试，压缩写盘在后台进行"""
+        timings = dict(self.phases)
+        if self.locator and self.locator.timings:
+            timings["locator"] = [[n, round(t, 3), ok] for n, t, ok in self.locator.timings]
+        if self.probe and self.probe.timings:
+            timings["probe"] = [[n, round(t, 3), ok] for n, t, ok in self.probe.timings]
+        if self.captcha_fetcher and self.captcha_fetcher.timings:
+            timings["captcha_fetch"] = [[m, round(t, 3), size]
+                                        for m, t, size in self.captcha_fetcher.timings]
+        get_diagnostics().capture(self.driver, self.username, name, timings)
             
     def run(self) -> bool:
         """
         运行签到流程
         :return: 是否成功
         """
+        tracer = get_tracer()
         try:
-            self._init_driver()
-            
-            if not self.login():
-                return False
+            with tracer.span("init_driver", self.username) as span:
+                self._init_driver()
+            self.phases[span.phase] = round(span.duration, 3)
+            
+            with tracer.span("restore_session", self.username) as span:
+                restored = self._restore_session()
+                span.outcome = self.session_status or "disabled"
+            self.phases[span.phase] = round(span.duration, 3)
+                
+            if not restored:
+                with tracer.span("login", self.username) as span:
+                    logged_in = self.login()
+                    span.outcome = "ok" if logged_in else "fail"
+                self.phases[span.phase] = round(span.duration, 3)
+                if not logged_in:
+                    return False
+                self._save_session()
                 
-            if not self.signin():
+            with tracer.span("signin", self.username) as span:
+                signed = self.signin()
+                span.outcome = "ok" if signed else "fail"
+            if not signed:
                 return False
                 
+            # 签到后cookies可能已刷新
+            self._save_session()
             return True
             
         except Exception as e:
             print(f"❌ 运行出错: {e}")
+            self.failure = classify_exception(e)
             return False
             
         finally:
-            if self.driver:
+            if self.traffic:
+                self.traffic.flush()
+            if self.locator and self.locator.timings:
+                print(f"🔎 元素定位: {self.locator.summary()}")
+            if self.probe and self.probe.timings:
+                print(f"🔎 页面探测: {self.probe.summary()}")
+            if self.captcha_fetcher and self.captcha_fetcher.timings:
+                print(f"🖼️ 验证码获取: {self.captcha_fetcher.summary()}")
+            if self.driver and self.driver_pool:
+                self.driver_pool.release(self.driver)
+                print("♻️ 浏览器已归还驱动池")
+            elif self.driver:
                 self.driver.quit()
                 print("✅ 浏览器已关闭")
                 
 
+def run_signin(username: str, password: str, engine: str = "auto",
+               headless: bool = True, use_session_cache: bool = True,
+               driver_pool=None, force: bool = False) -> dict:
+    """
+    按指定引擎执行单个账号的签到
+    :param engine: http - 仅HTTP；selenium - 仅浏览器；auto - 先HTTP，失败再用浏览器
+    :param driver_pool: 浏览器驱动池，为空时每次新建浏览器
+    :param force: 忽略签到账本，今天已签到也重新执行
+    :return: {"success": 是否成功, "engine": 最终使用的引擎, "session": 会话缓存状态,
+             "reason": 失败类型}，账本显示今天已签到时 engine 为 ledger
+    """
+    ledger = get_ledger()
+    if not force and ledger.signed_today(username):
+        print("ℹ️ 账本显示今日已签到，跳过")
+        return {"success": True, "engine": "ledger", "session": None, "reason": None}
+        
+    with get_tracer().span("account", username, engine=engine) as span:
+        result = None
+        if engine in ("http", "auto"):
+            from http_signin import RainyunHttpSignin
+            api = RainyunHttpSignin(username, password, use_session_cache=use_session_cache)
+            success = api.run()
+            # HTTP引擎的接口地址是推测的，接口返回 5xx/404 不代表网站不可用，仍改用浏览器；
+            # 只有连接失败或超时时浏览器也无济于事
+            site_unreachable = api.failure in SITE_ERRORS and api.error_status is None
+            if success or engine == "http" or site_unreachable:
+                result = {"success": success, "engine": "http", "session": api.session_status,
+                          "reason": None if success else api.failure or UNKNOWN}
+            else:
+                print("🔄 HTTP签到失败，改用浏览器签到")
+                span.retries += 1
+                
+        if result is None:
+            signin = RainyunSignin(username, password, headless=headless,
+                                   use_session_cache=use_session_cache,
+                                   driver_pool=driver_pool)
+            success = signin.run()
+            result = {"success": success, "engine": "selenium", "session": signin.session_status,
+                      "reason": None if success else signin.failure or UNKNOWN}
+            if signin.traffic and signin.traffic.responses:
+                result["cache"] = {"responses": signin.traffic.responses,
+                                   "cached": signin.traffic.cached}
+            if signin.traffic and signin.lean:
+                result["traffic"] = {"bytes": signin.traffic.bytes,
+                                     "saved": signin.traffic.saved}
+            
+        span.outcome = "ok" if result["success"] else result["reason"]
+        span.attrs["engine"] = result["engine"]
+        
+    if result["success"]:
+        ledger.record(username)
+    return result
+
+
 def main():
     """主函数"""
     # 从环境变量获取账号信息
@@ -519,10 +607,32 @@ def main():
     print(f"⏰ 时间: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 50)
     
-    signin = RainyunSignin(username, password, headless=True)
-    success = signin.run()
+    engine = os.environ.get("RAINYUN_ENGINE", "auto")
+    use_session_cache = os.environ.get("RAINYUN_SESSION_CACHE", "1") != "0"
+    result = run_signin(username, password, engine=engine, headless=True,
+                        use_session_cache=use_session_cache, force=force_enabled())
+    success = result["success"]
     
     print("=" * 50)
+    print(f"⚙️ 签到引擎: {result['engine']}")
+    if result.get("reason"):
+        print(f"🧭 失败类型: {result['reason']}")
+    if result["session"]:
+        print(f"🍪 会话缓存: {result['session']}")
+    if get_solver().stats["solved"]:
+        print(f"🔍 验证码: {get_solver().summary()}")
+    if result.get("cache"):
+        cache = result["cache"]
+        print(f"🗄️ 浏览器缓存命中: {cache['cached']}/{cache['responses']}")
+    if profiles_enabled():
+        store = get_profile_store()
+        store.prune()
+        print(f"💽 配置目录占用: {store.disk_usage() / 1024 / 1024:.1f} MB")
+    diagnostics = get_diagnostics()
+    diagnostics.flush()
+    if diagnostics.entries:
+        print(f"🩺 失败现场: {diagnostics.summary()}")
+    get_tracer().export()
     if success:
         print("✅ 签到任务完成！")
         sys.exit(0)
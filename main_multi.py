@@ -8,7 +8,22 @@ import os
 import sys
 import json
 import time
-from main import RainyunSignin
+import argparse
+import itertools
+from collections import Counter
+from urllib.parse import urlparse
+from main import RainyunSignin, run_signin
+from runner import HostRateLimiter, run_accounts
+from driver_pool import DriverPool
+from captcha_solver import get_solver
+from tracing import get_tracer
+from ledger import get_ledger, force_enabled
+from failures import RetryPolicy, CircuitBreaker, CIRCUIT_OPEN, classify_exception
+from browser_profiles import profiles_enabled, get_profile_store
+from adaptive import AdaptiveConcurrency
+from diagnostics import get_diagnostics
+from account_stream import (iter_accounts, account_key, parse_shard, in_shard,
+                            read_results, ResultLog)
 
 
 def parse_accounts():
@@ -51,71 +66,285 @@ def parse_accounts():
     return accounts
 
 
-def main():
+class Summary:
+    """流式汇总签到结果，只保留计数和有限条明细，内存占用与账号数量无关"""
+    
+    # 汇总中逐个列出的账号数量上限
+    DETAIL_LIMIT = 100
+    
+    def __init__(self):
+        self.total = 0
+        self.success = 0
+        self.engines = Counter()
+        self.sessions = Counter()
+        self.reasons = Counter()
+        self.retried = 0
+        self.cache_responses = 0
+        self.cache_hits = 0
+        self.traffic_bytes = 0
+        self.traffic_saved = 0
+        self.details = []
+        
+    @property
+    def failed(self) -> int:
+        """失败数量"""
+        return self.total - self.success
+        
+    def add(self, result: dict):
+        """加入一条结果"""
+        self.total += 1
+        self.success += 1 if result["success"] else 0
+        self.engines[result.get("engine")] += 1
+        self.sessions[result.get("session")] += 1
+        if not result["success"]:
+            self.reasons[result.get("reason") or "unknown"] += 1
+        if result.get("attempts", 1) > 1:
+            self.retried += 1
+        if result.get("cache"):
+            self.cache_responses += result["cache"]["responses"]
+            self.cache_hits += result["cache"]["cached"]
+        if result.get("traffic"):
+            self.traffic_bytes += result["traffic"]["bytes"]
+            self.traffic_saved += result["traffic"]["saved"]
+        if len(self.details) < self.DETAIL_LIMIT:
+            # 合并结果文件时只有账号哈希
+            username = result.get("username")
+            label = f"{username[:3]}***" if username else result.get("account", "?")
+            self.details.append((label, result["success"]))
+            
+    def print(self, use_session_cache: bool = True, driver_pool=None, breaker=None,
+              controller=None):
+        """打印汇总"""
+        print("\n" + "=" * 50)
+        print("📊 签到结果汇总")
+        print("=" * 50)
+        
+        for label, success in self.details:
+            status = "✅ 成功" if success else "❌ 失败"
+            print(f"  {label}: {status}")
+        if self.total > len(self.details):
+            print(f"  ... 其余 {self.total - len(self.details)} 个账号省略")
+            
+        print("=" * 50)
+        print(f"✅ 成功: {self.success} | ❌ 失败: {self.failed}")
+        if self.reasons:
+            print("🧭 失败类型: " + " | ".join(f"{k} {v}" for k, v in self.reasons.most_common()))
+        if self.retried:
+            print(f"🔁 重试过的账号: {self.retried}")
+        if breaker and breaker.trips:
+            print(f"🔌 熔断: {breaker.trips} 次，跳过 {breaker.rejected} 次签到")
+        http_count = self.engines["http"]
+        ledger_count = self.engines["ledger"]
+        browser_count = self.engines["selenium"]
+        print(f"⚙️ HTTP引擎: {http_count} | 浏览器引擎: {browser_count} | 账本跳过: {ledger_count}")
+        if get_solver().stats["solved"]:
+            print(f"🔍 验证码: {get_solver().summary()}")
+        if driver_pool:
+            stats = driver_pool.stats
+            print(f"♻️ 驱动池: 新建 {stats['created']} | 复用 {stats['reused']} | 回收 {stats['recycled']}")
+        if use_session_cache:
+            hit_count = self.sessions["hit"]
+            miss_count = self.sessions["miss"] + self.sessions["stale"]
+            print(f"🍪 会话缓存: 命中 {hit_count} | 未命中 {miss_count}")
+        if self.cache_responses:
+            print(f"🗄️ 浏览器缓存命中率: {self.cache_hits / self.cache_responses:.0%} "
+                  f"({self.cache_hits}/{self.cache_responses})")
+        if self.traffic_bytes or self.traffic_saved:
+            print(f"🪶 精简浏览: 传输 {self.traffic_bytes / 1024 / 1024:.1f} MB，"
+                  f"拦截约节省 {self.traffic_saved / 1024 / 1024:.1f} MB")
+        if profiles_enabled():
+            usage = get_profile_store().disk_usage()
+            print(f"💽 配置目录占用: {usage / 1024 / 1024:.1f} MB")
+        if controller:
+            for line in controller.summary():
+                print(line)
+        diagnostics = get_diagnostics()
+        diagnostics.flush()
+        if diagnostics.entries:
+            print(f"🩺 失败现场: {diagnostics.summary()}")
+        print("=" * 50)
+        
+    def exit_code(self) -> int:
+        """全部失败时退出码为1"""
+        return 1 if self.total and self.failed == self.total else 0
+
+
+def main(argv: list = None):
     """主函数"""
-    accounts = parse_accounts()
+    parser = argparse.ArgumentParser(description="雨云自动签到工具 - 多账号版本")
+    parser.add_argument("--accounts-file", default=os.environ.get("RAINYUN_ACCOUNTS_FILE"),
+                        help="逐行读取账号的文件（JSON lines 或 user----pass），- 表示标准输入")
+    parser.add_argument("--results", default=os.environ.get("RAINYUN_RESULTS_FILE"),
+                        help="每个结果完成后立即追加写入的 JSONL 文件")
+    parser.add_argument("--resume", action="store_true",
+                        help="跳过结果文件中已签到成功的账号，用于中断后续跑")
+    parser.add_argument("--shard", default=os.environ.get("RAINYUN_SHARD"),
+                        help="只处理第 i 个分片（i/n，i 从 0 开始），按用户名哈希分配")
+    parser.add_argument("--merge", nargs="+", metavar="RESULTS",
+                        help="合并各分片的结果文件并输出汇总，不执行签到")
+    args = parser.parse_args(argv)
     
-    if not accounts:
+    if args.merge:
+        summary = Summary()
+        for result in read_results(args.merge):
+            summary.add(result)
+        if not summary.total:
+            print("❌ 结果文件中没有任何结果")
+            sys.exit(1)
+        print(f"🧩 已合并 {len(args.merge)} 个结果文件")
+        summary.print()
+        sys.exit(summary.exit_code())
+        
+    if args.accounts_file and args.accounts_file != "-" and not os.path.isfile(args.accounts_file):
+        print(f"❌ 账号文件不存在: {args.accounts_file}")
+        sys.exit(1)
+    if args.accounts_file:
+        accounts = iter_accounts(args.accounts_file)
+        total = "?"
+    else:
+        accounts = parse_accounts()
+        total = len(accounts)
+        
+    shard_label = ""
+    if args.shard:
+        try:
+            shard_index, shard_count = parse_shard(args.shard)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        accounts = (a for a in accounts
+                    if in_shard(a.get("username", ""), shard_index, shard_count))
+        total = "?"
+        shard_label = f"分片 {shard_index}/{shard_count}"
+        
+    result_log = ResultLog(args.results) if args.results else None
+    if result_log and args.resume:
+        done = result_log.completed()
+        print(f"🔁 续跑: 跳过已签到成功的 {len(done)} 个账号")
+        accounts = (a for a in accounts if account_key(a.get("username", "")) not in done)
+        
+    accounts = iter(accounts)
+    first = next(accounts, None)
+    if first is None:
+        if result_log and args.resume:
+            print("✅ 所有账号均已签到成功")
+            sys.exit(0)
+        if shard_label:
+            print(f"ℹ️ {shard_label} 没有分配到账号")
+            sys.exit(0)
         print("❌ 未配置任何账号")
         sys.exit(1)
+    accounts = itertools.chain([first], accounts)
     
     print("=" * 50)
     print("🌧️ 雨云自动签到工具 - 多账号版本")
-    print(f"📊 共 {len(accounts)} 个账号")
+    print(f"📊 共 {total} 个账号" if total != "?" else "📊 流式读取账号")
+    if shard_label:
+        print(f"🧩 {shard_label}")
     print("=" * 50)
     
-    results = []
-    
-    for i, account in enumerate(accounts, 1):
+    engine = os.environ.get("RAINYUN_ENGINE", "auto")
+    use_session_cache = os.environ.get("RAINYUN_SESSION_CACHE", "1") != "0"
+    # RAINYUN_CONCURRENCY=auto 时按内存、CPU和耗时动态调整
+    controller = None
+    if os.environ.get("RAINYUN_CONCURRENCY", "2") == "auto":
+        controller = AdaptiveConcurrency()
+        concurrency = controller.maximum
+    else:
+        concurrency = int(os.environ.get("RAINYUN_CONCURRENCY", "2"))
+    limiter = HostRateLimiter(
+        interval=float(os.environ.get("RAINYUN_RATE_INTERVAL", "2")),
+        jitter=float(os.environ.get("RAINYUN_RATE_JITTER", "1"))
+    )
+    host = urlparse(RainyunSignin.BASE_URL).netloc
+    force = force_enabled()
+    ledger = get_ledger()
+    driver_pool = None
+    # 持久化配置目录按账号启动浏览器，不使用驱动池
+    if engine != "http" and not profiles_enabled():
+        driver_pool = DriverPool(
+            factory=lambda: RainyunSignin.create_driver(headless=True),
+            size=int(os.environ.get("RAINYUN_POOL_SIZE", concurrency)),
+            max_uses=int(os.environ.get("RAINYUN_POOL_MAX_USES", "20")),
+            max_rss_mb=int(os.environ.get("RAINYUN_POOL_MAX_RSS_MB", "1024")),
+            origins=[RainyunSignin.BASE_URL]
+        )
+    if controller and driver_pool:
+        controller.bind_pool(driver_pool)
+    retry = RetryPolicy()
+    breaker = CircuitBreaker()
+        
+    def worker(i, account):
+        """处理单个账号"""
         username = account.get("username", "")
         password = account.get("password", "")
         
+        # 账本显示今天已签到的账号不占用限速时间槽
+        if not force and ledger.signed_today(username):
+            print(f"ℹ️ 账号 {i}/{total}: {username[:3]}*** 今日已签到，跳过")
+            return {"username": username, "success": True, "engine": "ledger", "session": None}
+            
+        # 站点熔断期间不启动浏览器，留给重试队列稍后再试
+        permit = breaker.allow()
+        if not permit:
+            print(f"🔌 账号 {i}/{total}: {username[:3]}*** 站点熔断中，暂不签到")
+            return {"username": username, "success": False, "engine": None, "session": None,
+                    "reason": CIRCUIT_OPEN, "error": "circuit open",
+                    "retry_after": breaker.retry_after()}
+            
+        # 按主机限速，替代固定的账号间隔
+        with get_tracer().span("rate_wait", username):
+            limiter.acquire(host)
         print(f"\n{'='*50}")
-        print(f"📧 账号 {i}/{len(accounts)}: {username[:3]}***")
+        print(f"📧 账号 {i}/{total}: {username[:3]}***")
         print(f"⏰ 时间: {time.strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 50)
         
         try:
-            signin = RainyunSignin(username, password, headless=True)
-            success = signin.run()
-            results.append({
-                "username": username,
-                "success": success
-            })
+            result = run_signin(username, password, engine=engine, headless=True,
+                                use_session_cache=use_session_cache,
+                                driver_pool=driver_pool, force=force)
+            result["username"] = username
         except Exception as e:
             print(f"❌ 账号 {username} 签到出错: {e}")
-            results.append({
+            result = {
                 "username": username,
                 "success": False,
+                "reason": classify_exception(e),
                 "error": str(e)
-            })
-        
-        # 账号间间隔
-        if i < len(accounts):
-            print("\n⏳ 等待 10 秒后处理下一个账号...")
-            time.sleep(10)
-    
-    # 汇总结果
-    print("\n" + "=" * 50)
-    print("📊 签到结果汇总")
-    print("=" * 50)
-    
-    success_count = sum(1 for r in results if r["success"])
-    fail_count = len(results) - success_count
+            }
+        breaker.record(result.get("reason"), permit)
+        print(f"🏁 账号 {i}/{total} 完成: {'✅' if result['success'] else '❌'}")
+        return result
     
-    for r in results:
-        status = "✅ 成功" if r["success"] else "❌ 失败"
-        print(f"  {r['username'][:3]}***: {status}")
-    
-    print("=" * 50)
-    print(f"✅ 成功: {success_count} | ❌ 失败: {fail_count}")
-    print("=" * 50)
+    if controller:
+        print(f"⚙️ 并发数: 自适应（初始 {controller.limit}，上限 {controller.maximum}）")
+    else:
+        print(f"⚙️ 并发数: {concurrency}")
+    summary = Summary()
+    try:
+        with get_tracer().span("run", concurrency=concurrency) as span:
+            for result in run_accounts(accounts, worker, concurrency=concurrency, retry=retry,
+                                       controller=controller):
+                summary.add(result)
+                if result_log:
+                    result_log.append(result)
+            span.attrs["accounts"] = summary.total
+            span.outcome = "ok" if summary.success else "fail"
+    finally:
+        if controller:
+            controller.close()
+        if driver_pool:
+            driver_pool.close()
+        if result_log:
+            result_log.close()
+        if profiles_enabled():
+            get_profile_store().prune()
     
-    # 如果全部失败则退出码为1
-    if fail_count == len(results):
-        sys.exit(1)
-    sys.exit(0)
+    summary.print(use_session_cache, driver_pool, breaker, controller)
+    get_tracer().export()
+    sys.exit(summary.exit_code())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟雨云服务
+模拟登录页、验证码图片、用户中心签到按钮和签到接口，可注入延迟、故障和验证码，
+配合 RAINYUN_BASE_URL 用于本地测试与基准测试
+
+用法: python mock_server.py [--port 8080] [--latency 50] [--fail-rate 0.1] [--captcha]
+"""
+
+import json
+import time
+import random
+import secrets
+import argparse
+import threading
+from io import BytesIO
+from collections import Counter
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="UTF-8"><title>登录 - 雨云</title></head>
+<body>
+<form id="login-form" onsubmit="return false">
+    <input type="text" name="username" placeholder="邮箱/用户名/手机号">
+    <input type="password" name="password" placeholder="密码">
+    {captcha}
+    <button type="submit" id="login">登录</button>
+    <div id="msg"></div>
+</form>
+<script>
+document.getElementById('login').addEventListener('click', async () => {{
+    const field = name => (document.querySelector('input[name=' + name + ']') || {{}}).value;
+    const response = await fetch('/api/user/login', {{
+        method: 'POST',
+        headers: {{'Content-Type': 'application/json'}},
+        body: JSON.stringify({{username: field('username'), password: field('password'),
+                              captcha: field('captcha')}})
+    }});
+    const result = await response.json();
+    if (result.code === 0) location.href = '/account/overview';
+    else document.getElementById('msg').textContent = result.message;
+}});
+</script>
+</body></html>
+"""
+
+CAPTCHA_FIELDS = """<img class="captcha" src="/api/captcha" alt="验证码">
+    <input type="text" name="captcha" placeholder="验证码">"""
+
+OVERVIEW_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="UTF-8"><title>总览 - 雨云</title></head>
+<body>
+<div class="user-info"><span class="username">{username}</span> <a href="/logout">退出</a></div>
+{button}
+<div id="toast"></div>
+<script>
+const button = document.getElementById('sign');
+if (button) button.addEventListener('click', async () => {{
+    const response = await fetch('/api/user/sign', {{method: 'POST'}});
+    const result = await response.json();
+    document.getElementById('toast').textContent =
+        result.message + (result.data ? '，获得 ' + result.data.points + ' 积分' : '');
+    button.outerHTML = '<span class="signed">已签到</span>';
+}});
+</script>
+</body></html>
+"""
+
+
+class MockRainyun:
+    """模拟服务的状态与配置"""
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0,
+                 captcha: bool = False, password: str = None):
+        """
+        初始化
+        :param latency: 每个请求的额外延迟（秒）
+        :param fail_rate: 随机返回 503 的概率
+        :param captcha: 登录是否需要验证码
+        :param password: 接受的密码，为空时接受任意密码（用户名以 bad 开头的账号总是失败）
+        """
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.captcha = captcha
+        self.password = password
+        self.captchas = {}
+        self.sessions = {}
+        self.signed = set()
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def render_captcha(self, sid: str) -> bytes:
+        """生成验证码图片并绑定到访客"""
+        from PIL import Image, ImageDraw, ImageFont
+
+        code = "".join(random.choice("23456789ABCDEFGHJKLMNPQRSTUVWXYZ") for _ in range(4))
+        with self.lock:
+            self.captchas[sid] = code
+
+        image = Image.new("RGB", (120, 40), "white")
+        draw = ImageDraw.Draw(image)
+        try:
+            font = ImageFont.load_default(size=28)
+        except TypeError:
+            font = ImageFont.load_default()
+        draw.text((12, 4), code, fill="black", font=font)
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def make_handler(self):
+        """生成绑定到当前状态的请求处理类"""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _cookies(self) -> dict:
+                cookie = SimpleCookie(self.headers.get("Cookie", ""))
+                return {k: v.value for k, v in cookie.items()}
+
+            def _visitor(self) -> tuple:
+                """获取访客ID，没有时分配新的"""
+                sid = self._cookies().get("mock_sid")
+                if sid:
+                    return sid, None
+                sid = secrets.token_hex(8)
+                return sid, f"mock_sid={sid}; Path=/"
+
+            def _user(self) -> str:
+                token = self._cookies().get("rain_session", "")
+                with mock.lock:
+                    return mock.sessions.get(token)
+
+            def _send(self, status: int, body: bytes, content_type: str,
+                      cookies: list = None, headers: dict = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for cookie in cookies or []:
+                    if cookie:
+                        self.send_header("Set-Cookie", cookie)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, status: int, data: dict, cookies: list = None):
+                self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"),
+                           "application/json; charset=utf-8", cookies)
+
+            def _html(self, page: str, cookies: list = None):
+                self._send(200, page.encode("utf-8"), "text/html; charset=utf-8", cookies)
+
+            def _read_json(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    return json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return {}
+
+            def _inject(self) -> bool:
+                """注入延迟与故障，返回是否已响应故障"""
+                path = urlparse(self.path).path
+                with mock.lock:
+                    mock.stats[f"{self.command} {path}"] += 1
+                if mock.latency:
+                    time.sleep(mock.latency)
+                if mock.fail_rate and random.random() < mock.fail_rate:
+                    with mock.lock:
+                        mock.stats["injected_failures"] += 1
+                    self._send(503, b"Service Unavailable", "text/plain")
+                    return True
+                return False
+
+            def do_GET(self):
+                if self._inject():
+                    return
+                path = urlparse(self.path).path
+                sid, set_sid = self._visitor()
+
+                if path == "/account/signin":
+                    self._html(LOGIN_PAGE.format(
+                        captcha=CAPTCHA_FIELDS if mock.captcha else ""), [set_sid])
+                elif path == "/api/captcha":
+                    self._send(200, mock.render_captcha(sid), "image/png", [set_sid])
+                elif path == "/account/overview":
+                    username = self._user()
+                    if not username:
+                        self._send(302, b"", "text/plain",
+                                   headers={"Location": "/account/signin"})
+                        return
+                    with mock.lock:
+                        signed = username in mock.signed
+                    button = ('<span class="signed">已签到</span>' if signed
+                              else '<button id="sign" class="sign-btn">签到</button>')
+                    self._html(OVERVIEW_PAGE.format(username=username, button=button))
+                else:
+                    self._send(404, b"Not Found", "text/plain")
+
+            def do_POST(self):
+                if self._inject():
+                    return
+                path = urlparse(self.path).path
+                sid, set_sid = self._visitor()
+
+                if path == "/api/user/login":
+                    data = self._read_json()
+                    username = data.get("username") or data.get("field") or ""
+                    password = data.get("password", "")
+                    if mock.captcha:
+                        with mock.lock:
+                            expected = mock.captchas.pop(sid, None)
+                        if not data.get("captcha"):
+                            self._json(200, {"code": 1, "message": "请输入验证码"}, [set_sid])
+                            return
+                        if not expected or data["captcha"].upper() != expected:
+                            self._json(200, {"code": 1, "message": "验证码错误"}, [set_sid])
+                            return
+                    if (not username or username.startswith("bad")
+                            or (mock.password is not None and password != mock.password)):
+                        self._json(200, {"code": 1, "message": "账号或密码错误"}, [set_sid])
+                        return
+                    token = secrets.token_hex(16)
+                    with mock.lock:
+                        mock.sessions[token] = username
+                    self._json(200, {"code": 0, "message": "登录成功"},
+                               [set_sid, f"rain_session={token}; Path=/; HttpOnly"])
+                elif path == "/api/user/sign":
+                    username = self._user()
+                    if not username:
+                        self._json(401, {"code": 401, "message": "请先登录"})
+                        return
+                    with mock.lock:
+                        already = username in mock.signed
+                        mock.signed.add(username)
+                    if already:
+                        self._json(200, {"code": 1, "message": "今日已签到"})
+                    else:
+                        self._json(200, {"code": 0, "message": "签到成功",
+                                         "data": {"points": 300}})
+                else:
+                    self._json(404, {"code": 404, "message": "Not Found"})
+
+        return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 0, **options) -> tuple:
+    """
+    在后台线程启动模拟服务
+    :param port: 端口，0表示随机空闲端口
+    :param options: MockRainyun 的参数
+    :return: (server, mock, base_url)
+    """
+    mock = MockRainyun(**options)
+    server = ThreadingHTTPServer((host, port), mock.make_handler())
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="mock-rainyun", daemon=True)
+    thread.start()
+    return server, mock, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="本地模拟雨云服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0, help="每个请求的额外延迟（毫秒）")
+    parser.add_argument("--fail-rate", type=float, default=0, help="随机返回 503 的概率")
+    parser.add_argument("--captcha", action="store_true", help="登录需要验证码")
+    parser.add_argument("--password", default=None, help="只接受该密码")
+    args = parser.parse_args()
+
+    server, mock, base_url = serve(args.host, args.port, latency=args.latency / 1000,
+                                   fail_rate=args.fail_rate, captcha=args.captcha,
+                                   password=args.password)
+    print(f"🌧️ 模拟雨云服务已启动: {base_url}")
+    print(f"   export RAINYUN_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"📊 请求统计: {dict(mock.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码识别模型提供者
+进程内共享一个 ddddocr 模型，首次识别时才加载，可选在后台预热；
+设置 RAINYUN_OCR_SERVICE 时改用本机 OCR 服务（见 ocr_service.py），服务不可用时退回进程内模型
+"""
+
+import os
+import time
+import socket
+import struct
+import threading
+
+
+def load_model(threads: int = None):
+    """
+    加载 ddddocr 模型
+    :param threads: onnxruntime 算子内线程数，默认读取 RAINYUN_OCR_THREADS，0 表示使用 onnxruntime 默认值
+    :return: ddddocr.DdddOcr
+    """
+    import ddddocr
+
+    if threads is None:
+        threads = int(os.environ.get("RAINYUN_OCR_THREADS", "0"))
+    if not threads:
+        return ddddocr.DdddOcr(show_ad=False)
+
+    # ddddocr 不暴露 SessionOptions，创建模型期间临时替换 InferenceSession 以设置线程数
+    import onnxruntime
+    original = onnxruntime.InferenceSession
+
+    def session_with_threads(path_or_bytes, sess_options=None, *args, **kwargs):
+        options = sess_options or onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        return original(path_or_bytes, options, *args, **kwargs)
+
+    onnxruntime.InferenceSession = session_with_threads
+    try:
+        return ddddocr.DdddOcr(show_ad=False)
+    finally:
+        onnxruntime.InferenceSession = original
+
+
+def send_frame(sock, payload: bytes):
+    """发送一帧：4字节大端长度 + 内容"""
+    sock.sendall(struct.pack(">I", len(payload)) + payload)
+
+
+def recv_frame(sock) -> bytes:
+    """
+    接收一帧
+    :return: 内容，连接关闭时返回 None
+    """
+    header = _recv_exact(sock, 4)
+    if header is None:
+        return None
+    return _recv_exact(sock, struct.unpack(">I", header)[0])
+
+
+def _recv_exact(sock, size: int) -> bytes:
+    """读取指定字节数，连接提前关闭时返回 None"""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class LazyOcr:
+    """延迟加载的共享OCR模型，接口与 ddddocr.DdddOcr 的 classification 一致"""
+
+    def __init__(self):
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._prewarm_thread = None
+
+    @property
+    def loaded(self) -> bool:
+        """模型是否已加载"""
+        return self._model is not None
+
+    def _get_model(self):
+        """获取模型，未加载时加载（线程安全）"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = load_model()
+        return self._model
+
+    def classification(self, img_bytes: bytes) -> str:
+        """
+        识别验证码
+        :param img_bytes: 图片数据
+        :return: 识别结果
+        """
+        model = self._get_model()
+        with self._run_lock:
+            return model.classification(img_bytes)
+
+    def prewarm(self):
+        """在后台线程加载模型（重复调用无副作用）"""
+        if self._model is not None or self._prewarm_thread is not None:
+            return
+        self._prewarm_thread = threading.Thread(
+            target=self._get_model, name="ocr-prewarm", daemon=True
+        )
+        self._prewarm_thread.start()
+
+
+class OcrClient:
+    """本机OCR服务的客户端，接口与 LazyOcr 一致，服务不可用时使用进程内模型"""
+
+    # 服务不可用后多久再尝试连接（秒）
+    RETRY_INTERVAL = 30
+
+    def __init__(self, path: str, fallback: LazyOcr = None):
+        """
+        初始化
+        :param path: 服务的 Unix socket 路径
+        :param fallback: 服务不可用时使用的进程内模型
+        """
+        self.path = path
+        self.fallback = fallback or LazyOcr()
+        # 每个线程一条连接，服务端按到达顺序依次识别
+        self._local = threading.local()
+        self._down_until = 0.0
+        # 至少完成过一次识别往返才算服务可用
+        self._reached = False
+
+    @property
+    def loaded(self) -> bool:
+        """服务已成功识别过且当前未标记为不可用，或进程内模型已加载"""
+        return (self._reached and time.monotonic() >= self._down_until) or self.fallback.loaded
+
+    def _connect(self):
+        """获取当前线程的连接，服务不可用时返回 None"""
+        sock = getattr(self._local, "sock", None)
+        if sock is not None or time.monotonic() < self._down_until:
+            return sock
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        except (OSError, AttributeError) as e:
+            self._mark_down(f"无法连接OCR服务: {e}")
+            return None
+        try:
+            sock.connect(self.path)
+            sock.settimeout(30)
+        except OSError as e:
+            sock.close()
+            self._mark_down(f"无法连接OCR服务: {e}")
+            return None
+        self._local.sock = sock
+        return sock
+
+    def _mark_down(self, reason: str):
+        """标记服务不可用，一段时间内直接使用进程内模型"""
+        if time.monotonic() >= self._down_until:
+            print(f"⚠️ {reason}，改用进程内模型")
+        self._down_until = time.monotonic() + self.RETRY_INTERVAL
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def classification(self, img_bytes: bytes) -> str:
+        """
+        识别验证码
+        :param img_bytes: 图片数据
+        :return: 识别结果
+        """
+        sock = self._connect()
+        if sock is not None:
+            try:
+                send_frame(sock, img_bytes)
+                response = recv_frame(sock)
+                if response is None:
+                    raise ConnectionError("连接已关闭")
+            except OSError as e:
+                self._mark_down(f"OCR服务出错: {e}")
+            else:
+                self._reached = True
+                text = response[1:].decode("utf-8")
+                if response[:1] == b"0":
+                    return text
+                raise RuntimeError(f"OCR服务识别失败: {text}")
+        return self.fallback.classification(img_bytes)
+
+    def prewarm(self):
+        """服务不可用时预热进程内模型"""
+        if self._connect() is None:
+            self.fallback.prewarm()
+
+
+_shared_ocr = None
+_shared_ocr_lock = threading.Lock()
+
+
+def get_ocr():
+    """获取进程内共享的OCR模型（设置了 RAINYUN_OCR_SERVICE 时为服务客户端）"""
+    global _shared_ocr
+    with _shared_ocr_lock:
+        if _shared_ocr is None:
+            path = os.environ.get("RAINYUN_OCR_SERVICE")
+            _shared_ocr = OcrClient(path) if path else LazyOcr()
+        return _shared_ocr
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本机OCR推理服务
+并行的签到进程不再各自加载 ddddocr 模型：服务进程只持有一个模型，通过 Unix socket 接收验证码，
+由一个推理线程按到达顺序逐张识别，并限制 onnxruntime 线程数，避免多个模型争抢内存和CPU
+
+客户端见 ocr_provider.OcrClient，设置 RAINYUN_OCR_SERVICE 为 socket 路径即可使用
+"""
+
+import os
+import sys
+import time
+import queue
+import signal
+import argparse
+import threading
+import socketserver
+from ocr_provider import load_model, send_frame, recv_frame
+from state import state_path
+
+
+class OcrService:
+    """单模型的OCR推理服务"""
+
+    def __init__(self, threads: int = None):
+        """
+        初始化
+        :param threads: onnxruntime 算子内线程数，默认读取 RAINYUN_OCR_THREADS
+        """
+        self.threads = threads
+        self.model = None
+        self._queue = queue.Queue()
+        self.images = 0
+        self.busy_seconds = 0.0
+        self.max_backlog = 0
+        self._worker = threading.Thread(target=self._infer_loop, name="ocr-infer", daemon=True)
+
+    def start(self):
+        """加载模型并启动推理线程"""
+        start = time.monotonic()
+        self.model = load_model(self.threads)
+        print(f"🧠 OCR模型已加载（{time.monotonic() - start:.1f}s）")
+        self._worker.start()
+
+    def submit(self, img_bytes: bytes) -> tuple:
+        """
+        提交一张验证码并等待结果
+        :param img_bytes: 图片数据
+        :return: (是否成功, 识别结果或错误信息)
+        """
+        item = {"image": img_bytes, "done": threading.Event()}
+        self._queue.put(item)
+        item["done"].wait()
+        return item["ok"], item["text"]
+
+    def _infer_loop(self):
+        """推理线程：同一个模型按到达顺序逐张识别（ddddocr 不支持批量推理，到达即识别不额外等待）"""
+        while True:
+            item = self._queue.get()
+            self.max_backlog = max(self.max_backlog, self._queue.qsize() + 1)
+            start = time.monotonic()
+            try:
+                item["text"] = self.model.classification(item["image"])
+                item["ok"] = True
+            except Exception as e:
+                item["text"] = str(e)
+                item["ok"] = False
+            self.busy_seconds += time.monotonic() - start
+            self.images += 1
+            item["done"].set()
+
+    def summary(self) -> str:
+        """统计汇总"""
+        return (f"识别 {self.images} 张，推理耗时 {self.busy_seconds:.1f}s，"
+                f"最多排队 {self.max_backlog} 张")
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """一个客户端连接：循环读取图片帧并返回结果帧"""
+
+    def handle(self):
+        while True:
+            try:
+                image = recv_frame(self.request)
+            except OSError:
+                return
+            if image is None:
+                return
+            ok, text = self.server.service.submit(image)
+            try:
+                send_frame(self.request, (b"0" if ok else b"1") + text.encode("utf-8"))
+            except OSError:
+                return
+
+
+def serve(path: str, service: OcrService):
+    """
+    在 Unix socket 上提供服务，直到收到 SIGTERM / SIGINT
+    :param path: socket 路径
+    :param service: OCR服务
+    """
+    # 上次异常退出留下的 socket 文件
+    if os.path.exists(path):
+        os.unlink(path)
+    service.start()
+    server = socketserver.ThreadingUnixStreamServer(path, _Handler, bind_and_activate=False)
+    server.daemon_threads = True
+    # 多个进程同时启动时连接会集中到达
+    server.request_queue_size = 64
+    server.service = service
+    server.server_bind()
+    server.server_activate()
+    os.chmod(path, 0o600)
+
+    def stop(*_):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"🧠 OCR服务已启动: {path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        print(f"👋 OCR服务退出: {service.summary()}")
+
+
+def main(argv: list = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="雨云自动签到工具 - 本机OCR服务")
+    parser.add_argument("--socket", default=os.environ.get("RAINYUN_OCR_SERVICE") or
+                        state_path("ocr.sock"), help="Unix socket 路径")
+    parser.add_argument("--threads", type=int,
+                        default=int(os.environ.get("RAINYUN_OCR_THREADS", "0")),
+                        help="onnxruntime 算子内线程数，0 表示使用默认值")
+    args = parser.parse_args(argv)
+
+    if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        print("❌ 当前系统不支持 Unix socket")
+        sys.exit(1)
+    serve(args.socket, OcrService(args.threads))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面状态探针
+一次脚本调用在页面内收集登录/签到状态（是否登录、签到按钮、是否已签到、提示文字、获得积分），
+需要等待时在页面内用 MutationObserver 监听变化，条件满足立即返回，代替固定 sleep 和逐个元素查询
+"""
+
+import time
+
+
+# 收集页面状态；conditions 中任一字段为真或超时后回调
+_PROBE_SCRIPT = """
+const conditions = arguments[0], timeout = arguments[1];
+const done = arguments[arguments.length - 1];
+
+const visible = el => el.getClientRects().length > 0;
+const textOf = el => (el.innerText || el.textContent || '').trim();
+const first = (selector, accept) => {
+    for (const el of document.querySelectorAll(selector)) {
+        if (visible(el) && accept(el)) return el;
+    }
+    return null;
+};
+
+function collect() {
+    const body = document.body ? document.body.innerText : '';
+    const path = location.pathname + location.hash;
+    const loginPage = /signin|login/i.test(path) || !!first('input[type=password]', () => true);
+    const userIndicator = first(
+        'a[href*="logout"], [class*="username"], [class*="avatar"], [class*="user-info"]',
+        () => true);
+
+    // 按 按钮 > 链接 > sign 类名 > 普通文本 的优先级查找签到入口
+    let button = null;
+    for (const selector of ['button', 'a, [role=button]', '[class*="sign"]', 'span, div']) {
+        button = first(selector, el => {
+            const text = textOf(el);
+            return text.length <= 12 && text.includes('签到') && !text.includes('已签');
+        });
+        if (button) break;
+    }
+    const enabled = !!button && !button.disabled &&
+        !button.classList.contains('disabled') && !button.classList.contains('is-disabled');
+
+    const toastEl = first(
+        '[role=alert], .el-message, .el-notification, [class*="toast"], #toast, [class*="message"]',
+        el => textOf(el).length > 0);
+    const toast = toastEl ? textOf(toastEl) : '';
+    const errorEl = loginPage ? first(
+        '.el-form-item__error, .el-message--error, [class*="error"], #msg',
+        el => textOf(el).length > 0) : null;
+    const points = /获得\\s*(\\d+)\\s*积分/.exec(toast) || /获得\\s*(\\d+)\\s*积分/.exec(body);
+
+    return {
+        url: location.href,
+        login_page: loginPage,
+        logged_in: !loginPage && !!userIndicator,
+        login_error: errorEl ? textOf(errorEl) : '',
+        signin_button: button,
+        signin_enabled: enabled,
+        signed: /已签到|今日已签/.test(body),
+        signin_success: /签到成功/.test(toast) || /签到成功/.test(body),
+        toast: toast,
+        points: points ? parseInt(points[1], 10) : null
+    };
+}
+
+const matched = state => conditions.some(name => state[name]);
+const state = collect();
+if (timeout <= 0 || !conditions.length || matched(state)) {
+    done(state);
+    return;
+}
+
+let finished = false, scheduled = false, timer = null;
+const observer = new MutationObserver(() => {
+    // 合并同一批变化，避免每个节点变化都重新收集
+    if (scheduled || finished) return;
+    scheduled = true;
+    setTimeout(() => {
+        scheduled = false;
+        const current = collect();
+        if (matched(current)) finish(current);
+    }, 50);
+});
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(result || collect());
+}
+observer.observe(document.documentElement,
+                 {subtree: true, childList: true, characterData: true, attributes: true});
+timer = setTimeout(() => finish(null), timeout);
+"""
+
+
+class PageProbe:
+    """页面状态探针"""
+
+    def __init__(self, driver):
+        """
+        初始化
+        :param driver: WebDriver
+        """
+        self.driver = driver
+        self._script_timeout = 0
+        # 每次探测的记录: (等待条件, 耗时秒, 是否满足)
+        self.timings = []
+
+    def state(self) -> dict:
+        """立即收集一次页面状态"""
+        return self.wait_for([], timeout=0)
+
+    def wait_for(self, conditions: list, timeout: float = 5) -> dict:
+        """
+        等待任一条件成立
+        :param conditions: 状态字段名列表，如 ["signed", "signin_success"]
+        :param timeout: 最长等待秒数，0表示只查一次
+        :return: 页面状态（超时时为最后一次的状态）
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        state = {}
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            try:
+                # 脚本超时要比页面内等待时间长，否则驱动会先报错
+                if self._script_timeout < remaining + 5:
+                    self._script_timeout = remaining + 5
+                    self.driver.set_script_timeout(self._script_timeout)
+                state = self.driver.execute_async_script(
+                    _PROBE_SCRIPT, conditions, int(remaining * 1000)) or {}
+                break
+            except Exception:
+                # 页面跳转时脚本所在文档被卸载，稍后在新页面重试
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.2)
+
+        matched = any(state.get(name) for name in conditions)
+        self.timings.append(("|".join(conditions) or "state", time.monotonic() - start, matched))
+        return state
+
+    def summary(self) -> str:
+        """探测耗时汇总"""
+        total = sum(t[1] for t in self.timings)
+        return f"{len(self.timings)} 次探测, 共 {total * 1000:.0f} ms"
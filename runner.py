@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发执行器
+限制并发数，并按主机做带抖动的限速，失败账号按退避间隔重试，结果按完成顺序返回
+"""
+
+import time
+import heapq
+import random
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class HostRateLimiter:
+    """按主机限速：同一主机相邻两次请求至少间隔 interval + 随机抖动"""
+
+    def __init__(self, interval: float = 2.0, jitter: float = 1.0):
+        """
+        初始化
+        :param interval: 同一主机的最小间隔（秒）
+        :param jitter: 额外随机间隔上限（秒）
+        """
+        self.interval = interval
+        self.jitter = jitter
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str) -> float:
+        """
+        预约主机的下一个时间槽并等待到达
+        :param host: 主机名
+        :return: 实际等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval + random.uniform(0, self.jitter)
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            return delay
+        return 0.0
+
+
+def run_accounts(accounts, worker, concurrency: int = 1, retry=None, controller=None):
+    """
+    并发处理账号，最多预取 2 倍并发数的账号，账号可以是惰性生成器
+    :param accounts: 账号可迭代对象
+    :param worker: 处理函数 worker(index, account) -> dict
+    :param concurrency: 最大并发数
+    :param retry: 重试策略（failures.RetryPolicy），为空时不重试
+    :param controller: 自适应并发控制器（adaptive.AdaptiveConcurrency），
+                       设置后同时处理的账号数跟随 controller.limit，concurrency 被忽略
+    :return: 生成器，按完成顺序产出每个账号的最终结果（含尝试次数 attempts）
+    """
+    concurrency = controller.maximum if controller else max(1, concurrency)
+    iterator = enumerate(accounts, 1)
+    pending = {}
+    # 等待重试的账号: (可重试时间, 序号, 账号编号, 账号, 第几次尝试, 熔断推迟次数)
+    retries = []
+    sequence = itertools.count()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit_next() -> bool:
+            """提交到期的重试或下一个账号，都没有时返回 False"""
+            if retries and retries[0][0] <= time.monotonic():
+                _, _, i, account, attempt, deferrals = heapq.heappop(retries)
+            else:
+                try:
+                    i, account = next(iterator)
+                except StopIteration:
+                    return False
+                attempt, deferrals = 1, 0
+            if controller:
+                controller.started()
+            pending[executor.submit(worker, i, account)] = (i, account, attempt, deferrals,
+                                                             time.monotonic())
+            return True
+
+        def fill():
+            """补满预取窗口（自适应时不预取，同时处理的账号数即当前并发）"""
+            window = controller.limit if controller else concurrency * 2
+            while len(pending) < window and submit_next():
+                pass
+
+        fill()
+        while pending or retries:
+            if not pending:
+                # 只剩等待中的重试
+                time.sleep(max(0.0, retries[0][0] - time.monotonic()))
+                fill()
+                continue
+
+            timeout = max(0.0, retries[0][0] - time.monotonic()) if retries else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, account, attempt, deferrals, started = pending.pop(future)
+                if controller:
+                    controller.finished(time.monotonic() - started)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {
+                        "username": account.get("username", ""),
+                        "success": False,
+                        "error": str(e)
+                    }
+                if retry and retry.should_defer(result, deferrals):
+                    # 熔断期间没有真正尝试，熔断恢复后再试，不消耗重试次数
+                    delay = result.get("retry_after", 0)
+                    heapq.heappush(retries, (time.monotonic() + delay, next(sequence),
+                                             i, account, attempt, deferrals + 1))
+                    continue
+                if retry and retry.should_retry(result, attempt):
+                    delay = retry.delay(attempt, result)
+                    print(f"🔁 账号 {i}: {account.get('username', '')[:3]}*** 失败"
+                          f"（{result.get('reason', 'unknown')}），{delay:.0f} 秒后重试")
+                    heapq.heappush(retries, (time.monotonic() + delay, next(sequence),
+                                             i, account, attempt + 1, deferrals))
+                    continue
+                result["attempts"] = attempt
+                yield result
+            fill()
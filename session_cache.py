@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话缓存
+按用户名加密保存浏览器 cookies，下次运行直接注入以跳过登录
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+from state import state_path, atomic_write
+
+
+class SessionStore:
+    """加密的会话存储，每个账号一个文件"""
+
+    # 默认会话最长保留时间（秒）
+    DEFAULT_TTL = 7 * 24 * 3600
+    # 密钥派生迭代次数
+    KDF_ITERATIONS = 200_000
+    # 剩余有效期短于此值的 cookie（验证码、统计等临时 cookie）不参与会话过期计算（秒）
+    MIN_COOKIE_TTL = 3600
+
+    def __init__(self, directory: str = None, ttl: int = None):
+        """
+        初始化
+        :param directory: 存储目录，默认在状态目录下的 sessions
+        :param ttl: 会话最长保留时间（秒）
+        """
+        self.directory = directory or state_path("sessions")
+        self.ttl = ttl or int(os.environ.get("RAINYUN_SESSION_TTL", self.DEFAULT_TTL))
+        self.secret = os.environ.get("RAINYUN_SESSION_SECRET", "")
+
+    def _path(self, username: str) -> str:
+        """账号对应的文件路径（文件名不暴露用户名）"""
+        digest = hashlib.sha256(username.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _fernet(self, username: str, password: str, salt: bytes):
+        """由账号密码派生加密密钥"""
+        # cryptography 加载较慢，只在真正读写会话时导入
+        from cryptography.fernet import Fernet
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=self.KDF_ITERATIONS,
+        )
+        material = f"{username}\0{password}\0{self.secret}".encode("utf-8")
+        return Fernet(base64.urlsafe_b64encode(kdf.derive(material)))
+
+    def load(self, username: str, password: str) -> list:
+        """
+        读取会话
+        :param username: 用户名
+        :param password: 密码（用于解密）
+        :return: cookies 列表，不存在、已过期或无法解密时返回 None
+        """
+        path = self._path(username)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if record.get("expires_at", 0) <= time.time():
+            self.invalidate(username)
+            return None
+
+        from cryptography.fernet import InvalidToken
+
+        try:
+            salt = base64.b64decode(record["salt"])
+            token = record["token"].encode("ascii")
+            payload = self._fernet(username, password, salt).decrypt(token)
+            return json.loads(payload)
+        except (KeyError, ValueError, InvalidToken):
+            # 密码变更或文件损坏，视为无效
+            self.invalidate(username)
+            return None
+
+    def save(self, username: str, password: str, cookies: list):
+        """
+        保存会话
+        :param username: 用户名
+        :param password: 密码（用于加密）
+        :param cookies: driver.get_cookies() 的结果
+        """
+        if not cookies:
+            return
+
+        now = time.time()
+        expires_at = self._expires_at(cookies, now)
+
+        salt = os.urandom(16)
+        token = self._fernet(username, password, salt).encrypt(
+            json.dumps(cookies).encode("utf-8")
+        )
+        record = {
+            "salt": base64.b64encode(salt).decode("ascii"),
+            "token": token.decode("ascii"),
+            "saved_at": int(now),
+            "expires_at": int(expires_at),
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(self._path(username), json.dumps(record).encode("utf-8"))
+
+    def _expires_at(self, cookies: list, now: float) -> float:
+        """
+        会话过期时间：取登录态 cookie 中最早的过期时间，不超过 TTL
+        :param cookies: driver.get_cookies() 的结果
+        :param now: 当前时间
+        :return: 过期时间戳
+        """
+        expires_at = now + self.ttl
+        for cookie in cookies:
+            expiry = cookie.get("expiry")
+            # 会话 cookie 没有 expiry；临时 cookie 过期不代表登录态失效
+            if expiry is None or expiry - now < self.MIN_COOKIE_TTL:
+                continue
+            expires_at = min(expires_at, expiry)
+        return expires_at
+
+    def invalidate(self, username: str):
+        """删除账号的会话"""
+        try:
+            os.remove(self._path(username))
+        except OSError:
+            pass
+
+
+def to_cdp_cookie(cookie: dict) -> dict:
+    """
+    将 Selenium cookie 转换为 CDP Network.setCookies 的格式
+    :param cookie: driver.get_cookies() 中的一项
+    :return: CDP CookieParam
+    """
+    cdp_cookie = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain", ""),
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if "expiry" in cookie:
+        cdp_cookie["expires"] = cookie["expiry"]
+    if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+        cdp_cookie["sameSite"] = cookie["sameSite"]
+    return cdp_cookie
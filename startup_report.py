@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时报告
+用 python -X importtime 冷启动导入入口模块，列出最慢的导入，
+并检查导入耗时预算和重依赖是否被提前加载，超出时以非零状态退出（可用于CI）
+
+用法: python startup_report.py [--modules main,main_multi] [--budget-ms 150] [--top 15]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+
+# 只应在真正需要时才导入的重依赖
+HEAVY_MODULES = ("selenium", "webdriver_manager", "requests", "PIL", "ddddocr",
+                 "onnxruntime", "cryptography", "numpy", "cv2")
+
+
+def measure(module: str) -> list:
+    """
+    在新进程中冷导入模块
+    :param module: 模块名
+    :return: [(模块名, 自身耗时us, 累计耗时us, 缩进层级)]，按导入顺序
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    records = []
+    for line in proc.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            own, cumulative, name = line[len("import time:"):].split("|")
+            indent = len(name) - len(name.lstrip())
+            records.append((name.strip(), int(own), int(cumulative), indent))
+        except ValueError:
+            continue
+    return records
+
+
+def report(module: str, budget_ms: float, top: int) -> bool:
+    """
+    打印单个模块的导入报告
+    :param module: 模块名
+    :param budget_ms: 累计导入耗时预算（毫秒），0 表示不检查
+    :param top: 列出最慢的导入数量
+    :return: 是否通过检查
+    """
+    records = measure(module)
+    total = next((r[2] for r in records if r[0] == module), 0) / 1000
+    heavy = sorted({r[0] for r in records if r[0].split(".")[0] in HEAVY_MODULES})
+
+    print(f"📦 import {module}: {total:.1f}ms，共 {len(records)} 个模块")
+    for name, own, cumulative, _ in sorted(records, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"   {own / 1000:>8.1f}ms  (累计 {cumulative / 1000:>8.1f}ms)  {name}")
+
+    passed = True
+    if heavy:
+        print(f"❌ 启动时加载了重依赖: {', '.join(heavy)}")
+        passed = False
+    if budget_ms and total > budget_ms:
+        print(f"❌ 导入耗时 {total:.1f}ms 超出预算 {budget_ms:.0f}ms")
+        passed = False
+    return passed
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="雨云签到启动耗时报告")
+    parser.add_argument("--modules", default="main,main_multi", help="入口模块，逗号分隔")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get("RAINYUN_IMPORT_BUDGET_MS", "150")),
+                        help="单个入口模块的导入耗时预算（毫秒），0 表示不检查")
+    parser.add_argument("--top", type=int, default=15, help="列出最慢的导入数量")
+    args = parser.parse_args()
+
+    passed = True
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        try:
+            passed = report(module, args.budget_ms, args.top) and passed
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            passed = False
+
+    print("✅ 启动检查通过" if passed else "❌ 启动检查未通过")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
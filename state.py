@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地状态目录
+需要跨运行保存的数据（会话缓存等）统一放在这里，便于 GitHub Actions 缓存
+"""
+
+import os
+
+# 状态目录，可通过环境变量覆盖
+STATE_DIR = os.environ.get("RAINYUN_STATE_DIR", ".rainyun")
+
+
+def state_path(*parts: str) -> str:
+    """
+    获取状态目录下的路径，并确保父目录存在
+    :param parts: 相对路径片段
+    :return: 完整路径
+    """
+    path = os.path.join(STATE_DIR, *parts)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return path
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    原子写入文件，避免中途中断留下半个文件
+    :param path: 目标路径
+    :param data: 文件内容
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
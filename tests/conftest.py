@@ -0,0 +1,18 @@
+import os
+import sys
+import shutil
+import tempfile
+
+# 测试直接导入仓库根目录下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# state.STATE_DIR 在导入时读取，必须在测试模块导入 main / tracing 等之前设置，
+# 避免测试把状态、阶段耗时记录和失败现场写进仓库目录
+_STATE_DIR = tempfile.mkdtemp(prefix="rainyun-test-")
+os.environ["RAINYUN_STATE_DIR"] = _STATE_DIR
+os.environ["RAINYUN_TRACE_DIR"] = os.path.join(_STATE_DIR, "traces")
+os.environ["RAINYUN_DIAGNOSTICS_DIR"] = os.path.join(_STATE_DIR, "diagnostics")
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_STATE_DIR, ignore_errors=True)
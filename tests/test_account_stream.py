@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import main_multi
+from account_stream import ResultLog, account_key, read_results
+
+
+def test_resume_skips_only_successful_accounts(tmp_path):
+    path = tmp_path / "results.jsonl"
+    lines = [
+        {"username": "ok", "success": True},
+        {"username": "failed", "success": False, "reason": "timeout"},
+        {"username": "retried", "success": False},
+        {"username": "retried", "success": True},
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in lines) + '{"username": "half',
+                    encoding="utf-8")
+    done = ResultLog(str(path)).completed()
+    assert done == {account_key("ok"), account_key("retried")}
+
+
+def test_missing_accounts_file_exits_with_message(tmp_path, capsys):
+    missing = str(tmp_path / "nope.txt")
+    with pytest.raises(SystemExit) as exc:
+        main_multi.main(["--accounts-file", missing])
+    assert exc.value.code == 1
+    assert f"账号文件不存在: {missing}" in capsys.readouterr().out
+
+
+def test_result_log_stores_hashed_accounts(tmp_path):
+    path = tmp_path / "results.jsonl"
+    log = ResultLog(str(path))
+    log.append({"username": "alice@example.com", "success": False, "reason": "timeout"})
+    log.append({"username": "alice@example.com", "success": True, "engine": "http"})
+    log.close()
+
+    content = path.read_text(encoding="utf-8")
+    assert "alice" not in content
+    assert log.completed() == {account_key("alice@example.com")}
+
+
+def test_merge_keeps_one_compact_record_per_account(tmp_path):
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    for path, results in ((first, [{"username": "a", "success": False, "reason": "timeout"},
+                                   {"username": "b", "success": False, "reason": "captcha"}]),
+                          (second, [{"username": "a", "success": True, "engine": "selenium",
+                                     "cache": {"responses": 10, "cached": 4}}])):
+        log = ResultLog(str(path))
+        for result in results:
+            log.append(result)
+        log.close()
+
+    merged = {r["account"]: r for r in read_results([str(first), str(second)])}
+    assert merged == {
+        account_key("a"): {"account": account_key("a"), "success": True, "reason": None,
+                           "engine": "selenium"},
+        account_key("b"): {"account": account_key("b"), "success": False, "reason": "captcha",
+                           "engine": None},
+    }
@@ -0,0 +1,72 @@
+import os
+
+from adaptive import AdaptiveConcurrency
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    browser_pid = os.getpid()
+
+    def __init__(self):
+        self.closed = False
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def close_other_windows(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.closed = True
+
+
+def make_pool(size):
+    return DriverPool(factory=FakeDriver, size=size, max_rss_mb=0)
+
+
+def test_resize_closes_surplus_idle_drivers():
+    pool = make_pool(3)
+    drivers = [pool.acquire() for _ in range(3)]
+    for driver in drivers:
+        pool.release(driver)
+
+    pool.resize(1)
+    assert sum(d.closed for d in drivers) == 2
+    assert pool.stats["recycled"] == 2
+    assert pool.idle_rss() > 0
+
+
+def test_release_after_shrink_discards_busy_driver():
+    pool = make_pool(2)
+    first, second = pool.acquire(), pool.acquire()
+    pool.resize(1)
+    pool.release(first)
+    assert first.closed
+    pool.release(second)
+    assert not second.closed
+    assert pool.acquire() is second
+
+
+def test_controller_resizes_bound_pool_and_bounds_decisions():
+    pool = make_pool(4)
+    controller = AdaptiveConcurrency(minimum=1, maximum=4, reserve_mb=0)
+    try:
+        controller.bind_pool(pool)
+        assert pool.size == controller.limit
+
+        with controller._lock:
+            controller._set(1, "test")
+        controller._apply_resize()
+        assert pool.size == 1
+
+        for i in range(300):
+            with controller._lock:
+                controller._set(2 if i % 2 else 3, "test")
+        assert len(controller.decisions) == controller.decisions.maxlen
+        assert controller.adjustments > controller.decisions.maxlen
+        assert controller.summary()
+    finally:
+        controller.close()
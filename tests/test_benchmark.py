@@ -0,0 +1,23 @@
+import argparse
+
+import pytest
+
+import benchmark
+
+
+def test_run_scenario_end_to_end(tmp_path):
+    # 子进程里的 HTTP 引擎需要 requests
+    pytest.importorskip("requests")
+    args = argparse.Namespace(engine="http", concurrency=1, rate_interval=0, latency=0,
+                              fail_rate=0, captcha=False, verbose=False)
+    result = benchmark.run_scenario(1, args, str(tmp_path))
+    assert result["accounts"] == 1
+    assert result["exit_code"] == 0
+    assert result["success"] == 1
+    assert result["requests"] > 0
+
+
+def test_percentile():
+    assert benchmark.percentile([], 0.5) == 0.0
+    assert benchmark.percentile([3, 1, 2], 0.5) == 2
+    assert benchmark.percentile([3, 1, 2], 0.95) == 3
@@ -0,0 +1,46 @@
+import pytest
+
+import driver_resolver
+from driver_resolver import DriverResolver, resolve_chromedriver
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv("RAINYUN_DRIVER_DIR", str(tmp_path))
+    monkeypatch.delenv("RAINYUN_DRIVER_OFFLINE", raising=False)
+    monkeypatch.delenv("RAINYUN_DRIVER_REFRESH", raising=False)
+    monkeypatch.setattr(driver_resolver, "_resolved_path", None)
+    monkeypatch.setattr(driver_resolver, "detect_chrome_version", lambda: "120.0.6099.109")
+    downloads = []
+
+    def fake_refresh(self, major):
+        downloads.append(major)
+        return "/tmp/chromedriver"
+
+    monkeypatch.setattr(DriverResolver, "refresh", fake_refresh)
+    return downloads
+
+
+def test_cache_miss_falls_back_without_download(isolated):
+    assert resolve_chromedriver() == ""
+    assert isolated == []
+
+
+def test_cache_miss_offline_fails_fast(monkeypatch, isolated):
+    monkeypatch.setenv("RAINYUN_DRIVER_OFFLINE", "1")
+    with pytest.raises(RuntimeError, match="driver_resolver.py --refresh"):
+        resolve_chromedriver()
+    assert isolated == []
+
+
+def test_explicit_refresh_downloads(monkeypatch, isolated):
+    monkeypatch.setenv("RAINYUN_DRIVER_REFRESH", "1")
+    assert resolve_chromedriver() == "/tmp/chromedriver"
+    assert isolated == ["120"]
+
+
+def test_env_refresh_downloads_once_per_process(monkeypatch, isolated):
+    monkeypatch.setenv("RAINYUN_DRIVER_REFRESH", "1")
+    for _ in range(5):
+        assert resolve_chromedriver() == "/tmp/chromedriver"
+    assert isolated == ["120"]
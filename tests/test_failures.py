@@ -0,0 +1,107 @@
+import time
+
+from failures import (CircuitBreaker, RetryPolicy, CIRCUIT_OPEN, SITE_DOWN, TIMEOUT,
+                      CREDENTIALS)
+from runner import run_accounts
+
+
+def make_breaker(**kwargs):
+    options = dict(threshold=0.5, window=4, min_samples=2, cooldown=0.05)
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+def test_breaker_trips_on_site_errors():
+    breaker = make_breaker()
+    breaker.record(SITE_DOWN)
+    breaker.record(TIMEOUT)
+    assert breaker.is_open
+    assert breaker.trips == 1
+    assert breaker.last_trip is not None
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_breaker_ignores_non_site_errors():
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record(CREDENTIALS)
+    assert not breaker.is_open
+
+
+def test_failed_probe_trips_again():
+    breaker = make_breaker()
+    breaker.record(SITE_DOWN)
+    breaker.record(SITE_DOWN)
+    first_trip = breaker.last_trip
+    time.sleep(0.06)
+
+    # 冷却结束后只放行一个试探
+    probe = breaker.allow()
+    assert probe
+    assert not breaker.allow()
+    breaker.record(SITE_DOWN, probe)
+
+    assert breaker.is_open
+    assert breaker.trips == 2
+    assert breaker.last_trip >= first_trip
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes():
+    breaker = make_breaker()
+    breaker.record(SITE_DOWN)
+    breaker.record(SITE_DOWN)
+    time.sleep(0.06)
+    probe = breaker.allow()
+    assert probe
+    breaker.record(None, probe)
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_stale_result_does_not_resolve_probe():
+    breaker = make_breaker()
+    # 断开前已开始的签到
+    stale = breaker.allow()
+    breaker.record(SITE_DOWN)
+    breaker.record(SITE_DOWN)
+    time.sleep(0.06)
+    probe = breaker.allow()
+
+    breaker.record(None, stale)
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    breaker.record(SITE_DOWN, probe)
+    assert breaker.trips == 2
+
+
+def test_circuit_open_does_not_use_retry_attempts():
+    retry = RetryPolicy(max_retries=1, base=0, cap=0, max_deferrals=5)
+    calls = []
+
+    def worker(i, account):
+        calls.append(i)
+        if len(calls) <= 3:
+            return {"username": "user", "success": False, "reason": CIRCUIT_OPEN,
+                    "retry_after": 0.01}
+        return {"username": "user", "success": True}
+
+    results = list(run_accounts([{"username": "user"}], worker, retry=retry))
+    assert len(calls) == 4
+    assert results[0]["success"]
+    assert results[0]["attempts"] == 1
+
+
+def test_circuit_open_gives_up_after_max_deferrals():
+    retry = RetryPolicy(max_retries=3, base=0, cap=0, max_deferrals=2)
+
+    def worker(i, account):
+        return {"username": "user", "success": False, "reason": CIRCUIT_OPEN,
+                "retry_after": 0.01}
+
+    results = list(run_accounts([{"username": "user"}], worker, retry=retry))
+    assert results[0]["reason"] == CIRCUIT_OPEN
+    assert results[0]["attempts"] == 1
+    assert not retry.should_retry(results[0], 1)
@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from endpoint_cache import EndpointCache
+from http_signin import RainyunHttpSignin
+
+
+def make_api(tmp_path, responses):
+    api = RainyunHttpSignin("user", "password", use_session_cache=False)
+    api.endpoints = EndpointCache(str(tmp_path / "endpoints.json"))
+    calls = []
+
+    def post_json(url, payload=None):
+        # 每个接口按顺序返回预设的响应，用完后视为请求失败
+        calls.append(url)
+        queued = responses.get(url)
+        return (queued.pop(0), None) if queued else (None, ("site_down", 502))
+
+    api._post_json = post_json
+    return api, calls
+
+
+def test_already_signed_with_warm_endpoint_cache(tmp_path):
+    url = RainyunHttpSignin.SIGNIN_API_URLS[1]
+    api, calls = make_api(tmp_path, {url: [{"code": 30011, "message": "今日已签到"}]})
+    # 上次签到成功时学到的结构带有 data 字段
+    api.endpoints.learn("signin", url, {"keys": ["code", "data", "message"]})
+
+    assert api.signin_with_cookies()
+    assert calls == [url]
+    assert api.endpoints.get("signin")["url"] == url
+
+
+def test_changed_success_shape_reprobes(tmp_path):
+    url = RainyunHttpSignin.SIGNIN_API_URLS[1]
+    other = RainyunHttpSignin.SIGNIN_API_URLS[2]
+    # 缓存的接口先返回结构已变化的响应，重新探测时不再可用
+    api, calls = make_api(tmp_path, {url: [{"code": 200}],
+                                     other: [{"code": 200, "data": {}, "message": "ok"}]})
+    api.endpoints.learn("signin", url, {"keys": ["code", "data", "message"]})
+
+    assert api.signin_with_cookies()
+    assert calls[0] == url
+    assert api.endpoints.get("signin")["url"] == other
+
+
+def test_probe_reports_errors_from_calling_thread(tmp_path):
+    api, calls = make_api(tmp_path, {})
+    status_url = RainyunHttpSignin.SIGNIN_API_URLS[0]
+
+    def post_json(url, payload=None):
+        if url == status_url:
+            return None, ("site_down", 502)
+        return None, ("timeout", None)
+
+    api._post_json = post_json
+    assert not api.signin_with_cookies()
+    # 站点对其中一个接口返回了状态码，说明站点可达
+    assert (api.last_error, api.error_status) == ("site_down", 502)
+
+
+def test_transient_error_keeps_learned_endpoint(tmp_path):
+    url = RainyunHttpSignin.SIGNIN_API_URLS[1]
+    # 所有接口都没有响应（make_api 中用完的接口返回 502）
+    api, calls = make_api(tmp_path, {})
+    api.endpoints.learn("signin", url, {"keys": ["code", "data", "message"]})
+
+    assert not api.signin_with_cookies()
+    assert calls[0] == url
+    assert api.endpoints.get("signin")["url"] == url
@@ -0,0 +1,44 @@
+import json
+
+from lean_browsing import TrafficMeter, TYPICAL_BYTES, lean_enabled
+
+
+def event(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+class FakeDriver:
+    def __init__(self):
+        self.log = []
+
+    def get_log(self, name):
+        log, self.log = self.log, []
+        return log
+
+
+def test_lean_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("RAINYUN_LEAN", raising=False)
+    assert not lean_enabled()
+    monkeypatch.setenv("RAINYUN_LEAN", "1")
+    assert lean_enabled()
+
+
+def test_meter_estimates_bytes_saved_by_blocking():
+    driver = FakeDriver()
+    meter = TrafficMeter(driver)
+    meter.start_page("https://app.rainyun.com/")
+    driver.log = [
+        event("Network.requestWillBeSent", requestId="1", type="Document"),
+        event("Network.responseReceived", requestId="1", response={}),
+        event("Network.loadingFinished", requestId="1", encodedDataLength=5000),
+        event("Network.requestWillBeSent", requestId="2", type="Font"),
+        event("Network.loadingFailed", requestId="2", blockedReason="inspector"),
+        event("Network.requestWillBeSent", requestId="3", type="Script"),
+        event("Network.loadingFailed", requestId="3", blockedReason="inspector"),
+        event("Network.requestWillBeSent", requestId="4", type="XHR"),
+        event("Network.loadingFailed", requestId="4", errorText="net::ERR_FAILED"),
+    ]
+    meter.flush()
+    assert meter.bytes == 5000
+    assert meter.pages[0]["blocked"] == 2
+    assert meter.saved == TYPICAL_BYTES["Font"] + TYPICAL_BYTES["Script"]
@@ -0,0 +1,33 @@
+from locator import Locator, SelectorCache
+
+
+class NavigatingDriver:
+    """前几次执行脚本时页面正在跳转"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def execute_script(self, script, xpaths, visible):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("javascript error: Cannot find context with specified id")
+        return [1, "element"]
+
+
+def make_locator(tmp_path, driver):
+    return Locator(driver, SelectorCache(str(tmp_path / "selectors.json")))
+
+
+def test_find_keeps_polling_through_navigation(tmp_path):
+    driver = NavigatingDriver(failures=2)
+    locator = make_locator(tmp_path, driver)
+    assert locator.find("login_button", ["//a", "//button"], timeout=2, poll=0.01) == "element"
+    assert driver.calls == 3
+    assert locator.cache.get("login_button") == "//button"
+
+
+def test_find_returns_none_when_errors_last_until_deadline(tmp_path):
+    locator = make_locator(tmp_path, NavigatingDriver(failures=1000))
+    assert locator.find("login_button", ["//button"], timeout=0.05, poll=0.01) is None
+    assert locator.timings[-1][2] is False
@@ -0,0 +1,33 @@
+import pytest
+
+from main import RainyunSignin
+
+
+class FakeProbe:
+    def __init__(self, state):
+        self.state = state
+
+    def wait_for(self, conditions, timeout=None):
+        return self.state
+
+
+def check(state, submitted):
+    signin = RainyunSignin.__new__(RainyunSignin)
+    signin.probe = FakeProbe(state)
+    return signin._check_login_status(submitted=submitted)
+
+
+@pytest.mark.parametrize("state, expected", [
+    ({"logged_in": True}, True),
+    # 探测超时或页面不明确时不接受恢复的会话
+    ({}, False),
+    ({"url": "https://app.rainyun.com/dashboard"}, False),
+    ({"login_page": True}, False),
+])
+def test_restored_session_requires_logged_in(state, expected):
+    assert check(state, submitted=False) is expected
+
+
+def test_submitted_login_accepts_leaving_login_page():
+    assert check({"url": "https://app.rainyun.com/dashboard"}, submitted=True)
+    assert not check({"login_page": True, "login_error": "密码错误"}, submitted=True)
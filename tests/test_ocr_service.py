@@ -0,0 +1,67 @@
+import os
+import socketserver
+import threading
+
+import pytest
+
+import ocr_service
+from ocr_provider import OcrClient
+
+pytestmark = pytest.mark.skipif(not hasattr(socketserver, "ThreadingUnixStreamServer"),
+                                reason="需要 Unix socket")
+
+
+class FakeModel:
+    def classification(self, img_bytes):
+        return img_bytes.decode("ascii").upper()
+
+
+@pytest.fixture
+def service_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_service, "load_model", lambda threads=None: FakeModel())
+    service = ocr_service.OcrService()
+    service.start()
+    path = str(tmp_path / "ocr.sock")
+    server = socketserver.ThreadingUnixStreamServer(path, ocr_service._Handler)
+    server.daemon_threads = True
+    server.service = service
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path, service
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_loaded_only_after_round_trip(service_path):
+    path, service = service_path
+    client = OcrClient(path)
+    assert not client.loaded
+    client.prewarm()
+    assert not client.loaded
+    assert client.classification(b"ab12") == "AB12"
+    assert client.loaded
+    assert service.images == 1
+
+
+def test_client_not_loaded_when_service_unreachable(tmp_path):
+    client = OcrClient(os.path.join(str(tmp_path), "missing.sock"))
+    assert not client.loaded
+    client._connect()
+    assert not client.loaded
+
+
+def test_concurrent_clients_share_one_queue(service_path):
+    path, service = service_path
+    client = OcrClient(path)
+    results = {}
+
+    def worker(n):
+        results[n] = client.classification(f"c{n}".encode("ascii"))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {n: f"C{n}" for n in range(8)}
+    assert service.images == 8
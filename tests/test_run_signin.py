@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("requests")
+
+import main
+import http_signin
+from failures import SITE_DOWN, TIMEOUT
+
+
+class FakeLedger:
+    def signed_today(self, username):
+        return False
+
+    def record(self, username):
+        pass
+
+
+class FakeBrowserSignin:
+    runs = 0
+
+    def __init__(self, *args, **kwargs):
+        self.session_status = None
+        self.failure = None
+        self.traffic = None
+        self.lean = False
+
+    def run(self):
+        FakeBrowserSignin.runs += 1
+        return True
+
+
+@pytest.fixture
+def http_failure(monkeypatch):
+    monkeypatch.setattr(main, "get_ledger", lambda: FakeLedger())
+    monkeypatch.setattr(main, "RainyunSignin", FakeBrowserSignin)
+    FakeBrowserSignin.runs = 0
+
+    def fail_with(failure, status):
+        def run(self):
+            self.failure = failure
+            self.error_status = status
+            return False
+        monkeypatch.setattr(http_signin.RainyunHttpSignin, "run", run)
+
+    return fail_with
+
+
+@pytest.mark.parametrize("failure, status", [(SITE_DOWN, 502), (SITE_DOWN, 503), (TIMEOUT, 504)])
+def test_auto_falls_back_to_browser_on_http_status_errors(http_failure, failure, status):
+    http_failure(failure, status)
+    result = main.run_signin("user", "password", engine="auto", use_session_cache=False)
+    assert FakeBrowserSignin.runs == 1
+    assert result["success"] and result["engine"] == "selenium"
+
+
+@pytest.mark.parametrize("failure", [SITE_DOWN, TIMEOUT])
+def test_auto_skips_browser_when_site_unreachable(http_failure, failure):
+    http_failure(failure, None)
+    result = main.run_signin("user", "password", engine="auto", use_session_cache=False)
+    assert FakeBrowserSignin.runs == 0
+    assert result == {"success": False, "engine": "http", "session": None, "reason": failure}
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from session_cache import SessionStore
+
+
+def mixed_jar(now):
+    return [
+        # 登录态：7 天后过期
+        {"name": "rainyun-token", "value": "a", "expiry": int(now + 7 * 86400)},
+        # 验证码临时 cookie：几分钟后过期
+        {"name": "captcha-ticket", "value": "b", "expiry": int(now + 120)},
+        # 统计 cookie：一年后过期
+        {"name": "_ga", "value": "c", "expiry": int(now + 365 * 86400)},
+        # 会话 cookie：没有 expiry
+        {"name": "PHPSESSID", "value": "d"},
+    ]
+
+
+def test_short_lived_cookies_do_not_expire_session(tmp_path):
+    store = SessionStore(directory=str(tmp_path), ttl=30 * 86400)
+    now = time.time()
+    assert store._expires_at(mixed_jar(now), now) == int(now + 7 * 86400)
+
+
+def test_expiry_capped_by_ttl(tmp_path):
+    store = SessionStore(directory=str(tmp_path), ttl=3600 * 2)
+    now = time.time()
+    assert store._expires_at(mixed_jar(now), now) == now + 3600 * 2
+
+
+def test_save_and_load_mixed_jar(tmp_path):
+    pytest.importorskip("cryptography")
+    store = SessionStore(directory=str(tmp_path), ttl=30 * 86400)
+    cookies = mixed_jar(time.time())
+    store.save("user", "pass", cookies)
+    assert store.load("user", "pass") == cookies
@@ -0,0 +1,13 @@
+import os
+import sys
+import subprocess
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_entry_modules_within_import_budget():
+    # 预算默认读取 RAINYUN_IMPORT_BUDGET_MS，超出预算或提前加载重依赖时退出码非零
+    proc = subprocess.run([sys.executable, "startup_report.py", "--top", "5"],
+                          cwd=ROOT, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
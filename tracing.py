@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段计时
+记录每个阶段的耗时、账号（哈希）、结果和重试次数，
+导出为 JSON lines 与 Prometheus textfile 格式
+"""
+
+import os
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from state import state_path, atomic_write
+
+
+def hash_account(username: str) -> str:
+    """账号脱敏哈希"""
+    if not username:
+        return ""
+    return hashlib.sha256(username.encode("utf-8")).hexdigest()[:12]
+
+
+class Span:
+    """一个计时阶段"""
+
+    def __init__(self, phase: str, account: str = "", **attrs):
+        self.phase = phase
+        self.account = hash_account(account)
+        self.outcome = "ok"
+        self.retries = 0
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration = 0.0
+
+    def to_dict(self) -> dict:
+        """转换为导出记录"""
+        record = {
+            "phase": self.phase,
+            "account": self.account,
+            "outcome": self.outcome,
+            "retries": self.retries,
+            "start": round(self.start, 3),
+            "duration": round(self.duration, 4)
+        }
+        record.update(self.attrs)
+        return record
+
+
+class Tracer:
+    """线程安全的阶段记录器，阶段结束即写入 JSON lines，内存中只保留有界的统计"""
+
+    # 保留的历史 JSON lines 文件数量
+    KEEP_RUNS = 30
+    # 每个阶段用于计算分位数的采样上限
+    RESERVOIR_SIZE = 4096
+
+    def __init__(self, directory: str = None):
+        """
+        初始化
+        :param directory: 导出目录，默认在状态目录下的 traces
+        """
+        self.enabled = os.environ.get("RAINYUN_TRACE", "1") != "0"
+        self.directory = directory or os.environ.get("RAINYUN_TRACE_DIR")
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        self._file = None
+        self._lock = threading.Lock()
+        # 按阶段聚合: 耗时采样 / 次数 / 总耗时 / 重试
+        self._samples = {}
+        self._counts = Counter()
+        self._sums = Counter()
+        self._retries = Counter()
+        self._outcomes = Counter()
+
+    @contextmanager
+    def span(self, phase: str, account: str = "", **attrs):
+        """
+        记录一个阶段
+        用法: with tracer.span("login", username) as span: ... span.outcome = "fail"
+        """
+        span = Span(phase, account, **attrs)
+        started = time.monotonic()
+        try:
+            yield span
+        except BaseException:
+            span.outcome = "error"
+            raise
+        finally:
+            span.duration = time.monotonic() - started
+            self._record(span)
+
+    def _record(self, span: Span):
+        """聚合统计并追加写入"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            phase = span.phase
+            self._counts[phase] += 1
+            self._sums[phase] += span.duration
+            self._retries[phase] += span.retries
+            self._outcomes[(phase, span.outcome)] += 1
+            samples = self._samples.setdefault(phase, [])
+            if len(samples) < self.RESERVOIR_SIZE:
+                samples.append(span.duration)
+            else:
+                # 蓄水池抽样，保持固定内存
+                index = random.randrange(self._counts[phase])
+                if index < self.RESERVOIR_SIZE:
+                    samples[index] = span.duration
+
+            try:
+                if self._file is None:
+                    if not self.directory:
+                        self.directory = state_path("traces")
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._file = open(os.path.join(self.directory, f"{self.run_id}.jsonl"),
+                                      "a", encoding="utf-8")
+                record = dict(span.to_dict(), run_id=self.run_id)
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._file.flush()
+            except OSError as e:
+                print(f"⚠️ 写入阶段耗时失败: {e}")
+                self.enabled = False
+
+    def export(self):
+        """结束本次运行：写入 Prometheus textfile 并清理旧记录"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+            try:
+                atomic_write(os.path.join(self.directory, "rainyun.prom"),
+                             self._prometheus().encode("utf-8"))
+                self._prune()
+                print(f"⏱️ 阶段耗时已导出: {self.directory}/{self.run_id}.jsonl")
+            except OSError as e:
+                print(f"⚠️ 导出阶段耗时失败: {e}")
+
+    def prometheus(self) -> str:
+        """当前累计指标的 Prometheus 文本（供常驻进程的 /metrics 使用）"""
+        with self._lock:
+            return self._prometheus()
+
+    @staticmethod
+    def _quantile(values: list, q: float) -> float:
+        """计算分位数（最近秩）"""
+        ordered = sorted(values)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    def _prometheus(self) -> str:
+        """生成 Prometheus textfile 内容（调用方持有锁）"""
+        lines = [
+            "# HELP rainyun_phase_duration_seconds Duration of each sign-in phase.",
+            "# TYPE rainyun_phase_duration_seconds summary",
+        ]
+        for phase, values in sorted(self._samples.items()):
+            for q in (0.5, 0.95):
+                lines.append(f'rainyun_phase_duration_seconds{{phase="{phase}",quantile="{q}"}} '
+                             f'{self._quantile(values, q):.4f}')
+            lines.append(f'rainyun_phase_duration_seconds_sum{{phase="{phase}"}} '
+                         f'{self._sums[phase]:.4f}')
+            lines.append(f'rainyun_phase_duration_seconds_count{{phase="{phase}"}} '
+                         f'{self._counts[phase]}')
+
+        lines += [
+            "# HELP rainyun_phase_outcome_total Phase outcomes in the last run.",
+            "# TYPE rainyun_phase_outcome_total gauge",
+        ]
+        for (phase, outcome), count in sorted(self._outcomes.items()):
+            lines.append(f'rainyun_phase_outcome_total{{phase="{phase}",outcome="{outcome}"}} {count}')
+
+        lines += [
+            "# HELP rainyun_phase_retries_total Retries per phase in the last run.",
+            "# TYPE rainyun_phase_retries_total gauge",
+        ]
+        for phase, count in sorted(self._retries.items()):
+            lines.append(f'rainyun_phase_retries_total{{phase="{phase}"}} {count}')
+
+        lines.append(f"rainyun_last_run_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def _prune(self):
+        """只保留最近的若干次运行记录"""
+        files = sorted(f for f in os.listdir(self.directory) if f.endswith(".jsonl"))
+        for name in files[:-self.KEEP_RUNS]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+_shared_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """获取进程内共享的记录器"""
+    return _shared_tracer